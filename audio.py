@@ -0,0 +1,86 @@
+import vlc
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+
+def first_audio_track(player):
+    # 第一个真实的音轨 id（描述列表中 -1 表示“禁用”）
+    for track_id, _ in player.audio_get_track_description() or []:
+        if track_id != -1:
+            return track_id
+    return None
+
+
+# --- 音频焦点：只有焦点播放器解码并输出音频，其余播放器关闭音轨 ---
+class AudioFocus(QObject):
+    es_added = pyqtSignal(object)  # 由 libvlc 线程发出，排队到 GUI 线程处理
+
+    def __init__(self, events, parent=None):
+        super().__init__(parent)
+        self.events = events  # events(player) -> 该播放器的 EventDispatcher（见 PlayerPool.events）
+        self.enabled = True
+        self.players = []
+        self.focus = None
+        self.tracks = {}   # player -> 关闭前的音轨 id，用于恢复
+        self.es_added.connect(self.apply, Qt.QueuedConnection)
+
+    def set_players(self, players, focus):
+        for player in list(self.players):
+            if player not in players:
+                self.forget(player)
+        for player in players:
+            if player not in self.players:
+                # 新媒体的音轨出现时重新应用策略（不能在 libvlc 回调中直接调用 libvlc）
+                self.events(player).attach(vlc.EventType.MediaPlayerESAdded, self._es_added, player)
+        self.players = list(players)
+        self.focus = focus
+        # 焦点先打开音频，再关闭其余播放器
+        for player in sorted(self.players, key=lambda p: p is not focus):
+            self.apply(player)
+
+    def forget(self, player):
+        # 播放器归还到池中之前解除事件订阅
+        if player in self.players:
+            self.events(player).detach(vlc.EventType.MediaPlayerESAdded, self._es_added)
+            self.players.remove(player)
+        self.tracks.pop(player, None)
+        if self.focus is player:
+            self.focus = None
+
+    def _es_added(self, event, player):
+        self.es_added.emit(player)
+
+    def set_focus(self, player):
+        previous, self.focus = self.focus, player
+        # 先打开新焦点的音频，再关闭旧焦点，切换时没有静音间隙
+        if player is not None:
+            self.apply(player)
+        if previous is not None and previous is not player:
+            self.apply(previous)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        for player in self.players:
+            self.apply(player)
+
+    def apply(self, player):
+        if player not in self.players:
+            return
+        if not self.enabled or player is self.focus:
+            self.enable_audio(player)
+        else:
+            self.disable_audio(player)
+
+    def enable_audio(self, player):
+        if player.audio_get_track() != -1:
+            return
+        track = self.tracks.pop(player, None)
+        if track is None:
+            track = first_audio_track(player)
+        if track is not None:
+            player.audio_set_track(track)
+
+    def disable_audio(self, player):
+        track = player.audio_get_track()
+        if track != -1:
+            self.tracks[player] = track
+            player.audio_set_track(-1)
@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+
+# 必须在创建 QApplication 之前设置，保证在没有显示器/GPU 的 CI 机器上运行
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from config import CONFIG, DecodeSettings, PROFILES, setup_vlc_path
+setup_vlc_path(CONFIG)
+import vlc
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from stats import read_stats
+
+WINDOW_COUNTS = [1, 2, 4, 6, 8, 9]
+# (名称, 播放模式, 是否共享解码)
+MODES = [
+    ("single", "Single Video", False),
+    ("single-shared", "Single Video", True),
+    ("multi", "Multi Video", False),
+]
+# 视频/音频都输出到 dummy 模块，不需要窗口系统和声卡；共享解码模式本身走 vmem 回调
+BENCH_VLC_ARGS = ["--vout=dummy", "--aout=dummy", "--no-video-title-show", "--quiet"]
+
+
+def rss_bytes():
+    # 当前进程常驻内存；优先 psutil，其次 /proc，最后退回峰值 RSS
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def generate_clip(path, seconds=10, size="640x360", rate=25):
+    # 用 ffmpeg 的 testsrc 生成测试片段，已存在则直接复用
+    if os.path.exists(path):
+        return path
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found; pass --clip to benchmark an existing file")
+    subprocess.run([
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size={size}:rate={rate}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", path,
+    ], check=True)
+    return path
+
+
+def run_events(seconds):
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+def media_stats(medias):
+    # 汇总所有窗口媒体的 libvlc 统计
+    totals = {"decoded_video": 0, "displayed_pictures": 0, "lost_pictures": 0}
+    for media in medias:
+        values = read_stats(media)
+        if values is not None:
+            for key in totals:
+                totals[key] += values[key]
+    return totals
+
+
+def window_medias(window):
+    return [media for _, _, media in window.stat_tiles()]
+
+
+def bench_case(window, mode, shared, count, clip, seconds):
+    # 先卸载上一轮的媒体，避免切换共享解码时自动重新加载
+    window.stop_all()
+    window.media = None
+    window.mode_combo.setCurrentText(mode)
+    window.shared_check.setChecked(shared)
+
+    # 布局切换耗时：从改变窗口个数到事件队列处理完毕
+    start = time.perf_counter()
+    window.window_combo.setCurrentText(str(count))
+    QApplication.processEvents()
+    layout_ms = (time.perf_counter() - start) * 1000
+
+    if mode == "Single Video":
+        window.load_video(clip)
+        window.toggle_play()
+    else:
+        for widget in window.multi_widgets:
+            widget.load_file(clip)
+    run_events(1.0)  # 预热，跳过打开文件和首帧的开销
+
+    before = media_stats(window_medias(window))
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    run_events(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    after = media_stats(window_medias(window))
+    rss = rss_bytes()
+
+    window.stop_all()
+    QApplication.processEvents()
+
+    decoded = after["decoded_video"] - before["decoded_video"]
+    return {
+        "mode": mode,
+        "shared_decode": shared,
+        "windows": count,
+        "layout_switch_ms": round(layout_ms, 2),
+        "decode_fps": round(decoded / wall, 2),
+        "displayed_pictures": after["displayed_pictures"] - before["displayed_pictures"],
+        "lost_pictures": after["lost_pictures"] - before["lost_pictures"],
+        "cpu_percent": round(cpu / wall * 100, 1),
+        "rss_mb": round(rss / (1024 * 1024), 1),
+    }
+
+
+def run(clip, seconds, counts, modes, decode, vlc_args):
+    from play import MultiVideoPlayer
+
+    window = MultiVideoPlayer(decode=decode, vlc_args=vlc_args)
+    window.show()
+    QApplication.processEvents()
+    results = []
+    for name, mode, shared in modes:
+        for count in counts:
+            result = bench_case(window, mode, shared, count, clip, seconds)
+            print(f"{name:>14} x{count}: {result['decode_fps']:7.1f} fps  "
+                  f"{result['cpu_percent']:5.1f}% cpu  {result['rss_mb']:7.1f} MB  "
+                  f"lost {result['lost_pictures']}  layout {result['layout_switch_ms']:.1f} ms")
+            results.append(result)
+    window.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless N-tile playback benchmark")
+    parser.add_argument("--bench-out", default="bench.json", help="JSON file for the results")
+    parser.add_argument("--bench-seconds", type=float, default=5.0, help="measured seconds per case")
+    parser.add_argument("--clip", help="video file to play (default: generate a test clip with ffmpeg)")
+    parser.add_argument("--windows", default=",".join(map(str, WINDOW_COUNTS)),
+                        help="comma separated window counts")
+    parser.add_argument("--modes", default=",".join(name for name, _, _ in MODES),
+                        help="comma separated modes: single, single-shared, multi")
+    parser.add_argument("--decode-profile", choices=list(PROFILES), help="decode profile to benchmark")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    clip = args.clip or generate_clip(os.path.join(tempfile.gettempdir(), "mwvp-bench.mp4"))
+    counts = [int(count) for count in args.windows.split(",")]
+    modes = [mode for mode in MODES if mode[0] in args.modes.split(",")]
+
+    decode = DecodeSettings(CONFIG, args.decode_profile)
+    results = run(os.path.abspath(clip), args.bench_seconds, counts, modes, decode, BENCH_VLC_ARGS)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "libvlc": vlc.libvlc_get_version().decode(),
+        "clip": clip,
+        "decode_profile": decode.profile,
+        "seconds": args.bench_seconds,
+        "results": results,
+    }
+    with open(args.bench_out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.bench_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import os
+import time
+import queue
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QColor
+from framebuffer import fit_rect
+from mosaic import cell_rects
+
+
+def capture_dir(config):
+    # 截图和录像目录：[capture] directory，默认为用户视频目录下的子目录
+    path = config.get("capture", "directory", fallback="")
+    if not path:
+        path = os.path.join(os.path.expanduser("~"), "Videos", "multi-window-video-player")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def capture_stamp():
+    # 精确到毫秒，同一秒内的两次截图不会互相覆盖
+    now = time.time()
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+
+
+def capture_path(directory, source, suffix, stamp=None):
+    # 文件名：媒体名-时间戳，同一批次使用同一个时间戳
+    name = os.path.splitext(os.path.basename(source.rstrip("/")))[0] if source else ""
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name) or "capture"
+    stamp = stamp or capture_stamp()
+    return os.path.join(directory, f"{name}-{stamp}{suffix}")
+
+
+def record_options(path):
+    # libvlc 3 没有录制接口：用 sout 把解复用后的流复制一份写入 TS 文件，不重新编码
+    # 写文件在 libvlc 的输出线程中进行，不影响画面
+    dst = path.replace("\\", "/")
+    return [f":sout=#duplicate{{dst=display,dst=std{{access=file,mux=ts,dst='{dst}'}}}}"]
+
+
+def player_snapshot(player):
+    # 原生窗口输出：由 libvlc 从当前画面编码 PNG，调用会等待截图完成，只能在后台线程中调用
+    def job(path):
+        if player.video_take_snapshot(0, path, 0, 0) != 0:
+            return "no picture to capture"
+        return ""
+    return job
+
+
+def image_snapshot(image):
+    # 帧缓冲输出：GUI 线程中复制当前帧，编码和写盘在后台线程
+    def job(path):
+        if image.isNull():
+            return "no picture to capture"
+        return "" if image.save(path) else f"cannot write {path}"
+    return job
+
+
+def batch_snapshot(tiles, cells, taken=None, size=(1920, 1080)):
+    # 批量截图：依次保存每个窗口，再按布局拼成整面墙；tiles 与 cells 一一对应，空窗口为 None
+    # 每个窗口都截取完成后调用 taken()（在工作线程中），暂停的播放器不必等到整面墙写完再恢复
+    def job(path):
+        try:
+            errors = [error for error in (tile[0](tile[1]) for tile in tiles if tile is not None) if error]
+        finally:
+            if taken is not None:
+                taken()
+        wall = QImage(size[0], size[1], QImage.Format_RGB32)
+        painter = QPainter(wall)
+        painter.fillRect(wall.rect(), QColor("#1e1e1e"))
+        for tile, rect in zip(tiles, cell_rects(cells, wall.rect())):
+            if tile is None:
+                continue
+            image = QImage(tile[1])
+            if not image.isNull():
+                painter.drawImage(fit_rect(image.width(), image.height(), rect), image)
+        painter.end()
+        if not wall.save(path):
+            errors.append(f"cannot write {path}")
+        return "; ".join(errors)
+    return job
+
+
+# --- 截图工作线程：编码和写盘在后台进行，队列有上限，磁盘跟不上时丢弃并计数，不阻塞播放 ---
+class CaptureWorker(QObject):
+    saved = pyqtSignal(str, str)  # 文件路径, 错误信息（成功时为空字符串）
+
+    def __init__(self, directory, queue_size=16, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.dropped = 0    # 队列已满而丢弃的截图数
+        self.written = 0
+        self.thread = threading.Thread(target=self.run, name="capture", daemon=True)
+        self.thread.start()
+
+    def path(self, source, suffix=".png", stamp=None):
+        return capture_path(self.directory, source, suffix, stamp)
+
+    def submit(self, job, path, count=1):
+        # 批量截图作为一个任务提交，要么全部写入，要么整批丢弃
+        try:
+            self.jobs.put_nowait((job, path, count))
+        except queue.Full:
+            self.dropped += count
+            self.saved.emit(path, "disk cannot keep up, snapshot dropped")
+            return False
+        return True
+
+    def run(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                break
+            job, path, count = item
+            try:
+                error = job(path)
+            except OSError as e:
+                error = str(e)
+            if not error:
+                self.written += count
+            self.saved.emit(path, error)
+
+    def shutdown(self, timeout=5):
+        # 等待已排队的截图写完
+        self.jobs.put(None)
+        self.thread.join(timeout)
@@ -0,0 +1,74 @@
+import threading
+import vlc
+from PyQt5.QtCore import QObject, QTimer
+
+
+# --- 全局播放时钟：订阅 libvlc 事件记录最新进度，由一个定时器合并后再刷新界面 ---
+class PlaybackClock(QObject):
+    def __init__(self, events, interval=100, parent=None):
+        super().__init__(parent)
+        self.events = events    # events(player) -> 该播放器的 EventDispatcher（见 PlayerPool.events）
+        self.lock = threading.Lock()
+        self.subscribers = {}   # player -> callback(position, time_ms)
+        self.latest = {}        # player -> [position, time_ms]，由 libvlc 事件线程写入
+        self.dirty = set()      # 自上次刷新后数值发生变化的播放器
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tick)
+
+    def attach(self, player, callback):
+        # 同一个播放器重复订阅时只替换回调
+        if player in self.subscribers:
+            self.subscribers[player] = callback
+            return
+        self.subscribers[player] = callback
+        with self.lock:
+            self.latest[player] = [-1.0, -1]
+        events = self.events(player)
+        events.attach(vlc.EventType.MediaPlayerPositionChanged, self._position_changed, player)
+        events.attach(vlc.EventType.MediaPlayerTimeChanged, self._time_changed, player)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def detach(self, player):
+        if self.subscribers.pop(player, None) is None:
+            return
+        events = self.events(player)
+        events.detach(vlc.EventType.MediaPlayerPositionChanged, self._position_changed)
+        events.detach(vlc.EventType.MediaPlayerTimeChanged, self._time_changed)
+        with self.lock:
+            self.latest.pop(player, None)
+            self.dirty.discard(player)
+        if not self.subscribers:
+            self.timer.stop()
+
+    def detach_all(self):
+        for player in list(self.subscribers):
+            self.detach(player)
+
+    # 以下两个回调运行在 libvlc 线程中，只记录数值，不触碰任何界面对象
+    def _position_changed(self, event, player):
+        with self.lock:
+            latest = self.latest.get(player)
+            if latest is not None and latest[0] != event.u.new_position:
+                latest[0] = event.u.new_position
+                self.dirty.add(player)
+
+    def _time_changed(self, event, player):
+        with self.lock:
+            latest = self.latest.get(player)
+            if latest is not None and latest[1] != event.u.new_time:
+                latest[1] = event.u.new_time
+                self.dirty.add(player)
+
+    def tick(self):
+        # 每个周期只唤醒一次 GUI 线程，且只通知数值变化过的订阅者
+        with self.lock:
+            if not self.dirty:
+                return
+            changed = [(player, tuple(self.latest[player])) for player in self.dirty]
+            self.dirty.clear()
+        for player, (position, time_ms) in changed:
+            callback = self.subscribers.get(player)
+            if callback is not None:
+                callback(position, time_ms)
@@ -0,0 +1,126 @@
+import os
+import configparser
+
+# 配置文件与程序放在同一目录，不依赖当前工作目录
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "play.conf")
+DEFAULT_VLC_PATH = r"C:\Program Files\VideoLAN\VLC"
+
+# 解码配置档：[decode] 中显式写出的选项会覆盖配置档的默认值
+PROFILES = {
+    "default": {},
+    # 低延迟：缩短缓存，适合实时流和频繁跳转
+    "low-latency": {
+        "file_caching": 150,
+        "network_caching": 200,
+        "fast_seek": True,
+        "extra_args": "--clock-jitter=0 --clock-synchro=0",
+    },
+    # 多窗口：每个解码器少用线程、放宽缓存，尽量多开窗口
+    "max-tiles": {
+        "decoder_threads": 2,
+        "file_caching": 1000,
+        "network_caching": 1500,
+        "mute_no_audio": True,
+        "extra_args": "--avcodec-skiploopfilter=1",
+    },
+    # 画质优先：解码线程自动、较长缓存
+    "quality": {
+        "decoder_threads": 0,
+        "file_caching": 1500,
+        "network_caching": 3000,
+        "extra_args": "--avcodec-skiploopfilter=0",
+    },
+}
+
+
+def load_config(path=CONFIG_PATH):
+    config = configparser.ConfigParser()
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError:
+        return config
+    try:
+        config.read_string(text, source=path)
+    except configparser.MissingSectionHeaderError:
+        # 兼容旧版没有节标题、只有一行 vlc_path 的配置文件
+        config.read_string("[DEFAULT]\n" + text, source=path)
+    return config
+
+
+CONFIG = load_config()
+
+
+def cache_dir(config):
+    # 缓存目录：[DEFAULT] cache_dir，默认为各平台的用户缓存目录
+    path = config.get("DEFAULT", "cache_dir", fallback="")
+    if not path:
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+            or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "multi-window-video-player")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def setup_vlc_path(config):
+    # 只有 Windows 需要把 VLC 安装目录加入 DLL 搜索路径，必须在 import vlc 之前调用
+    if not hasattr(os, "add_dll_directory"):
+        return
+    vlc_path = config.get("DEFAULT", "vlc_path", fallback=DEFAULT_VLC_PATH)
+    if os.path.isdir(vlc_path):
+        os.add_dll_directory(vlc_path)
+    else:
+        print(f"VLC directory not found: {vlc_path}, check vlc_path in play.conf")
+
+
+# --- [decode] 配置：映射为 libvlc 实例参数和媒体选项 ---
+class DecodeSettings:
+    def __init__(self, config, profile=None):
+        section = config["decode"] if config.has_section("decode") else {}
+        self.profile = profile or section.get("profile", "default")
+        if self.profile not in PROFILES:
+            raise ValueError(f"Unknown decode profile {self.profile!r}, choose from {', '.join(PROFILES)}")
+        values = dict(PROFILES[self.profile])
+        for key in ("decoder_threads", "file_caching", "network_caching",
+                    "mute_no_audio", "fast_seek", "instance_mode", "hw_decode", "extra_args"):
+            if key in section:
+                values[key] = section[key]
+
+        self.decoder_threads = _int(values.get("decoder_threads"))   # --avcodec-threads，0 为自动
+        self.file_caching = _int(values.get("file_caching"))         # 毫秒
+        self.network_caching = _int(values.get("network_caching"))   # 毫秒
+        self.mute_no_audio = _bool(values.get("mute_no_audio", False))  # 静音窗口不解码音频
+        self.hw_decode = values.get("hw_decode")                      # any / none / 具体模块名
+        self.fast_seek = _bool(values.get("fast_seek", False))        # 所有跳转都只跳到关键帧（libvlc 3）
+        self.extra_args = str(values.get("extra_args", "")).split()
+        # shared：所有窗口共用一个 vlc.Instance；per-tile：每个窗口独立的实例；process：每个窗口在独立的子进程中解码
+        self.instance_mode = values.get("instance_mode", "shared")
+        if self.instance_mode not in ("shared", "per-tile", "process"):
+            raise ValueError(f"instance_mode must be 'shared', 'per-tile' or 'process', not {self.instance_mode!r}")
+
+    def instance_args(self):
+        args = []
+        if self.decoder_threads is not None:
+            args.append(f"--avcodec-threads={self.decoder_threads}")
+        if self.file_caching is not None:
+            args.append(f"--file-caching={self.file_caching}")
+        if self.network_caching is not None:
+            args.append(f"--network-caching={self.network_caching}")
+        if self.hw_decode:
+            args.append(f"--avcodec-hw={self.hw_decode}")
+        if self.fast_seek:
+            args.append("--input-fast-seek")
+        return args + self.extra_args
+
+    def media_options(self, muted=False):
+        return [":no-audio"] if muted and self.mute_no_audio else []
+
+
+def _int(value):
+    return None if value is None or value == "" else int(value)
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "yes", "true", "on")
@@ -0,0 +1,149 @@
+import json
+import time
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+# 只接受以这些主机名访问的请求（防止 DNS 重绑定），以及来自这些主机的网页发起的请求（防止跨站请求）
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+
+
+# 一批命令在 GUI 线程中的处理请求：由服务线程创建，GUI 线程执行后唤醒服务线程
+class Batch:
+    def __init__(self, commands):
+        self.commands = commands
+        self.received = time.perf_counter()
+        self.started = None
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+        self.lock = threading.Lock()
+        self.cancelled = False  # 等待超时后取消，之后不再执行
+
+
+# --- 本机控制接口：HTTP 服务运行在后台线程，每批命令通过一次排队信号在 GUI 线程中整体执行 ---
+class ControlServer(QObject):
+    submitted = pyqtSignal(object)  # Batch，排队到 GUI 线程
+
+    def __init__(self, execute, port=0, timeout=10, history=200, parent=None):
+        super().__init__(parent)
+        # execute(commands) 在 GUI 线程中调用：先检查整批命令，有错误时抛出 ValueError 且不执行任何命令
+        self.execute = execute
+        self.timeout = timeout
+        self.latency = deque(maxlen=history)  # 最近几批命令的 (排队毫秒, 执行毫秒)
+        self.submitted.connect(self.apply, Qt.QueuedConnection)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="control", daemon=True).start()
+
+    def call(self, commands):
+        # 可在任意线程调用；返回 (结果列表, 延迟 dict)，命令有误时抛出 ValueError
+        batch = Batch(commands)
+        if threading.current_thread() is threading.main_thread():
+            self.apply(batch)  # 已经在 GUI 线程中（例如测试脚本直接调用）
+        else:
+            self.submitted.emit(batch)
+            if not batch.done.wait(self.timeout):
+                with batch.lock:
+                    if batch.started is None:
+                        # 还没开始执行：取消，客户端收到超时错误后命令不会再被执行
+                        batch.cancelled = True
+                        raise TimeoutError("the player did not respond in time, no command was applied")
+                batch.done.wait()  # 已经开始执行，整批命令一定会执行完
+        if batch.error is not None:
+            raise batch.error
+        finished = time.perf_counter()
+        latency = {"queue_ms": round((batch.started - batch.received) * 1000, 3),
+                   "apply_ms": round((finished - batch.started) * 1000, 3)}
+        return batch.results, latency
+
+    def apply(self, batch):
+        # GUI 线程：整批命令在这一次调用中执行完，期间不会处理其他事件
+        with batch.lock:
+            if batch.cancelled:
+                return
+            batch.started = time.perf_counter()
+        try:
+            batch.results = self.execute(batch.commands)
+        except ValueError as e:
+            batch.error = e
+        except Exception as e:
+            batch.error = RuntimeError(f"{type(e).__name__}: {e}")
+        self.latency.append((round((batch.started - batch.received) * 1000, 3),
+                             round((time.perf_counter() - batch.started) * 1000, 3)))
+        batch.done.set()
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # GET /state、GET /stats 读取状态；POST /commands 提交一条命令或一批命令（JSON 数组）
+            def do_GET(self):
+                if not self.allowed():
+                    return
+                if self.path not in ("/state", "/stats"):
+                    self.send_error(404)
+                    return
+                self.respond([{"cmd": self.path[1:]}], single=True)
+
+            def do_POST(self):
+                if not self.allowed():
+                    return
+                if self.path != "/commands":
+                    self.send_error(404)
+                    return
+                # 网页的表单和简单请求不能带 application/json，跨站页面无法直接提交命令
+                if self.headers.get_content_type() != "application/json":
+                    self.reply(415, {"error": "Content-Type must be application/json"})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                except ValueError as e:
+                    self.reply(400, {"error": f"bad JSON: {e}"})
+                    return
+                single = isinstance(body, dict)
+                self.respond([body] if single else body, single)
+
+            def allowed(self):
+                host = urlsplit("//" + self.headers.get("Host", "")).hostname
+                origin = self.headers.get("Origin")
+                if host not in LOCAL_HOSTS or (origin is not None and urlsplit(origin).hostname not in LOCAL_HOSTS):
+                    self.reply(403, {"error": "only local requests are accepted"})
+                    return False
+                return True
+
+            def respond(self, commands, single=False):
+                if not isinstance(commands, list) or not all(isinstance(c, dict) for c in commands):
+                    self.reply(400, {"error": "expected a command object or a list of command objects"})
+                    return
+                try:
+                    results, latency = server.call(commands)
+                except ValueError as e:
+                    self.reply(400, {"error": str(e)})
+                    return
+                except (TimeoutError, RuntimeError) as e:
+                    self.reply(500, {"error": str(e)})
+                    return
+                self.reply(200, {"result" if single else "results": results[0] if single else results,
+                                 "latency": latency})
+
+            def reply(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
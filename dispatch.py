@@ -0,0 +1,54 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from layout import MAX_TILES
+
+
+# --- 并行下发命令：每个播放器的 libvlc 调用在线程池中执行，用屏障让所有调用在同一时刻开始 ---
+class CommandDispatcher:
+    def __init__(self, workers=MAX_TILES, barrier_timeout=1000, wait_timeout=250):
+        # 屏障要求每个播放器占用一个线程，线程数不少于最大窗口数
+        self.workers = workers
+        self.barrier_timeout = barrier_timeout / 1000.0
+        # GUI 线程最多等待这么久，更慢的调用（例如卡住的网络流）在后台继续执行，不计入结果
+        self.wait_timeout = wait_timeout / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dispatch")
+        self.last = []      # 最近一次下发：[(player, 开始毫秒, 完成毫秒)]，从最早开始的调用算起
+        self.skew_ms = 0.0  # 最近一次下发中最晚与最早开始的调用之差
+        self.late = 0       # 最近一次下发中等待超时、仍在后台执行的调用数
+
+    def run(self, players, command, *args):
+        # 对每个播放器调用 player.<command>(*args)，返回按时完成的调用各自的开始/完成时间
+        players = list(players)
+        if len(players) < 2 or len(players) > self.workers:
+            # 只有一个播放器，或超出线程数无法让所有调用同时等在屏障上：直接依次调用
+            timings = [self.call(None, player, command, args) for player in players]
+        else:
+            barrier = threading.Barrier(len(players))
+            futures = [self.executor.submit(self.call, barrier, player, command, args) for player in players]
+            done, _ = wait(futures, self.wait_timeout)
+            timings = [future.result() if future in done else None for future in futures]
+        finished = [(player, timing) for player, timing in zip(players, timings) if timing is not None]
+        self.late = len(players) - len(finished)
+        if not finished:
+            self.last, self.skew_ms = [], 0.0
+            return self.last
+        origin = min(start for _, (start, _) in finished)
+        self.last = [(player, round((start - origin) * 1000, 3), round((end - origin) * 1000, 3))
+                     for player, (start, end) in finished]
+        self.skew_ms = max(start for _, start, _ in self.last)
+        return self.last
+
+    def call(self, barrier, player, command, args):
+        if barrier is not None:
+            try:
+                barrier.wait(self.barrier_timeout)
+            except threading.BrokenBarrierError:
+                pass  # 有线程迟迟未就绪时不再等待，照常执行
+        start = time.perf_counter()
+        getattr(player, command)(*args)
+        return start, time.perf_counter()
+
+    def shutdown(self):
+        # 关闭时不等待卡住的调用（例如网络流），尚未开始的调用直接取消
+        self.executor.shutdown(wait=False, cancel_futures=True)
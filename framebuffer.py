@@ -0,0 +1,129 @@
+import ctypes
+import threading
+import vlc
+from PyQt5 import sip
+from PyQt5.QtCore import Qt, QObject, QRect, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QFrame
+
+# libvlc 的 format 回调需要写回 chroma，因此使用 c_void_p 代替 c_char_p 自行声明原型
+_VideoFormatCb = ctypes.CFUNCTYPE(
+    ctypes.c_uint,
+    ctypes.POINTER(ctypes.c_void_p),
+    ctypes.c_void_p,
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+)
+
+
+# --- 共享帧缓冲：一个播放器通过 libvlc 视频回调解码到内存，多个窗口从中绘制 ---
+class SharedFrameBuffer(QObject):
+    frame_ready = pyqtSignal()
+
+    def __init__(self, player, max_width=1920, max_height=1080):
+        super().__init__()
+        self.player = player
+        self.max_width = max_width
+        self.max_height = max_height
+        self.lock = threading.Lock()
+        self.width = 0
+        self.height = 0
+        self.pitch = 0
+        self.buffer = None
+        self.image = QImage()
+        self.frame_count = 0
+        self._pending = False
+
+        # 回调对象必须保持引用，否则会被垃圾回收导致 libvlc 调用野指针
+        self._format_cb = _VideoFormatCb(self._setup)
+        self._cleanup_cb = vlc.CallbackDecorators.VideoCleanupCb(self._cleanup)
+        self._lock_cb = vlc.CallbackDecorators.VideoLockCb(self._lock)
+        self._unlock_cb = vlc.CallbackDecorators.VideoUnlockCb(self._unlock)
+        self._display_cb = vlc.CallbackDecorators.VideoDisplayCb(self._display)
+        player.video_set_format_callbacks(
+            ctypes.cast(self._format_cb, vlc.CallbackDecorators.VideoFormatCb),
+            self._cleanup_cb)
+        player.video_set_callbacks(self._lock_cb, self._unlock_cb, self._display_cb, None)
+
+    def _setup(self, opaque, chroma, width, height, pitches, lines):
+        # 按原始宽高比缩放到上限以内，宽度对齐到 8 像素保证 pitch 为 32 字节倍数
+        w, h = width[0], height[0]
+        scale = min(1.0, self.max_width / max(w, 1), self.max_height / max(h, 1))
+        w = max(8, int(w * scale) // 8 * 8)
+        h = max(2, int(h * scale))
+        ctypes.memmove(chroma, b"RV32", 4)
+        width[0], height[0] = w, h
+        pitches[0] = w * 4
+        lines[0] = (h + 31) // 32 * 32
+        with self.lock:
+            self.width, self.height, self.pitch = w, h, w * 4
+            self.buffer = ctypes.create_string_buffer(self.pitch * lines[0])
+            self.image = QImage(sip.voidptr(ctypes.addressof(self.buffer)),
+                                w, h, self.pitch, QImage.Format_RGB32)
+        return 1
+
+    def _cleanup(self, opaque):
+        with self.lock:
+            self.image = QImage()
+            self.buffer = None
+            self.width = self.height = self.pitch = 0
+
+    def _lock(self, opaque, planes):
+        # 解码期间持有锁，绘制线程不会读到写了一半的帧；返回值作为 picture 传给 _unlock 和 _display
+        self.lock.acquire()
+        try:
+            planes[0] = ctypes.addressof(self.buffer)
+        except TypeError:
+            # 格式已被清理（buffer 为 None）：不能带着锁返回，否则绘制线程会一直等待
+            self.lock.release()
+            return None
+        return 1
+
+    def _unlock(self, opaque, picture, planes):
+        if picture is None:
+            return  # _lock 没有取得缓冲，也没有持有锁
+        self.frame_count += 1
+        self.lock.release()
+
+    def _display(self, opaque, picture):
+        # 合并通知：GUI 线程还没处理上一帧时不再重复发信号
+        if picture is not None and not self._pending:
+            self._pending = True
+            self.frame_ready.emit()
+
+    def frame_consumed(self):
+        self._pending = False
+
+
+# --- 从共享帧缓冲绘制的视频窗口，取代绑定原生窗口句柄的 QFrame；没有帧缓冲时与 QFrame 相同 ---
+class FrameView(QFrame):
+    def __init__(self, source=None, parent=None):
+        super().__init__(parent)
+        self.set_source(source)
+
+    def set_source(self, source):
+        self.source = source
+        self.setAttribute(Qt.WA_OpaquePaintEvent, source is not None)
+        self.update()
+
+    def paintEvent(self, event):
+        if self.source is None:
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        with self.source.lock:
+            image = self.source.image
+            if not image.isNull():
+                painter.drawImage(fit_rect(image.width(), image.height(), self.rect()), image)
+        painter.end()
+
+
+def fit_rect(width, height, bounds):
+    # 保持宽高比居中缩放到目标区域
+    scale = min(bounds.width() / width, bounds.height() / height)
+    w, h = int(width * scale), int(height * scale)
+    return QRect(bounds.x() + (bounds.width() - w) // 2,
+                 bounds.y() + (bounds.height() - h) // 2, w, h)
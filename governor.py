@@ -0,0 +1,173 @@
+import os
+import time
+import vlc
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# 逐级降低解码开销的媒体选项；0 级为原始质量
+QUALITY_LEVELS = [
+    [],
+    [":avcodec-skiploopfilter=4", ":avcodec-hurry-up"],
+    [":avcodec-skiploopfilter=4", ":avcodec-hurry-up", ":avcodec-skip-frame=1",
+     ":avcodec-skip-idct=1", ":adaptive-maxheight=360"],
+]
+
+
+def tile_hidden(widget):
+    # 最小化、被遮挡（不可见区域为空）或尺寸为 0 的窗口不需要解码
+    return (widget.window().isMinimized() or not widget.isVisible()
+            or widget.width() == 0 or widget.height() == 0
+            or widget.visibleRegion().isEmpty())
+
+
+# --- CPU 使用率：优先 psutil（全系统），否则按本进程 CPU 时间折算到所有核心 ---
+class CpuMeter:
+    def __init__(self):
+        try:
+            import psutil
+            self.psutil = psutil
+            psutil.cpu_percent(None)
+        except ImportError:
+            self.psutil = None
+        self.cpus = os.cpu_count() or 1
+        self.last = (time.process_time(), time.monotonic())
+
+    def percent(self):
+        if self.psutil is not None:
+            return self.psutil.cpu_percent(None)
+        cpu, wall = time.process_time(), time.monotonic()
+        last_cpu, last_wall = self.last
+        self.last = (cpu, wall)
+        if wall <= last_wall:
+            return 0.0
+        return (cpu - last_cpu) / (wall - last_wall) / self.cpus * 100
+
+
+# --- 自适应质量调节：负载高时逐个降低非焦点小窗口的解码质量，负载下降后自动恢复。
+#     解码选项只能在打开媒体时指定，每次调整都要重新打开媒体，所以默认关闭，由用户开启 ---
+class QualityGovernor(QObject):
+    level_changed = pyqtSignal(str, int)     # 窗口名, 新的质量级别
+    paused_changed = pyqtSignal(object, bool)  # player, 是否因窗口不可见而被暂停
+
+    def __init__(self, pool, tiles, high_cpu=85, low_cpu=60, lost_threshold=5,
+                 cooldown=3.0, starts=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.tiles = tiles                  # 返回 [(窗口名, player, widget, 是否焦点), ...] 的函数
+        self.starts = starts                # StartPositions：暂停的窗口重新打开后回到原位置并保持暂停
+        self.high_cpu = high_cpu
+        self.low_cpu = low_cpu
+        self.lost_threshold = lost_threshold  # 每个采样周期内的丢帧数
+        self.cooldown = cooldown
+        self.enabled = False
+        self.cpu = CpuMeter()
+        self.levels = {}                    # player -> 当前质量级别
+        self.paused = set()                 # 因窗口不可见而被暂停的播放器
+        self.lost = {}                      # 窗口名 -> 上次的丢帧计数
+        self.last_change = 0.0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.restore_all()
+
+    def restore_all(self):
+        for name, player, widget, _ in self.tiles():
+            resume = player in self.paused
+            # 被暂停的窗口直接按播放状态重新打开；没有重新打开时再取消暂停
+            restored = self.levels.get(player, 0) and self.apply_level(name, player, 0, resume)
+            if resume:
+                if not restored:
+                    player.set_pause(0)
+                self.paused_changed.emit(player, False)
+        self.paused.clear()
+        self.levels.clear()
+
+    def forget(self, player):
+        # 播放器归还到池中或重新加载媒体时清除记录
+        self.levels.pop(player, None)
+        self.paused.discard(player)
+
+    def update(self, rows):
+        # 与统计采集同频调用，rows 为 StatsCollector 的输出
+        if not self.enabled:
+            return
+        lost = {}
+        for row in rows:
+            lost[row["tile"]] = row["lost_pictures"] - self.lost.get(row["tile"], row["lost_pictures"])
+            self.lost[row["tile"]] = row["lost_pictures"]
+
+        visible = []
+        for name, player, widget, focused in self.tiles():
+            if self.pool.media_of(player) is None:
+                continue
+            hidden = tile_hidden(widget)
+            if hidden and player not in self.paused and player.is_playing():
+                player.set_pause(1)
+                self.paused.add(player)
+                self.paused_changed.emit(player, True)
+            elif not hidden and player in self.paused:
+                player.set_pause(0)
+                self.paused.discard(player)
+                self.paused_changed.emit(player, False)
+            if hidden:
+                continue
+            # 焦点窗口始终保持原始质量
+            if focused and self.levels.get(player, 0):
+                self.apply_level(name, player, 0)
+            visible.append((name, player, widget, focused))
+
+        cpu = self.cpu.percent()
+        if time.monotonic() - self.last_change < self.cooldown:
+            return
+        pressure = cpu > self.high_cpu or any(count > self.lost_threshold for count in lost.values())
+        candidates = [(widget.width() * widget.height(), name, player)
+                      for name, player, widget, focused in visible if not focused]
+        if pressure:
+            # 先降低面积最小的窗口
+            for _, name, player in sorted(candidates, key=lambda item: item[0]):
+                level = self.levels.get(player, 0)
+                if level < len(QUALITY_LEVELS) - 1 and self.apply_level(name, player, level + 1):
+                    break
+        elif cpu < self.low_cpu:
+            # 负载下降后先恢复面积最大的窗口
+            for _, name, player in sorted(candidates, key=lambda item: item[0], reverse=True):
+                level = self.levels.get(player, 0)
+                if level > 0 and self.apply_level(name, player, level - 1):
+                    break
+
+    def apply_level(self, name, player, level, resume=False):
+        # 解码选项只在打开媒体时生效：按新选项重新打开并回到原来的时间点和播放状态；没有调整时返回 False。
+        # resume 为 True 时重新打开后开始播放（取消暂停的窗口）
+        media = self.pool.media_of(player)
+        if media is None:
+            return False
+        options = self.pool.options_of(player)
+        if any(option.startswith(":sout") for option in options):
+            return False  # 录制中的窗口重新打开会从头覆盖录像文件，保持原来的质量
+        playing = resume or player.is_playing()
+        paused = not playing and player.get_state() == vlc.State.Paused
+        if paused and self.starts is None:
+            return False  # 无法在重新打开后恢复暂停的画面，保持原来的质量
+        # 保留打开时的其他选项（网络流缓存、内存预算降级、静音），只替换上一级附加的质量选项
+        current = QUALITY_LEVELS[self.levels.get(player, 0)]
+        if current and options[-len(current):] == current:
+            options = options[:-len(current)]
+        options += QUALITY_LEVELS[level]
+        position = player.get_time()
+        new_media = self.pool.media_new(player, media.get_mrl(), *options)
+        self.pool.set_media(player, new_media)
+        if playing:
+            player.play()
+            if position > 0:
+                player.set_time(position)
+        elif paused:
+            # 开始播放后跳回原位置并暂停，停在原来的画面上
+            self.starts.arm(player, max(0, position), paused=True)
+            player.play()
+        if level:
+            self.levels[player] = level
+        else:
+            self.levels.pop(player, None)
+        self.last_change = time.monotonic()
+        self.level_changed.emit(name, level)
+        return True
@@ -0,0 +1,563 @@
+import time
+import queue
+import ctypes
+import struct
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+import vlc
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+from framebuffer import SharedFrameBuffer
+from stats import COUNTERS
+from probe import parse_media
+from thumbnails import THUMBNAIL_ARGS, capture_thumbnails
+
+# 共享内存布局：头部之后是三个帧槽，子进程写入父进程既没有在读、也不是最近写完的帧槽（三缓冲）
+# 头部由子进程写入：版本号（seqlock，写入中为奇数）, 帧序号, 宽, 高, 行字节数, 最近写完的帧槽
+HEADER = struct.Struct("<QQIIII")
+VERSION = struct.Struct("<Q")
+# 父进程正在绘制的帧槽，只由父进程写入
+READING = struct.Struct("<I")
+READING_OFFSET = 32
+HEADER_SIZE = 64
+SLOTS = 3
+# 子进程回报状态的默认值（尚未收到第一次回报时）
+IDLE_STATUS = {"time": -1, "position": -1.0, "length": 0, "playing": False, "state": 0, "rate": 1.0,
+               "volume": 100, "mute": 0, "track": -1, "tracks": [], "stats": {}}
+
+
+def slot_size(max_width, max_height):
+    # 与 SharedFrameBuffer 相同：行数对齐到 32
+    return max_width * 4 * ((max_height + 31) // 32 * 32)
+
+
+def read_header(buf, retries=100):
+    # seqlock：版本号为奇数（正在写入）或读取前后不一致时重读，返回 (帧序号, 宽, 高, 行字节数, 帧槽)
+    for _ in range(retries):
+        version, *values = HEADER.unpack_from(buf, 0)
+        if version % 2 == 0 and VERSION.unpack_from(buf, 0)[0] == version:
+            return values
+    return None
+
+
+# --- 子进程：解码到共享内存的帧缓冲 ---
+class SharedMemoryWriter(SharedFrameBuffer):
+    def __init__(self, player, shm, max_width, max_height):
+        self.shm = shm
+        self.memory = (ctypes.c_char * shm.size).from_buffer(shm.buf)
+        self.slot_size = slot_size(max_width, max_height)
+        # 接着上一个（崩溃的）子进程的帧序号，父进程据此判断新帧
+        self.version, self.sequence, _, _, _, self.slot = HEADER.unpack_from(shm.buf, 0)
+        self.version += self.version % 2  # 上一个子进程可能在写入头部时退出
+        self.writing = self.slot
+        super().__init__(player, max_width, max_height)
+
+    def _setup(self, opaque, chroma, width, height, pitches, lines):
+        result = super()._setup(opaque, chroma, width, height, pitches, lines)
+        with self.lock:
+            self.buffer = None  # 帧直接写入共享内存，不需要本地缓冲
+            self.image = QImage()
+        return result
+
+    def _lock(self, opaque, planes):
+        # 写入既不是父进程正在读、也不是最近写完（父进程下一次要读）的帧槽
+        self.lock.acquire()
+        try:
+            reading = READING.unpack_from(self.shm.buf, READING_OFFSET)[0]
+            self.writing = next(slot for slot in range(SLOTS) if slot not in (reading, self.slot))
+            planes[0] = ctypes.addressof(self.memory) + HEADER_SIZE + self.writing * self.slot_size
+        except (TypeError, ValueError):
+            # 共享内存已经关闭（子进程正在退出）：释放锁，这一帧丢弃
+            self.lock.release()
+            return None
+        return 1
+
+    def _display(self, opaque, picture):
+        if picture is None:
+            return
+        self.slot = self.writing
+        self.sequence += 1
+        # 先把版本号改为奇数再写其余字段，父进程读到奇数或前后不一致的版本号时重读
+        VERSION.pack_into(self.shm.buf, 0, self.version + 1)
+        HEADER.pack_into(self.shm.buf, 0, self.version + 1, self.sequence, self.width, self.height, self.pitch,
+                         self.slot)
+        self.version += 2
+        VERSION.pack_into(self.shm.buf, 0, self.version)
+
+
+def player_status(player, media):
+    stats = {}
+    if media is not None:
+        values = vlc.MediaStats()
+        if media.get_stats(values):
+            stats = {key: getattr(values, key) for key in COUNTERS + ("input_bitrate", "demux_bitrate")}
+    return {"time": player.get_time(), "position": player.get_position(), "length": player.get_length(),
+            "playing": bool(player.is_playing()), "state": player.get_state().value,
+            "rate": player.get_rate(), "volume": player.audio_get_volume(), "mute": player.audio_get_mute(),
+            "track": player.audio_get_track(), "tracks": list(player.audio_get_track_description() or []),
+            "stats": stats}
+
+
+def send_loop(conn, outbox):
+    # 父进程的发送线程：子进程不读取时管道写满，send 会一直阻塞，不能放在 GUI 线程中
+    while True:
+        message = outbox.get()
+        if message is None:
+            break
+        try:
+            conn.send(message)
+        except (OSError, ValueError):
+            break  # 子进程已退出，由监督者重启
+    conn.close()
+
+
+def worker_main(conn, shm_name, max_width, max_height, args, interval=0.1):
+    # 子进程入口：独立的 libvlc 实例和播放器，按命令控制，定时回报状态（同时作为心跳）
+    shm = shared_memory.SharedMemory(name=shm_name)  # 由父进程负责删除
+    instance = vlc.Instance(*args)
+    player = instance.media_player_new()
+    frames = SharedMemoryWriter(player, shm, max_width, max_height)
+    media = None
+    next_report = 0
+    try:
+        while True:
+            if conn.poll(interval):
+                command, *values = conn.recv()
+                if command == "quit":
+                    break
+                if command == "load":
+                    mrl, options = values
+                    media = instance.media_new(mrl, *options) if mrl else None
+                    player.set_media(media)
+                else:
+                    getattr(player, command)(*values)
+            # 连续收到命令（例如拖动进度条）时也按时回报
+            now = time.monotonic()
+            if now >= next_report:
+                conn.send(("status", player_status(player, media)))
+                next_report = now + interval
+    except (EOFError, OSError):
+        pass  # 父进程已退出
+    player.stop()
+    player.release()
+    frames.memory = None  # 释放对共享内存的引用后才能关闭
+    shm.close()
+
+
+# 辅助子进程中的 libvlc 实例，第一次使用时创建
+helper = SimpleNamespace(instance=None)
+
+
+def helper_instance():
+    if helper.instance is None:
+        helper.instance = vlc.Instance(*THUMBNAIL_ARGS)
+    return helper.instance
+
+
+def helper_probe(path, timeout):
+    return parse_media(helper_instance(), path, timeout)
+
+
+def helper_thumbnails(path, duration_ms, width, height, interval):
+    return capture_thumbnails(helper_instance(), path, duration_ms, width, height, interval)
+
+
+# --- 辅助子进程：进程隔离模式下媒体探测和缩略图生成也不在本进程中调用 libvlc，崩溃或卡住不影响主进程 ---
+class HelperProcess:
+    def __init__(self, timeout=120):
+        self.timeout = timeout  # 秒
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def run(self, function, *args, timeout=None):
+        # 在后台线程中调用并等待结果；子进程崩溃或超时时抛出 TimeoutError，下次调用换一个新的子进程
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.get_context("spawn").Pool(1)
+            pool = self.pool
+        try:
+            return pool.apply_async(function, args).get(timeout or self.timeout)
+        except multiprocessing.TimeoutError:
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = None
+            pool.terminate()
+            raise TimeoutError(f"{function.__name__} did not finish in time") from None
+
+    def probe(self, path, timeout):
+        return self.run(helper_probe, path, timeout, timeout=timeout / 1000.0 + 5)
+
+    def thumbnails(self, path, duration_ms, width, height, interval):
+        return self.run(helper_thumbnails, path, duration_ms, width, height, interval)
+
+    def close(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+# --- 父进程：子进程写入的共享内存，提供与 SharedFrameBuffer 相同的绘制接口 ---
+class RemoteFrameBuffer:
+    def __init__(self, max_width, max_height):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.slot_size = slot_size(max_width, max_height)
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + SLOTS * self.slot_size)
+        HEADER.pack_into(self.shm.buf, 0, 0, 0, 0, 0, 0, 0)
+        READING.pack_into(self.shm.buf, READING_OFFSET, SLOTS - 1)
+        self.memory = (ctypes.c_char * self.shm.size).from_buffer(self.shm.buf)
+        self.lock = threading.Lock()
+        self.image = QImage()
+        self.sequence = 0
+        self.frame_count = 0
+        self.view = None    # 当前绑定的窗口，一个播放器同时只输出到一个窗口
+
+    def bind(self, view):
+        if self.view is not view:
+            if self.view is not None and not sip.isdeleted(self.view):
+                self.view.set_source(None)
+            self.view = view
+        view.set_source(self)
+
+    def poll(self):
+        # 有新帧时把最近写完的帧槽标记为正在读，子进程不再写入它，绘制时直接指向它（不复制）
+        header = read_header(self.shm.buf)
+        if header is None or header[0] == self.sequence or not header[1]:
+            return
+        with self.lock:
+            for _ in range(3):
+                sequence, width, height, pitch, slot = header
+                READING.pack_into(self.shm.buf, READING_OFFSET, slot)
+                # 标记之前子进程可能已经写完了更新的帧并选中了这个帧槽：帧序号没变才能确定它不会被改写
+                header = read_header(self.shm.buf)
+                if header is None or header[0] == sequence:
+                    break
+            address = ctypes.addressof(self.memory) + HEADER_SIZE + slot * self.slot_size
+            image = QImage(sip.voidptr(address), width, height, pitch, QImage.Format_RGB32)
+            if header is None or header[0] != sequence:
+                image = image.copy()  # 仍然无法确定时复制一份，之后的改写不影响绘制
+            self.frame_count += sequence - self.sequence if sequence > self.sequence else 1
+            self.sequence = sequence
+            self.image = image
+        if self.view is not None and not sip.isdeleted(self.view):
+            self.view.update()
+
+    def frame_consumed(self):
+        pass
+
+    def close(self):
+        if self.view is not None and not sip.isdeleted(self.view):
+            self.view.set_source(None)
+        self.view = None
+        with self.lock:
+            self.image = QImage()
+        del self.memory
+        self.shm.close()
+        self.shm.unlink()
+
+
+# --- 父进程：模拟 libvlc 的事件管理器，由状态回报的变化触发 ---
+class RemoteEventManager:
+    def __init__(self):
+        self.callbacks = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.callbacks[event_type] = (callback, args)
+
+    def event_detach(self, event_type):
+        self.callbacks.pop(event_type, None)
+
+    def dispatch(self, event_type, **values):
+        entry = self.callbacks.get(event_type)
+        if entry is not None:
+            callback, args = entry
+            callback(SimpleNamespace(type=event_type, u=SimpleNamespace(**values)), *args)
+
+
+class RemoteMedia:
+    def __init__(self, mrl, options):
+        self.mrl = mrl
+        self.options = list(options)
+        self.stats = {}     # 子进程回报的统计
+        self.events = RemoteEventManager()
+
+    def get_mrl(self):
+        return self.mrl
+
+    def event_manager(self):
+        return self.events
+
+    def get_stats(self, stats):
+        for key, value in self.stats.items():
+            setattr(stats, key, value)
+        return bool(self.stats)
+
+
+class RemoteInstance:
+    def media_new(self, mrl, *options):
+        return RemoteMedia(mrl, options)
+
+
+# --- 父进程：子进程中播放器的代理，提供本程序用到的 vlc.MediaPlayer 接口 ---
+# 控制命令经管道发送，不等待结果；查询读取最近一次状态回报，不会被卡住的子进程阻塞
+class RemotePlayer:
+    def __init__(self, supervisor, args, max_width, max_height):
+        self.supervisor = supervisor
+        self.args = list(args)
+        self.frames = RemoteFrameBuffer(max_width, max_height)
+        self.instance = RemoteInstance()
+        self.events = RemoteEventManager()
+        self.media = None
+        self.status = dict(IDLE_STATUS)
+        self.process = None
+        self.conn = None
+        self.outbox = None  # 待发送的命令，由发送线程写入管道
+        self.deadline = 0
+        self.crashes = []   # 最近几次重启的时间，连续崩溃时不再重新打开同一媒体
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main, name="tile-worker", daemon=True,
+            args=(child_conn, self.frames.shm.name, self.frames.max_width, self.frames.max_height, self.args))
+        self.process.start()
+        child_conn.close()
+        self.outbox = queue.Queue()
+        threading.Thread(target=send_loop, args=(self.conn, self.outbox), name="tile-sender", daemon=True).start()
+        self.deadline = time.monotonic() + self.supervisor.startup_timeout
+
+    def send(self, *message):
+        self.outbox.put(message)
+
+    def call(self, name, *args):
+        # 枚举值转换为整数再发送
+        self.send(name, *(getattr(arg, "value", arg) for arg in args))
+        return 0
+
+    def poll(self):
+        # 读取所有状态回报，按变化触发事件；返回子进程是否正常
+        try:
+            while self.conn.poll():
+                _, status = self.conn.recv()
+                self.update(status)
+                self.deadline = time.monotonic() + self.supervisor.timeout
+        except (EOFError, OSError):
+            return False
+        self.frames.poll()
+        return self.process.is_alive() and time.monotonic() < self.deadline
+
+    def update(self, status):
+        previous, self.status = self.status, status
+        if self.media is not None:
+            self.media.stats = status["stats"]
+        if status["position"] != previous["position"]:
+            self.events.dispatch(vlc.EventType.MediaPlayerPositionChanged, new_position=status["position"])
+        if status["time"] != previous["time"]:
+            self.events.dispatch(vlc.EventType.MediaPlayerTimeChanged, new_time=status["time"])
+        if status["length"] != previous["length"] and status["length"] > 0 and self.media is not None:
+            self.media.events.dispatch(vlc.EventType.MediaDurationChanged, new_duration=status["length"])
+        if len(status["tracks"]) > len(previous["tracks"]):
+            self.events.dispatch(vlc.EventType.MediaPlayerESAdded)
+        if status["state"] != previous["state"]:
+            if status["state"] == vlc.State.Ended.value:
+                self.events.dispatch(vlc.EventType.MediaPlayerEndReached)
+            elif status["state"] == vlc.State.Error.value:
+                self.events.dispatch(vlc.EventType.MediaPlayerEncounteredError)
+
+    def restart(self):
+        # 杀死卡住或崩溃的子进程，启动新的子进程并从原来的位置继续
+        status = self.status
+        self.stop_process(kill=True)
+        now = time.monotonic()
+        self.crashes = [at for at in self.crashes if now - at < 30] + [now]
+        self.status = dict(IDLE_STATUS)
+        self.start()
+        if self.media is None or len(self.crashes) >= 3:
+            self.media = None
+            return
+        # 不用 :start-time（会一直留在媒体上，停止后再播放又回到这里）：打开后跳转到原来的时间点
+        self.send("load", self.media.mrl, list(self.media.options))
+        self.call("set_rate", status["rate"])
+        self.call("audio_set_volume", status["volume"])
+        self.call("audio_set_mute", status["mute"])
+        if status["playing"] or status["time"] > 0:
+            self.call("play")
+        if status["time"] > 0:
+            self.call("set_time", status["time"])
+            if not status["playing"]:
+                self.call("set_pause", 1)
+
+    def stop_process(self, kill=False):
+        # 不在 GUI 线程中等待退出：正常关闭时请子进程退出，卡住或崩溃时直接杀死，由监督者之后回收
+        if kill:
+            self.process.kill()
+        else:
+            self.send("quit")
+        self.outbox.put(None)  # 发送线程发完剩余命令后关闭管道
+        self.supervisor.reap(self.process)
+
+    # --- vlc.MediaPlayer 接口 ---
+    def get_instance(self):
+        return self.instance
+
+    def event_manager(self):
+        return self.events
+
+    def set_media(self, media):
+        self.media = media
+        self.status = dict(self.status, state=0, time=-1, position=-1.0, tracks=[], stats={})
+        self.send("load", media.mrl if media else None, media.options if media else [])
+
+    def get_media(self):
+        return self.media
+
+    def play(self):
+        return self.call("play")
+
+    def pause(self):
+        self.call("pause")
+
+    def set_pause(self, paused):
+        self.call("set_pause", paused)
+
+    def stop(self):
+        self.call("stop")
+
+    def next_frame(self):
+        self.call("next_frame")
+
+    def is_playing(self):
+        return self.status["playing"]
+
+    def get_state(self):
+        return vlc.State(self.status["state"])
+
+    def get_time(self):
+        return self.status["time"]
+
+    def set_time(self, time_ms):
+        self.call("set_time", int(time_ms))
+
+    def get_position(self):
+        return self.status["position"]
+
+    def set_position(self, position):
+        self.call("set_position", position)
+
+    def get_length(self):
+        return self.status["length"]
+
+    def get_rate(self):
+        return self.status["rate"]
+
+    def set_rate(self, rate):
+        self.status["rate"] = rate
+        return self.call("set_rate", rate)
+
+    def audio_get_volume(self):
+        return self.status["volume"]
+
+    def audio_set_volume(self, volume):
+        self.status["volume"] = volume
+        return self.call("audio_set_volume", volume)
+
+    def audio_get_mute(self):
+        return self.status["mute"]
+
+    def audio_set_mute(self, mute):
+        self.status["mute"] = int(mute)
+        self.call("audio_set_mute", mute)
+
+    def audio_get_track(self):
+        return self.status["track"]
+
+    def audio_set_track(self, track):
+        self.status["track"] = track
+        return self.call("audio_set_track", track)
+
+    def audio_get_track_description(self):
+        return self.status["tracks"]
+
+    def video_set_marquee_int(self, option, value):
+        self.call("video_set_marquee_int", option, value)
+
+    def video_set_marquee_string(self, option, text):
+        self.call("video_set_marquee_string", option, text)
+
+    def video_take_snapshot(self, num, path, width, height):
+        # 从共享内存复制当前帧保存，不需要子进程参与（可在任意线程调用）
+        with self.frames.lock:
+            image = self.frames.image.copy()
+        return 0 if not image.isNull() and image.save(path) else -1
+
+    def release(self):
+        self.supervisor.remove(self)
+        self.stop_process()
+        self.frames.close()
+
+
+# --- 监督者：轮询所有子进程的状态回报和帧，子进程退出或超时没有回报时重启 ---
+class Supervisor(QObject):
+    restarted = pyqtSignal(object, str)  # 播放器, 原因
+
+    def __init__(self, vlc_args, max_width=1280, max_height=720, poll=20, timeout=3000, startup_timeout=15000,
+                 parent=None):
+        super().__init__(parent)
+        self.vlc_args = list(vlc_args)
+        self.max_width = max_width
+        self.max_height = max_height
+        self.timeout = timeout / 1000.0
+        self.startup_timeout = startup_timeout / 1000.0  # 子进程启动要导入 Qt 和 libvlc，给更长的时间
+        self.players = []
+        self.dying = []     # [(进程, 期限)]，已请求退出或已杀死、尚未回收的子进程
+        self.restarts = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(poll)
+        self.timer.timeout.connect(self.poll)
+
+    def spawn(self):
+        player = RemotePlayer(self, self.vlc_args, self.max_width, self.max_height)
+        self.players.append(player)
+        self.timer.start()
+        return player
+
+    def remove(self, player):
+        if player in self.players:
+            self.players.remove(player)
+        if not self.players and not self.dying:
+            self.timer.stop()
+
+    def reap(self, process, grace=2.0):
+        self.dying.append((process, time.monotonic() + grace))
+        self.timer.start()
+
+    def poll(self):
+        # is_alive() 会回收已退出的子进程；期限内没有退出的直接杀死
+        for entry in list(self.dying):
+            process, deadline = entry
+            if not process.is_alive():
+                self.dying.remove(entry)
+            elif time.monotonic() > deadline:
+                process.kill()
+        if not self.players and not self.dying:
+            self.timer.stop()
+        for player in list(self.players):
+            if player.poll():
+                continue
+            if not player.process.is_alive():
+                reason = f"worker exited with code {player.process.exitcode}"
+            else:
+                reason = "worker stopped responding"
+            self.restarts += 1
+            player.restart()
+            self.restarted.emit(player, reason)
+
+    def shutdown(self):
+        for player in list(self.players):
+            player.release()
@@ -0,0 +1,87 @@
+from functools import lru_cache
+
+MAX_TILES = 25
+
+# 内置布局：数字为自动网格，RxC 为固定行列，1+N 为一个大窗口加 N 个小窗口
+BUILTIN_LAYOUTS = ["1", "2", "4", "6", "8", "9", "12", "16", "20", "25", "1+5", "1+7"]
+
+
+def load_layouts(config):
+    # 内置布局加上 play.conf [layouts] 中定义的布局（名称 = 规格），规格无效时忽略并提示
+    layouts = {name: name for name in BUILTIN_LAYOUTS}
+    if config.has_section("layouts"):
+        for name, spec in config.items("layouts"):
+            if name in config.defaults():
+                continue
+            try:
+                compute_layout(spec)
+            except ValueError as e:
+                print(f"Ignoring layout {name!r} in play.conf: {e}")
+                continue
+            layouts[name] = spec
+    return layouts
+
+
+@lru_cache(maxsize=None)
+def compute_layout(spec):
+    # 返回每个窗口的 (行, 列, 跨行, 跨列)，按窗口顺序排列；同一规格只计算一次
+    spec = spec.strip().lower()
+    if spec.isdigit():
+        cells = auto_grid(int(spec))
+    elif "x" in spec and "," not in spec:
+        rows, cols = (int(part) for part in spec.split("x"))
+        cells = tuple((row, col, 1, 1) for row in range(rows) for col in range(cols))
+    elif spec.startswith("1+"):
+        cells = focus_grid(int(spec[2:]))
+    else:
+        cells = explicit_cells(spec)
+    if not 1 <= len(cells) <= MAX_TILES:
+        raise ValueError(f"layout must have 1 to {MAX_TILES} tiles, not {len(cells)}")
+    return cells
+
+
+def auto_grid(count):
+    # 与原来相同的行列计算：行数取平方根，列数补足
+    if count < 1:
+        raise ValueError("layout must have at least one tile")
+    rows = int(count ** 0.5)
+    cols = count // rows
+    if rows * cols < count:
+        cols += 1
+    return tuple((index // cols, index % cols, 1, 1) for index in range(count))
+
+
+def focus_grid(thumbnails):
+    # n x n 网格中左上角 (n-1)x(n-1) 为大窗口，右侧一列和底部一行为小窗口，共 2n-1 个
+    if thumbnails < 3 or thumbnails % 2 == 0:
+        raise ValueError("1+N layouts need an odd N (1+3, 1+5, 1+7, ...)")
+    n = (thumbnails + 1) // 2
+    cells = [(0, 0, n - 1, n - 1)]
+    cells += [(row, n - 1, 1, 1) for row in range(n)]
+    cells += [(n - 1, col, 1, 1) for col in range(n - 1)]
+    return tuple(cells)
+
+
+def explicit_cells(spec):
+    # "行,列[,跨行,跨列]" 以空格或分号分隔，例如 "0,0,2,2 0,2 1,2 2,0 2,1 2,2"
+    cells = []
+    for item in spec.replace(";", " ").split():
+        values = [int(value) for value in item.split(",")]
+        if len(values) == 2:
+            values += [1, 1]
+        if len(values) != 4 or min(values[:2]) < 0 or min(values[2:]) < 1:
+            raise ValueError(f"bad cell {item!r}, expected row,col[,rowspan,colspan]")
+        cells.append(tuple(values))
+    occupied = set()
+    for row, col, rowspan, colspan in cells:
+        for r in range(row, row + rowspan):
+            for c in range(col, col + colspan):
+                if (r, c) in occupied:
+                    raise ValueError(f"cells overlap at {r},{c}")
+                occupied.add((r, c))
+    return tuple(cells)
+
+
+def grid_size(cells):
+    return (max(row + rowspan for row, _, rowspan, _ in cells),
+            max(col + colspan for _, col, _, colspan in cells))
@@ -0,0 +1,144 @@
+import os
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+from isolation import RemotePlayer
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+# 超出预算时打开媒体附加的降级选项：缩短缓存、不解码音频、自适应流选低分辨率、简化解码
+DOWNGRADE_OPTIONS = [":file-caching=300", ":network-caching=500", ":no-audio",
+                     ":adaptive-maxheight=360", ":avcodec-skiploopfilter=4"]
+
+
+def process_rss(pid=None):
+    # 进程的常驻内存（字节）：优先 psutil，否则读取 Linux 的 /proc；都不可用时返回 None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def player_pid(player):
+    # 进程隔离的播放器在子进程中解码，可以直接测量它的内存
+    if isinstance(player, RemotePlayer) and player.process is not None and player.process.is_alive():
+        return player.process.pid
+    return None
+
+
+# --- 内存预算：估计并测量每个窗口的内存占用，打开媒体前判断是否超出预算，超出时降级或拒绝 ---
+class MemoryBudget(QObject):
+    decision = pyqtSignal(str)  # 降级或拒绝打开时的提示
+
+    def __init__(self, budget_mb=0, tile_mb=150, over_budget="downgrade", downgrade_ratio=0.6,
+                 settle=3000, parent=None):
+        super().__init__(parent)
+        if over_budget not in ("downgrade", "refuse"):
+            raise ValueError(f"over_budget must be 'downgrade' or 'refuse', not {over_budget!r}")
+        self.budget_mb = budget_mb          # 0 为不限制，只显示用量
+        self.tile_mb = float(tile_mb)       # 每个窗口的估计占用，随测量结果更新
+        self.over_budget = over_budget
+        self.downgrade_ratio = downgrade_ratio  # 降级后的占用相对于估计值的比例
+        self.settle = settle / 1000.0       # 打开后等待多久再测量（解码器和缓存分配完成）
+        self.tiles = {}     # player -> [占用 MB, 是否已测量, 是否降级]
+        self.pending = None  # (开始时间, 打开前的内存 MB, 播放器列表)，等待测量的一批窗口
+        self.used_mb = 0.0  # 当前用量，包括刚打开、还没测量的窗口的估计值
+        self.rss_mb = 0.0   # 实际读到的内存
+        self.measured = False  # 是否能读取进程内存，否则按估计值累加
+        self.refresh()
+
+    def refresh(self):
+        # 定时调用：读取本进程和所有子进程的内存，测量新打开窗口的实际占用
+        rss = process_rss()
+        self.measured = rss is not None
+        used = (rss or 0) / MB
+        for player, tile in self.tiles.items():
+            pid = player_pid(player)
+            child = process_rss(pid) if pid is not None else None
+            if child is not None:
+                tile[0], tile[1] = child / MB, True
+                used += tile[0]
+        if not self.measured:
+            self.rss_mb = self.used_mb = sum(tile[0] for tile in self.tiles.values())
+            return self.used_mb
+        self.rss_mb = self.used_mb = used
+        if self.pending is not None:
+            if time.monotonic() - self.pending[0] >= self.settle:
+                self.measure_pending()
+            else:
+                # 刚打开的窗口还没分配完解码器和缓存，先按估计值计入
+                self.used_mb += sum(self.tiles[player][0] for player in self.pending[2]
+                                    if player in self.tiles and not self.tiles[player][1])
+        return self.used_mb
+
+    def measure_pending(self):
+        # 同一进程中的窗口没有单独的内存数据：按打开前后的内存差平均分摊到这一批窗口
+        _, before, players = self.pending
+        self.pending = None
+        players = [player for player in players if player in self.tiles and not self.tiles[player][1]]
+        if not players:
+            return
+        per_tile = (self.rss_mb - before) / len(players)
+        if per_tile <= 0:
+            return  # 期间有窗口关闭，无法区分
+        for player in players:
+            self.tiles[player][0], self.tiles[player][1] = per_tile, True
+        if not any(self.tiles[player][2] for player in players):
+            self.tile_mb = (self.tile_mb + per_tile) / 2
+
+    def projected(self, count=1):
+        # 再打开 count 个窗口后的预计用量
+        return self.used_mb + count * self.tile_mb
+
+    def admit(self, players, label=""):
+        # 打开媒体前调用：返回需要附加的媒体选项（降级时非空），拒绝打开时返回 None
+        # 已经在播放的窗口换一个文件不增加占用，只计算新窗口
+        self.refresh()
+        new = [player for player in players if player not in self.tiles]
+        options = self.check(len(new), label)
+        if options is not None:
+            self.add(new, options)
+        return options
+
+    def check(self, count=1, label=""):
+        # 再打开 count 个新窗口是否超出预算，只判断不记录：返回值同 admit。
+        # 还没有播放器的窗口先调用它，通过后才创建播放器，再用 add 计入
+        if not self.budget_mb or not count or self.projected(count) <= self.budget_mb:
+            return []
+        cheap = self.used_mb + count * self.tile_mb * self.downgrade_ratio
+        if self.over_budget == "refuse" or cheap > self.budget_mb:
+            self.decision.emit(f"Not opening {label}: about {self.projected(count):.0f} MB needed, "
+                               f"memory budget is {self.budget_mb} MB")
+            return None
+        self.decision.emit(f"Opening {label} at reduced quality to stay within the "
+                           f"{self.budget_mb} MB memory budget")
+        return list(DOWNGRADE_OPTIONS)
+
+    def add(self, players, options):
+        # 按 check 的结果（options 非空即降级）计入新窗口的占用
+        if not players:
+            return
+        downgraded = bool(options)
+        cost = self.tile_mb * (self.downgrade_ratio if downgraded else 1)
+        for player in players:
+            self.tiles[player] = [cost, False, downgraded]
+        # 上一批还没测量时合并为一批，从上一批打开之前的内存算起
+        before, previous = (self.pending[1], self.pending[2]) if self.pending else (self.rss_mb, [])
+        self.pending = (time.monotonic(), before, previous + list(players))
+        self.used_mb += cost * len(players)
+
+    def replace(self, old, new):
+        # 播放列表切换到预加载的播放器：占用记录转移到新播放器
+        if old in self.tiles:
+            self.tiles[new] = self.tiles.pop(old)
+
+    def forget(self, player):
+        self.tiles.pop(player, None)
@@ -0,0 +1,186 @@
+import time
+import queue
+import shutil
+import threading
+import subprocess
+from PyQt5.QtCore import Qt, QObject, QRect, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QColor, QOpenGLContext
+from PyQt5.QtWidgets import QWidget, QOpenGLWidget
+from framebuffer import fit_rect
+
+# 推流地址按协议选择封装格式，其余按文件扩展名由 ffmpeg 自动判断
+STREAM_FORMATS = {"rtmp": "flv", "udp": "mpegts", "srt": "mpegts", "tcp": "mpegts"}
+
+
+def cell_rects(cells, bounds, spacing=4):
+    # 把布局的 (行, 列, 跨行, 跨列) 换算为画面中的矩形
+    rows = max(row + rowspan for row, _, rowspan, _ in cells)
+    cols = max(col + colspan for _, col, _, colspan in cells)
+    cell_w = (bounds.width() - spacing * (cols + 1)) / cols
+    cell_h = (bounds.height() - spacing * (rows + 1)) / rows
+    rects = []
+    for row, col, rowspan, colspan in cells:
+        x = bounds.x() + spacing + col * (cell_w + spacing)
+        y = bounds.y() + spacing + row * (cell_h + spacing)
+        rects.append(QRect(int(x), int(y), int(cell_w * colspan + spacing * (colspan - 1)),
+                           int(cell_h * rowspan + spacing * (rowspan - 1))))
+    return rects
+
+
+# --- 马赛克绘制：所有窗口的帧缓冲按布局绘制到同一个画面，供控件和录制共用 ---
+class MosaicPainter:
+    def init_mosaic(self):
+        self.sources = []   # SharedFrameBuffer，按窗口顺序
+        self.cells = ()
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def set_tiles(self, sources, cells):
+        self.sources = list(sources)
+        self.cells = tuple(cells[:len(self.sources)])
+        self.update()
+
+    def frame_ready(self):
+        # 多个播放器的新帧合并为一次重绘
+        self.update()
+
+    def render(self, painter, bounds):
+        painter.fillRect(bounds, QColor("#1e1e1e"))
+        if not self.cells:
+            return
+        for source, rect in zip(self.sources, cell_rects(self.cells, bounds)):
+            painter.fillRect(rect, Qt.black)
+            with source.lock:
+                image = source.image
+                if not image.isNull():
+                    painter.drawImage(fit_rect(image.width(), image.height(), rect), image)
+            source.frame_consumed()
+
+
+def compose_frame(sources, cells, width, height):
+    # 按录制分辨率合成一帧，与屏幕刷新无关；在 QImage 上软件绘制，可以在录制线程中进行。
+    # 每个窗口只在复制当前帧时持有它的锁，缩放绘制在锁外，不阻塞解码回调和界面绘制
+    image = QImage(width, height, QImage.Format_RGB32)
+    painter = QPainter(image)
+    bounds = image.rect()
+    painter.fillRect(bounds, QColor("#1e1e1e"))
+    if cells:
+        for source, rect in zip(sources, cell_rects(cells, bounds)):
+            with source.lock:
+                frame = source.image.copy()
+            painter.fillRect(rect, Qt.black)
+            if not frame.isNull():
+                painter.drawImage(fit_rect(frame.width(), frame.height(), rect), frame)
+    painter.end()
+    return image
+
+
+class MosaicView(MosaicPainter, QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_mosaic()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.render(painter, self.rect())
+        painter.end()
+
+
+class GLMosaicView(MosaicPainter, QOpenGLWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_mosaic()
+
+    def paintGL(self):
+        painter = QPainter(self)
+        self.render(painter, self.rect())
+        painter.end()
+
+
+def create_mosaic_view(opengl=True):
+    # 能创建 OpenGL 上下文时用 QOpenGLWidget，否则退回软件 QPainter 绘制
+    if opengl:
+        context = QOpenGLContext()
+        if context.create():
+            return GLMosaicView()
+    return MosaicView()
+
+
+# --- 马赛克录制/推流：合成线程按固定帧率合成整面墙的画面，写入线程送入一个 ffmpeg 编码，都不占用 GUI 线程 ---
+class MosaicRecorder(QObject):
+    stopped = pyqtSignal(str)  # 结束原因，正常停止时为空字符串
+
+    def __init__(self, view, output, width=1280, height=720, fps=25, queue_size=8, parent=None):
+        super().__init__(parent)
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found, it is needed to record the mosaic")
+        self.view = view    # 合成线程每一帧读取它当前的 sources 和 cells（布局切换后随之变化）
+        self.width = width // 2 * 2
+        self.height = height // 2 * 2
+        self.interval = 1.0 / fps
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.dropped = 0    # 编码跟不上时丢弃的帧数
+        self.stopping = threading.Event()
+        scheme = output.split("://", 1)[0].lower() if "://" in output else ""
+        fmt = ["-f", STREAM_FORMATS[scheme]] if scheme in STREAM_FORMATS else []
+        self.process = subprocess.Popen([
+            ffmpeg, "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgra", "-s", f"{self.width}x{self.height}",
+            "-r", str(fps), "-i", "-",
+            "-c:v", "libx264", "-preset", "veryfast", "-tune", "zerolatency", "-pix_fmt", "yuv420p",
+        ] + fmt + [output], stdin=subprocess.PIPE)
+        self.composer = threading.Thread(target=self.compose_frames, name="mosaic-compose", daemon=True)
+        self.writer = threading.Thread(target=self.write_frames, name="mosaic-recorder", daemon=True)
+
+    def start(self):
+        # 先连接 stopped 再调用，ffmpeg 立即退出时也能收到通知
+        self.writer.start()
+        self.composer.start()
+
+    def compose_frames(self):
+        # 合成线程：合成跟不上帧率时不追赶，编码跟不上时丢帧
+        deadline = time.monotonic()
+        while not self.stopping.is_set():
+            image = compose_frame(self.view.sources, self.view.cells, self.width, self.height)
+            try:
+                self.frames.put_nowait(image)
+            except queue.Full:
+                self.dropped += 1
+            deadline = max(deadline + self.interval, time.monotonic())
+            self.stopping.wait(deadline - time.monotonic())
+        # 通知写入线程结束（它可能已经因为 ffmpeg 退出而结束）
+        while self.writer.is_alive():
+            try:
+                self.frames.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+    def write_frames(self):
+        # 后台线程：写入 ffmpeg 管道，不阻塞 GUI 线程的合成和播放
+        error = ""
+        while True:
+            image = self.frames.get()
+            if image is None:
+                break
+            try:
+                self.process.stdin.write(image.constBits().asstring(image.sizeInBytes()))
+            except (BrokenPipeError, OSError) as e:
+                error = f"ffmpeg stopped: {e}"
+                self.stopping.set()
+                break
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+        self.stopped.emit(error)
+
+    def stop(self):
+        # 不等待：合成线程结束时通知写入线程，尚未写入的帧丢弃，让后台线程尽快结束
+        self.stopping.set()
+        while True:
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                break
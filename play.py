@@ -1,19 +1,64 @@
 import sys
 import os
-import vlc
+import time
+import math
 import platform
+import argparse
+STARTED = time.monotonic()  # 进程启动时间，用于统计从启动到所有窗口开始播放的耗时
+from config import CONFIG, DecodeSettings, PROFILES, setup_vlc_path, cache_dir
+setup_vlc_path(CONFIG)  # Windows 下需要在 import vlc 之前设置 DLL 目录
+import vlc
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QSlider,QMenu,
                              QFileDialog, QPushButton, QGridLayout, QFrame,
-                             QComboBox, QVBoxLayout, QHBoxLayout, QLabel, QSizePolicy)
-from PyQt5.QtCore import Qt, QTimer, QSize, pyqtSignal
+                             QComboBox, QVBoxLayout, QHBoxLayout, QLabel, QSizePolicy,
+                             QCheckBox, QInputDialog, QLineEdit, QMessageBox)
+from PyQt5.QtCore import Qt, QTimer, QSize, QEvent, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont
-import configparser
 from styles import STYLE_SHEET
+from framebuffer import SharedFrameBuffer, FrameView
+from isolation import Supervisor, RemotePlayer, HelperProcess
+from clock import PlaybackClock
+from sync import SyncEngine
+from pool import PlayerPool, InstanceLoader, EventDispatcher
+from stats import StatsCollector, MetricsExporter, show_overlay, hide_overlay, overlay_text
+from governor import QualityGovernor
+from audio import AudioFocus
+from probe import MediaProber, MetadataCache, describe
+from thumbnails import ThumbnailIndexer, PreviewSlider
+from seek import SeekScheduler, StartPositions
+from dispatch import CommandDispatcher
+from memory import MemoryBudget
+from control import ControlServer
+from playlist import Playlist
+from session import load_session, save_session
+from stream import Reconnector, StreamDialog, is_stream
+from layout import MAX_TILES, load_layouts, compute_layout, grid_size
+from timecode import format_timecode, time_text, parse_timecode
+from mosaic import create_mosaic_view, MosaicRecorder
+from capture import (CaptureWorker, capture_dir, capture_stamp, record_options, player_snapshot,
+                     image_snapshot, batch_snapshot)
+from profiling import Profiler, PROFILE_ENV
+IMPORTED = time.monotonic()  # 模块导入完成（PyQt5 和 libvlc 的动态库已加载）
+
+# 控制接口支持的命令
+CONTROL_COMMANDS = ("mode", "layout", "open", "play", "pause", "stop", "seek", "rate", "volume", "state", "stats")
+
+
+def bind_video_output(player, frame):
+    # 将播放器的视频输出绑定到窗口句柄
+    if isinstance(player, RemotePlayer):
+        player.frames.bind(frame)  # 子进程解码的播放器没有原生输出，窗口从共享内存绘制
+    elif platform.system() == "Windows":
+        player.set_hwnd(frame.winId())
+    elif platform.system() == "Darwin":
+        player.set_nsobject(frame.winId())
+    elif platform.system() == "Linux":
+        player.set_xwindow(frame.winId())
 
 # --- 用于捕获右键点击的 QFrame 子类，用于Multi Video的视频显示区域 ---
-class VideoFrame(QFrame):
+class VideoFrame(FrameView):
     def __init__(self, parent=None):
-        super().__init__(parent)
+        super().__init__(parent=parent)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
     
@@ -24,18 +69,68 @@ class VideoFrame(QFrame):
         parent_widget = self.parent()
         if hasattr(parent_widget, 'open_file'):
             open_action.triggered.connect(parent_widget.open_file)
+        if hasattr(parent_widget, 'open_stream'):
+            menu.addAction("Open stream...").triggered.connect(parent_widget.open_stream)
+        if hasattr(parent_widget, 'open_playlist'):
+            menu.addAction("Open playlist...").triggered.connect(parent_widget.open_playlist)
+            menu.addAction("Watch folder...").triggered.connect(parent_widget.watch_folder)
+        if hasattr(parent_widget, 'set_stats_overlay'):
+            stats_action = menu.addAction("Show stats")
+            stats_action.setCheckable(True)
+            stats_action.setChecked(parent_widget.stats_overlay)
+            stats_action.toggled.connect(parent_widget.set_stats_overlay)
+        if hasattr(parent_widget, 'go_to_time'):
+            menu.addAction("Go to time...").triggered.connect(parent_widget.go_to_time)
+        if getattr(parent_widget, 'capture', None) is not None:
+            menu.addSeparator()
+            menu.addAction("Take snapshot").triggered.connect(parent_widget.take_snapshot)
+            record_action = menu.addAction("Record")
+            record_action.setCheckable(True)
+            record_action.setChecked(parent_widget.record)
+            record_action.toggled.connect(parent_widget.set_recording)
         
         menu.exec_(self.mapToGlobal(pos))
 
 # --- Multi Video中的独立视频播放控件 ---
 class VideoPlayerWidget(QWidget):
+    ended = pyqtSignal(object)                   # 由 libvlc 线程发出，排队到 GUI 线程处理
+    player_changed = pyqtSignal(object, object)  # 切换到预加载的播放器：旧播放器, 新播放器
+    duration_changed = pyqtSignal(str, int)      # 由 libvlc 线程发出：路径, 时长（毫秒）
 
-    def __init__(self, vlc_instance):
+    def __init__(self, pool, clock, prober=None, thumbnails=None, seeker=None, capture=None, memory=None,
+                 starts=None):
         super().__init__()
-        self.vlc_instance = vlc_instance
+        self.pool = pool
+        self.clock = clock  # 全局播放时钟，取代每个控件各自的定时器
+        self.seeker = seeker  # 全局跳转调度，合并拖动中的跳转请求
         self.media = None
-        self.player = self.vlc_instance.media_player_new()
-        self.player.audio_set_volume(50)  # 明确设置初始音量
+        self.media_events = None      # 当前媒体的 EventDispatcher，与媒体一起保存
+        self.path = None
+        self.info = {}                # 后台探测得到的媒体元数据
+        self.duration_ms = 0          # 当前媒体的时长，打开后缓存，刷新进度时不再查询
+        self.shown_time = -1          # 时间标签上显示的时间，数值变化时才更新文字
+        self.player = None            # 第一次打开媒体时才从播放器池取得（见 ensure_player）
+        self.prober = prober
+        if prober is not None:
+            prober.probed.connect(self.media_probed)
+        self.thumbnails = thumbnails  # 缩略图索引，进度条悬停/拖动时预览
+        if thumbnails is not None:
+            thumbnails.ready.connect(self.thumbnails_ready)
+        self.stats_overlay = False    # 是否在画面上叠加统计信息
+        self.playlist = None          # 播放列表，None 时只播放单个文件
+        self.standby = None           # 在备用画面中预加载下一项的播放器
+        self.standby_path = None
+        self.preload_ms = 3000        # 距结尾多少毫秒开始预加载下一项
+        self.ended.connect(self.media_ended, Qt.QueuedConnection)
+        self.media_options = []       # 网络流的缓存/低延迟等媒体选项
+        self.reconnector = Reconnector(self.reconnect_stream, parent=self)
+        self.reconnector.reconnecting.connect(self.show_reconnecting)
+        self.duration_changed.connect(self.set_duration, Qt.QueuedConnection)
+        self.capture = capture        # 截图工作线程，录像文件也放在它的目录中
+        self.memory = memory          # 内存预算，打开文件前检查
+        self.starts = starts          # 打开后跳转到起始位置或暂停（恢复会话、重新打开）
+        self.record = False           # 是否把播放的流同时写入录像文件
+        self.record_path = None
         self.init_ui()
         
     def init_ui(self):
@@ -46,13 +141,21 @@ class VideoPlayerWidget(QWidget):
         # 视频显示区域
         self.video_frame = VideoFrame(self)
         self.video_frame.setStyleSheet("background-color: black; border: 2px solid #444;")
-        self.video_frame.setMinimumSize(200, 150)
+        self.video_frame.setMinimumSize(80, 45)  # 16/25 窗口布局下每个窗口可能很小
         self.video_frame.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         layout.addWidget(self.video_frame, 1)        
+        # 备用画面：预加载的下一项输出到这里，切换时与 video_frame 交换
+        self.spare_frame = VideoFrame(self)
+        self.spare_frame.setStyleSheet("background-color: black; border: 2px solid #444;")
+        self.spare_frame.setMinimumSize(80, 45)
+        self.spare_frame.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.spare_frame.hide()
+        layout.addWidget(self.spare_frame, 1)
         
         
-        # 播放控制条
-        controls = QHBoxLayout()
+        # 播放控制条（窗口太小时隐藏，见 resizeEvent）
+        self.controls_bar = QWidget()
+        controls = QHBoxLayout(self.controls_bar)
         controls.setContentsMargins(4, 0, 4, 4)  # 调整边距
         controls.setSpacing(4)
         
@@ -72,12 +175,17 @@ class VideoPlayerWidget(QWidget):
         self.stop_btn.setMinimumWidth(60)  # 确保按钮有足够宽度
         controls.addWidget(self.stop_btn)
         
-        # 进度条
-        self.progress = QSlider(Qt.Horizontal)
+        # 进度条（拖动时只更新预览，松开后才跳转）
+        self.progress = PreviewSlider(Qt.Horizontal)
         self.progress.setRange(0, 1000)
         self.progress.sliderPressed.connect(self.slider_pressed_event)
         self.progress.sliderReleased.connect(self.slider_released_event)
+        self.progress.sliderMoved.connect(self.scrub)
         controls.addWidget(self.progress, 1)  # 添加拉伸因子
+
+        # 当前时间（毫秒）和帧号
+        self.time_label = QLabel("--:--:--.---")
+        controls.addWidget(self.time_label)
         
         # 倍速选择下拉菜单 - 使用固定宽度并设置尺寸策略
         speed_container = QWidget()
@@ -118,46 +226,267 @@ class VideoPlayerWidget(QWidget):
         volume_layout.addWidget(self.volume)
         volume_layout.addWidget(self.volume_icon)
         controls.addWidget(volume_container)
-       
-        self.player.audio_set_volume(50)
 
-        layout.addLayout(controls)
+        layout.addWidget(self.controls_bar)
         
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_ui)
         self.slider_pressed_flag = False
 
+    def resizeEvent(self, event):
+        # 小窗口只显示画面，控制条放不下时隐藏（右键菜单仍可打开文件）
+        super().resizeEvent(event)
+        self.controls_bar.setVisible(self.width() >= 420 and self.height() >= 200)
+
 
     def open_file(self):
         # 弹出文件对话框，选择视频文件
         path, _ = QFileDialog.getOpenFileName(
             self, "Select a video file", "", "Video (*.mp4 *.avi *.mkv *.mov)")
         if path:
-            self.media = self.vlc_instance.media_new(path)
-            self.player.set_media(self.media)
-            # 设置视频输出窗口
-            if platform.system() == "Windows":
-                self.player.set_hwnd(self.video_frame.winId())
-            elif platform.system() == "Darwin":
-                self.player.set_nsobject(self.video_frame.winId())
-            elif platform.system() == "Linux":
-                self.player.set_xwindow(self.video_frame.winId())
-            self.toggle_play()  # 加载后自动播放
+            self.set_playlist(None)
+            self.load_file(path)
+
+    def open_stream(self):
+        stream = StreamDialog.get_stream(self)
+        if stream is not None:
+            self.play_stream(*stream)
+
+    def play_stream(self, url, options):
+        self.set_playlist(None)
+        self.media_options = list(options)
+        self.load_file(url)
+
+    def reconnect_stream(self):
+        if is_stream(self.path):
+            self.load_file(self.path)
+
+    def show_reconnecting(self, attempt, delay):
+        self.video_frame.setToolTip(f"{self.path}\nReconnecting (attempt {attempt}) in {delay / 1000:.0f} s")
+
+    def open_playlist(self):
+        # 选择多个文件组成循环播放的队列
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select video files", "", "Video (*.mp4 *.avi *.mkv *.mov)")
+        if paths:
+            self.set_playlist(Playlist(paths))
+
+    def watch_folder(self):
+        # 循环播放目录中的视频，目录内容变化时自动更新
+        directory = QFileDialog.getExistingDirectory(self, "Select a folder")
+        if directory:
+            self.set_playlist(Playlist(directory=directory))
+
+    def set_playlist(self, playlist, start_ms=0, paused=False):
+        self.release_standby()
+        self.reconnector.reset()
+        self.media_options = []
+        if self.playlist is not None:
+            self.playlist.deleteLater()
+        self.playlist = playlist
+        if playlist is None:
+            return
+        playlist.setParent(self)
+        playlist.changed.connect(self.playlist_changed)
+        if playlist.current():
+            self.load_file(playlist.current(), start_ms, paused)
+
+    def playlist_changed(self):
+        # 监视的目录发生变化：预加载的文件不再是下一项时丢弃
+        if self.standby_path is not None and self.standby_path != self.playlist.peek():
+            self.release_standby()
+        if self.path is None and self.playlist.current():
+            self.load_file(self.playlist.current())
+
+    def ensure_player(self):
+        # 从播放器池中取得（可能是复用的）播放器；空窗口（包括恢复会话时没有媒体的窗口）不占用播放器
+        if self.player is None:
+            self.player = self.pool.acquire()
+            self.player.audio_set_volume(self.volume.value())
+            self.player.set_rate(float(self.speed_combo.currentText()))
+            self.player_changed.emit(None, self.player)
+        return self.player
+
+    def load_file(self, path, start_ms=0, paused=False):
+        # 内存预算：超出时附加降级选项，或者不打开
+        label = os.path.basename(path)
+        if self.memory is None:
+            extra = []
+        elif self.player is None:
+            # 还没有播放器：先按新窗口检查，通过后才创建播放器，再计入
+            extra = self.memory.check(1, label)
+            if extra is not None:
+                self.memory.add([self.ensure_player()], extra)
+        else:
+            extra = self.memory.admit([self.player], label)
+        if extra is None:
+            return
+        self.ensure_player()
+        self.path = path
+        self.info = {}
+        self.progress.set_media(0)
+        options = self.media_options + extra
+        # 录制中每个文件（包括播放列表的下一项）写入新的录像文件
+        self.record_path = self.capture.path(path, ".ts") if self.record else None
+        if self.record_path is not None:
+            options += record_options(self.record_path)
+        # 音量为 0 的窗口按配置不解码音频
+        self.media = self.pool.media_new(self.player, path, *options, muted=self.volume.value() == 0)
+        self.pool.set_media(self.player, self.media)
+        if self.starts is not None:
+            # 恢复会话或重新打开时，开始播放后回到保存的位置，暂停的窗口随后暂停
+            self.starts.arm(self.player, start_ms, paused)
+        self.watch_duration()
+        if self.prober is not None:
+            # 后台解析，缓存命中时立即给出时长，所以放在 watch_duration 清零之后
+            self.prober.probe(path)
+        # 设置视频输出窗口
+        bind_video_output(self.player, self.video_frame)
+        self.clock.attach(self.player, self.update_ui)
+        self.watch_end(self.player)
+        self.preparse_next()
+        self.toggle_play()  # 加载后自动播放
+        if paused:
+            self.play_btn.setText("Play")
+
+    def session_state(self):
+        # 会话中保存的窗口状态
+        player = self.player
+        state = {"path": self.path, "position_ms": max(0, player.get_time()) if self.path else 0,
+                 "rate": float(self.speed_combo.currentText()), "volume": self.volume.value(),
+                 "muted": player is not None and player.audio_get_mute() == 1,
+                 "playing": player is not None and player.is_playing()}
+        if self.playlist is not None:
+            state["playlist"] = self.playlist.to_dict()
+        if self.media_options:
+            state["options"] = self.media_options
+        return state
+
+    def restore_state(self, state):
+        self.volume.setValue(state.get("volume", 50))
+        self.speed_combo.setCurrentText(str(state.get("rate", 1.0)))
+        start_ms = state.get("position_ms", 0)
+        paused = not state.get("playing", True)
+        self.media_options = list(state.get("options", []))
+        if state.get("playlist"):
+            self.set_playlist(Playlist.from_dict(state["playlist"]), start_ms, paused)
+        elif state.get("path"):
+            self.load_file(state["path"], start_ms, paused)
+        if self.player is None:
+            return
+        self.player.set_rate(float(self.speed_combo.currentText()))
+        self.player.audio_set_mute(state.get("muted", False))
+
+    def watch_end(self, player):
+        # 经播放器的事件分发订阅，重复订阅只替换参数，不影响主窗口对同一播放器的订阅
+        events = self.pool.events(player)
+        events.attach(vlc.EventType.MediaPlayerEndReached, self._end_reached, player)
+        events.attach(vlc.EventType.MediaPlayerEncounteredError, self._end_reached, player)
+
+    def unwatch_end(self, player):
+        events = self.pool.events(player)
+        events.detach(vlc.EventType.MediaPlayerEndReached, self._end_reached)
+        events.detach(vlc.EventType.MediaPlayerEncounteredError, self._end_reached)
+
+    def _end_reached(self, event, player):
+        # 运行在 libvlc 线程中，不能直接调用 libvlc
+        self.ended.emit(player)
+
+    def media_ended(self, player):
+        if player is not self.player:
+            return
+        if is_stream(self.path):
+            # 网络流断开或出错：按退避延迟重连
+            self.reconnector.schedule()
+            return
+        path = self.playlist.advance() if self.playlist is not None else None
+        if path is None:
+            self.play_btn.setText("Play")
+        elif self.standby is not None and self.standby_path == path:
+            self.swap_to_standby(path)
+        else:
+            self.release_standby()
+            self.load_file(path)
+
+    def preparse_next(self):
+        # 提前解析下一项的元数据（写入磁盘缓存），切换后立即可用
+        if self.playlist is not None and self.prober is not None:
+            path = self.playlist.peek()
+            if path is not None and path != self.path:
+                self.prober.probe(path)
+
+    def preload_next(self):
+        # 当前项快结束时在备用画面中打开下一项，解码出第一帧后暂停，等待切换
+        path = self.playlist.peek()
+        if path is None:
+            return
+        player = self.pool.acquire()
+        media = self.pool.media_new(player, path, muted=self.volume.value() == 0)
+        self.pool.set_media(player, media)
+        if self.starts is not None:
+            self.starts.arm(player, 0, True)
+        player.audio_set_mute(True)  # 暂停前可能已经输出了一小段声音，切换时再恢复
+        player.audio_set_volume(self.volume.value())
+        player.set_rate(float(self.speed_combo.currentText()))
+        bind_video_output(player, self.spare_frame)
+        self.watch_end(player)
+        player.play()
+        self.standby, self.standby_path = player, path
+
+    def swap_to_standby(self, path):
+        # 交换画面和播放器，只需取消暂停，没有黑屏和重新打开媒体的等待
+        old, self.player = self.player, self.standby
+        self.standby = self.standby_path = None
+        self.video_frame, self.spare_frame = self.spare_frame, self.video_frame
+        self.video_frame.setStyleSheet(self.spare_frame.styleSheet())
+        self.video_frame.show()
+        self.spare_frame.hide()
+        self.path = path
+        self.info = {}
+        self.media = self.pool.media_of(self.player)
+        self.watch_duration()
+        self.progress.set_media(0)
+        if self.prober is not None:
+            self.prober.probe(path)
+        self.unwatch_end(old)
+        if self.starts is not None:
+            self.starts.cancel(self.player)  # 还没开始播放就切换时不要再暂停
+        self.player.audio_set_mute(old.audio_get_mute())
+        self.player_changed.emit(old, self.player)  # 由主窗口回收旧播放器并转移音频焦点
+        self.clock.attach(self.player, self.update_ui)
+        self.player.set_pause(0)
+        self.play_btn.setText("Pause")
+        self.preparse_next()
+
+    def release_standby(self):
+        if self.standby is not None:
+            self.unwatch_end(self.standby)
+            if self.starts is not None:
+                self.starts.cancel(self.standby)
+            self.pool.release(self.standby)
+            self.standby = self.standby_path = None
+
+    def teardown(self):
+        # 控件移除前调用：归还预加载的播放器，解除当前播放器的事件订阅
+        self.release_standby()
+        self.reconnector.reset()
+        if self.player is not None:
+            self.unwatch_end(self.player)
 
     def toggle_play(self):
+        if self.player is None:
+            return
         if self.player.is_playing():
             self.player.pause()
             self.play_btn.setText("Play")
-            self.timer.stop()
         else:
             self.player.play()
             self.play_btn.setText("Pause")
-            self.timer.start(100)
 
     def stop(self):
-        self.player.stop()
+        self.release_standby()
+        self.reconnector.reset()
+        if self.player is not None:
+            self.player.stop()
         self.play_btn.setText("Play")
-        self.timer.stop()
 
     def slider_pressed_event(self):
         self.slider_pressed_flag = True
@@ -166,35 +495,159 @@ class VideoPlayerWidget(QWidget):
         self.slider_pressed_flag = False
         self.seek_video()
 
+    def scrub(self, value):
+        # 拖动中只做合并后的关键帧跳转
+        if self.seeker is not None and self.pool.media_of(self.player) is not None:
+            self.seeker.request([self.player], value / 1000.0)
+
     def seek_video(self):
+        if self.player is None:
+            return
         pos = self.progress.value() / 1000.0
-        self.player.set_position(pos)
+        if self.seeker is not None:
+            self.seeker.seek([self.player], pos)
+        else:
+            self.player.set_position(pos)
         
     def change_speed(self, speed_text):
         speed = float(speed_text)
-        self.player.set_rate(speed)
+        if self.player is not None:
+            self.player.set_rate(speed)
         self.status_message = f"Playback speed set to {speed}x"
 
     def change_volume(self, value):
         volume = max(0, min(100, value))  # 确保音量在0-100范围内
-        self.player.audio_set_volume(volume)
+        if self.player is not None:
+            self.player.audio_set_volume(volume)
         self.volume_icon.setText(f"{volume}%")
         self.volume_icon.setStyleSheet("background-color: #1e1e1e;color: white;padding: 0px; margin: 0px; border: none;")
 
-    def update_ui(self):
-        if not self.slider_pressed_flag:
-            pos = self.player.get_position()
-            self.progress.setValue(int(pos * 1000))
+    def set_stats_overlay(self, enabled):
+        self.stats_overlay = enabled
+        if not enabled and self.player is not None:
+            hide_overlay(self.player)
+
+    def take_snapshot(self):
+        # 截图在后台线程中完成，结果由 capture.saved 通知
+        if self.capture is not None and self.path is not None:
+            self.capture.submit(player_snapshot(self.player), self.capture.path(self.path))
+
+    def set_recording(self, record):
+        if self.capture is None or record == self.record:
+            return
+        self.record = record
+        if self.path is not None:
+            # 从当前位置重新打开媒体，加上或去掉录制输出（网络流从直播点开始）
+            start_ms = 0 if is_stream(self.path) else max(0, self.player.get_time())
+            paused = not self.player.is_playing()
+            self.release_standby()
+            self.load_file(self.path, start_ms, paused)
+
+    def watch_duration(self):
+        # 时长由 libvlc 在打开媒体后给出（MediaDurationChanged），之前先用探测缓存的时长
+        self.duration_ms = 0
+        self.shown_time = -1
+        if self.media_events is not None:
+            self.media_events.detach_all()  # 换下的媒体不再回调
+            self.media_events = None
+        if self.media is not None:
+            self.media_events = EventDispatcher(self.media)
+            self.media_events.attach(vlc.EventType.MediaDurationChanged, self._duration_changed, self.path)
+
+    def _duration_changed(self, event, path):
+        self.duration_changed.emit(path, event.u.new_duration)
+
+    def set_duration(self, path, duration_ms):
+        if path == self.path and duration_ms > 0:
+            self.duration_ms = duration_ms
+
+    def go_to_time(self):
+        if self.path is None:
+            return
+        text, ok = QInputDialog.getText(self, "Go to", "Time ([[hh:]mm:]ss[.mmm]) or #frame:",
+                                        text=format_timecode(self.player.get_time()))
+        if not ok:
+            return
+        try:
+            target = parse_timecode(text, self.info.get("fps"))
+        except ValueError as e:
+            QMessageBox.warning(self, "Go to", str(e))
+            return
+        self.seek_to_time(target)
+
+    def seek_to_time(self, target):
+        if self.duration_ms > 0:
+            target = min(target, self.duration_ms - 1)
+        self.player.set_time(target)
+
+    def media_probed(self, path, info):
+        if path != self.path or not info:
+            return
+        self.info = info
+        self.set_duration(path, info.get("duration_ms", 0))
+        duration = MultiVideoPlayer.format_time(info.get("duration_ms", 0) // 1000)
+        self.video_frame.setToolTip(f"{os.path.basename(path)}\n{describe(info)}  {duration}")
+        self.progress.set_media(info.get("duration_ms", 0))
+        if self.thumbnails is not None:
+            self.thumbnails.request(path, info.get("duration_ms", 0))
+
+    def thumbnails_ready(self, path, index):
+        if path == self.path:
+            self.progress.set_media(index.duration_ms, index)
+
+    def update_ui(self, position, time_ms):
+        # 由全局时钟在进度变化时回调
+        if not self.slider_pressed_flag and position >= 0:
+            value = int(position * 1000)
+            if value != self.progress.value():
+                self.progress.setValue(value)
+        if self.reconnector.attempts and time_ms > 0:
+            # 重连成功，退避延迟复位
+            self.reconnector.reset()
+            self.video_frame.setToolTip(self.path)
+        if time_ms >= 0 and time_ms != self.shown_time:
+            self.shown_time = time_ms
+            self.time_label.setText(time_text(time_ms, self.info.get("fps")))
+        # 录制中不预加载：切换到下一项时重新打开，才能写入新的录像文件
+        if self.playlist is not None and self.standby is None and self.record_path is None and time_ms >= 0:
+            if self.duration_ms > 0 and self.duration_ms - time_ms <= self.preload_ms:
+                self.preload_next()
 
 
 # --- 主窗口 ---
 class MultiVideoPlayer(QMainWindow):
-    def __init__(self):
+    stream_ended = pyqtSignal(object)  # 由 libvlc 线程发出，排队到 GUI 线程处理
+    duration_changed = pyqtSignal(str, int)
+    instance_ready = pyqtSignal(bool, float)  # 由初始化线程发出：libvlc 是否初始化成功, 耗时（毫秒）
+    snapshot_taken = pyqtSignal(str)    # 由截图线程发出：这一批的每个窗口都已截取（整面墙的路径）
+
+    def __init__(self, decode=None, vlc_args=(), metrics_file=None, metrics_port=None, session=None,
+                 profiler=None, control_port=None):
         super().__init__()
+        self.profiler = profiler  # 开启 --profile 时关闭窗口输出剖析结果
         self.setWindowTitle("Multi-Window Video Player")
         self.setMinimumSize(QSize(800, 600))
         self.setStyleSheet(STYLE_SHEET)
-        self.vlc_instance = vlc.Instance()
+        # 解码配置（play.conf 的 [decode] 节）决定 libvlc 实例参数
+        self.decode = decode or DecodeSettings(CONFIG)
+        instance_args = self.decode.instance_args() + list(vlc_args)
+        # libvlc 在后台线程中初始化，窗口先显示；打开第一个文件时才创建播放器
+        self.startup_times = {"imports": (IMPORTED - STARTED) * 1000}
+        self.instance_ready.connect(self.libvlc_ready, Qt.QueuedConnection)
+        self.vlc_loader = InstanceLoader(instance_args, self.instance_ready.emit)
+        self.libvlc_failed = False  # 初始化失败后不能再打开媒体
+        # 进程隔离：每个窗口的解码器运行在子进程中，崩溃或卡住时由监督者重启，不影响界面和其他窗口
+        self.supervisor = None
+        self.helpers = []  # 探测和缩略图各自的辅助子进程，长时间生成缩略图不耽误探测
+        if self.decode.instance_mode == "process":
+            self.supervisor = Supervisor(instance_args, parent=self)
+            self.supervisor.restarted.connect(self.worker_restarted)
+            self.helpers = [HelperProcess(), HelperProcess()]
+        # 播放器池：布局切换时复用播放器，而不是每次销毁重建
+        self.pool = PlayerPool(
+            self.vlc_loader, capacity=CONFIG.getint("memory", "pool_size", fallback=MAX_TILES),
+            per_tile_args=instance_args if self.decode.instance_mode == "per-tile" else None,
+            muted_options=self.decode.media_options(muted=True), supervisor=self.supervisor)
         
         # 设置窗口图标
         try:
@@ -206,14 +659,112 @@ class MultiVideoPlayer(QMainWindow):
         self.current_mode = "Single Video"
         # 默认窗口个数
         self.current_window_count = 4
+        # 窗口布局：内置布局加上 play.conf [layouts] 中的自定义布局
+        self.layouts = load_layouts(CONFIG)
+        self.current_layout = "4"
+        self.grid_cells = {}      # 控件 -> 当前所在的 (行, 列, 跨行, 跨列)，重新排列时只移动位置变化的控件
+        self.grid_shape = (0, 0)
         
         self.players = []         # Single Video下存放 (player, frame) 的列表
+        self.shared_decode = False  # Single Video下是否只解码一次再分发到所有窗口
+        self.frame_buffer = None    # 共享解码时的帧缓冲
+        self.mosaic = False         # Single Video下是否把所有窗口合成到一个画面
+        self.mosaic_view = None
+        self.mosaic_buffers = {}    # 马赛克模式下 player -> SharedFrameBuffer
+        self.recorder = None        # 马赛克录制/推流
         self.multi_widgets = []   # Multi Video下存放 VideoPlayerWidget 的列表
-        
-        self.create_ui()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_ui)
+        # 全局播放时钟：所有进度刷新共用一个定时器
+        self.clock = PlaybackClock(self.pool.events, 100, self)
+        # Single Video同步引擎：测量并纠正各窗口相对主播放器的偏移
+        self.sync_engine = SyncEngine(CONFIG.getint("sync", "interval_ms", fallback=500),
+                                      CONFIG.getint("sync", "nudge_threshold_ms", fallback=40),
+                                      CONFIG.getint("sync", "seek_threshold_ms", fallback=500),
+                                      CONFIG.getfloat("sync", "nudge", fallback=0.03), parent=self)
+        self.sync_engine.drift_measured.connect(self.show_drift)
+        # Single Video的播放/暂停/停止/倍速/跳转由线程池同时下发到所有播放器，而不是在 GUI 线程中逐个调用
+        self.dispatcher = CommandDispatcher()
+        # 跳转调度：拖动时合并请求并只跳关键帧，松开时精确跳转，记录每个播放器的跳转延迟
+        self.seeker = SeekScheduler(dispatcher=self.dispatcher, parent=self)
+        self.seeker.seeked.connect(self.show_seek_latency)
+        self.starts = StartPositions(self.pool.events, self)
+        # 每秒采集一次各窗口的 libvlc 统计，用于画面叠加、状态栏汇总和指标导出
+        self.stats_overlay = False
+        self.stats = StatsCollector(self.stat_tiles, latency=self.seeker.last_latency, parent=self)
+        self.stats.updated.connect(self.show_stats)
+        self.exporter = None
+        if metrics_file or metrics_port:
+            self.exporter = MetricsExporter(metrics_file, metrics_port)
+            self.stats.updated.connect(self.exporter.export)
+        # 自适应质量：负载高时降低非焦点小窗口的解码质量，不可见窗口暂停解码
+        self.focus_index = 0  # 当前焦点窗口（鼠标悬停或点击）
+        self.governor = QualityGovernor(self.pool, self.governor_tiles, starts=self.starts, parent=self)
+        self.governor.level_changed.connect(self.show_quality_level)
+        self.governor.paused_changed.connect(self.governor_paused)
+        self.stats.updated.connect(self.governor.update)
+        # 音频焦点：只有焦点窗口（Single Video下为第一个播放器）解码并输出音频
+        self.audio_focus = AudioFocus(self.pool.events, self)
+        # 内存预算（play.conf 的 [memory] 节）：打开媒体前预估占用，超出时降级或拒绝，状态栏显示用量
+        self.memory = MemoryBudget(CONFIG.getint("memory", "budget_mb", fallback=0),
+                                   CONFIG.getint("memory", "tile_mb", fallback=150),
+                                   CONFIG.get("memory", "over_budget", fallback="downgrade"), parent=self)
+        # 排队显示：拒绝打开后调用方紧接着会显示 "No video loaded"，提示要在它之后
+        self.memory.decision.connect(self.show_memory_decision, Qt.QueuedConnection)
+        self.stats.updated.connect(self.show_memory)
+        # 后台探测媒体并缓存元数据，打开已知文件时可立即显示时长等信息
+        self.media_path = None
+        self.media_events = None
+        self.duration_ms = 0
+        self.duration_text = "--:--:--.---"  # 时长只在变化时格式化一次
+        self.fps = None
+        self.shown_time = -1
+        self.duration_changed.connect(self.set_duration, Qt.QueuedConnection)
+        metadata = MetadataCache(os.path.join(cache_dir(CONFIG), "metadata.json"))
+        self.prober = MediaProber(self.pool.get_instance, metadata,
+                                  parse=self.helpers[0].probe if self.helpers else None, parent=self)
+        self.prober.probed.connect(self.media_probed)
+        # 后台生成缩略图索引（内存映射的单个文件），供进度条预览
+        self.thumbnails = ThumbnailIndexer(os.path.join(cache_dir(CONFIG), "thumbs"),
+                                           capture=self.helpers[1].thumbnails if self.helpers else None,
+                                           parent=self)
+        self.thumbnails.ready.connect(self.thumbnails_ready)
+        # 截图/录像：编码和写盘在后台线程，队列满时丢弃并计数，不影响播放
+        self.capture = CaptureWorker(capture_dir(CONFIG), CONFIG.getint("capture", "queue_size", fallback=16),
+                                     parent=self)
+        self.capture.saved.connect(self.capture_saved, Qt.QueuedConnection)
+        self.seeker.seeked.connect(self.snapshot_seeked)
+        self.snapshot_taken.connect(self.snapshot_done, Qt.QueuedConnection)
+        self.snapshot_batch = None  # Single Video下等待各窗口对齐位置后提交的批量截图
+        self.snapshot_resume = {}   # 批量截图路径 -> 截图期间暂停、写完后恢复的播放器
+        self.record = False         # Record 按钮：整面墙录像
+        self.record_path = None
+        # 会话文件：关闭时保存布局、每个窗口的媒体/位置/倍速/音量和播放列表
+        # 指定 --session 时启动即恢复整个布局，否则只在切换到 Multi Video 时恢复播放列表
+        self.session_path = session or os.path.join(cache_dir(CONFIG), "session.json")
+        self.session = load_session(self.session_path)
+        self.playlists = self.session.setdefault("playlists", {})  # 窗口序号 -> 播放列表
+        self.restore_target_ms = CONFIG.getint("session", "target_ms", fallback=3000)
+        self.restore_players = []
+        self.restore_timer = QTimer(self)
+        self.restore_timer.setInterval(20)
+        self.restore_timer.timeout.connect(self.check_restored)
+        # 网络流：每个流的媒体选项，断线或出错后按退避延迟重连
+        self.media_options = []
+        self.stream_ended.connect(self.master_ended, Qt.QueuedConnection)
+        self.reconnector = Reconnector(self.reconnect_stream, parent=self)
+        self.reconnector.reconnecting.connect(self.show_reconnecting)
         self.slider_pressed = False
+        self.sync_resume = False  # 按下进度条前纠偏是否在运行
+
+        self.create_ui()
+        self.stats.start()
+        QTimer.singleShot(0, self.window_shown)  # 事件循环开始后窗口已经显示
+        if session is not None and self.session.get("mode"):
+            self.restore_session(self.session)
+        # 本机控制接口（--control-port）：脚本通过 HTTP 提交命令，每批命令在 GUI 线程中一次执行完
+        self.control = None
+        if control_port is not None:
+            self.control = ControlServer(self.run_commands, control_port, parent=self)
+            print(f"Control API on http://127.0.0.1:{self.control.port}/commands")
 
     def create_ui(self):
         central_widget = QWidget()
@@ -242,6 +793,24 @@ class MultiVideoPlayer(QMainWindow):
         self.open_btn.setIcon(QIcon.fromTheme("document-open"))
         self.open_btn.clicked.connect(self.open_file)
         control_layout.addWidget(self.open_btn)
+
+        # 打开网络流（Single Video下所有窗口播放，Multi Video下在焦点窗口播放）
+        self.stream_btn = QPushButton("Open Stream...")
+        self.stream_btn.setIcon(QIcon.fromTheme("network-wired"))
+        self.stream_btn.clicked.connect(self.open_stream)
+        control_layout.addWidget(self.stream_btn)
+
+        # 截图（所有窗口同一时刻，拼成整面墙）和录像
+        self.snapshot_btn = QPushButton("Snapshot")
+        self.snapshot_btn.setIcon(QIcon.fromTheme("camera-photo"))
+        self.snapshot_btn.setToolTip("Capture every window at the same moment and save the whole wall")
+        self.snapshot_btn.clicked.connect(self.snapshot_wall)
+        control_layout.addWidget(self.snapshot_btn)
+        self.record_btn = QPushButton("Record")
+        self.record_btn.setIcon(QIcon.fromTheme("media-record"))
+        self.record_btn.setCheckable(True)
+        self.record_btn.toggled.connect(self.record_wall)
+        control_layout.addWidget(self.record_btn)
         
         # 全局播放按钮
         self.play_btn = QPushButton("Play")
@@ -277,9 +846,46 @@ class MultiVideoPlayer(QMainWindow):
         speed_layout.addWidget(self.speed_combo)
         control_layout.addWidget(self.speed_container)
 
+        # 共享解码开关（仅在Single Video模式下显示）：只解码一次，所有窗口从同一帧缓冲绘制
+        self.shared_check = QCheckBox("Shared Decode")
+        self.shared_check.setToolTip("Decode the file once and paint every window from the same frame buffer")
+        self.shared_check.setChecked(self.shared_decode)
+        self.shared_check.toggled.connect(self.shared_decode_changed)
+        control_layout.addWidget(self.shared_check)
+
+        # 马赛克开关（仅在Single Video模式下显示）：每个窗口独立解码，合成到一个画面，可录制或推流
+        self.mosaic_check = QCheckBox("Mosaic")
+        self.mosaic_check.setToolTip("Composite every window into one offscreen picture that can be recorded or streamed")
+        self.mosaic_check.toggled.connect(self.mosaic_changed)
+        control_layout.addWidget(self.mosaic_check)
+        if self.supervisor is not None:
+            # 子进程中的播放器已经解码到共享内存，不支持再挂视频回调
+            self.shared_check.setEnabled(False)
+            self.mosaic_check.setEnabled(False)
+
+        # 统计叠加开关：在所有窗口画面上显示解码/显示/丢帧和码率
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.setToolTip("Overlay per-window decode statistics")
+        self.stats_check.toggled.connect(self.set_stats_overlay)
+        control_layout.addWidget(self.stats_check)
+
+        # 自适应质量开关
+        self.quality_check = QCheckBox("Auto Quality")
+        self.quality_check.setToolTip("Reduce decode quality of small, unfocused windows under load and pause hidden ones")
+        self.quality_check.setChecked(False)  # 每次调整都要重新打开媒体，默认关闭
+        self.quality_check.toggled.connect(self.governor.set_enabled)
+        control_layout.addWidget(self.quality_check)
+
+        # 音频焦点开关
+        self.audio_check = QCheckBox("Audio Focus")
+        self.audio_check.setToolTip("Only decode and play audio of the focused window (hover or click to focus)")
+        self.audio_check.setChecked(True)
+        self.audio_check.toggled.connect(self.audio_focus.set_enabled)
+        control_layout.addWidget(self.audio_check)
+
         # 窗口布局下拉框：选择显示窗口个数（对两种模式都适用）
         self.window_combo = QComboBox()
-        self.window_combo.addItems(["1", "2", "4", "6", "8", "9"])
+        self.window_combo.addItems(list(self.layouts))
         self.window_combo.setCurrentText("4")
         self.window_combo.currentIndexChanged.connect(self.change_window_count)
         self.layout_label = QLabel("Window Layout:")
@@ -295,19 +901,31 @@ class MultiVideoPlayer(QMainWindow):
         self.time_progress_layout.setContentsMargins(0, 0, 0, 0)
         self.time_progress_layout.setSpacing(10)
         
-        self.time_label = QLabel("00:00:00 / 00:00:00")
+        self.time_label = QLabel("00:00:00.000 / --:--:--.---")
         self.time_label.setContentsMargins(0, 0, 0, 0)
         self.time_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         self.time_label.setStyleSheet("padding: 0px; margin: 0px; border: none;")
         self.time_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         self.time_progress_layout.addWidget(self.time_label)
 
-        self.progress = QSlider(Qt.Horizontal)
+        # 拖动时只更新预览，松开后每个播放器只跳转一次
+        self.progress = PreviewSlider(Qt.Horizontal)
         self.progress.setRange(0, 1000)
         self.progress.sliderPressed.connect(self.slider_pressed_event)
         self.progress.sliderReleased.connect(self.slider_released_event)
-        self.progress.valueChanged.connect(self.seek_video)
+        self.progress.sliderMoved.connect(self.scrub)
         self.time_progress_layout.addWidget(self.progress, 1)
+
+        # 跳转到指定时间或帧号，逐帧前进（所有窗口同步）
+        self.goto_edit = QLineEdit()
+        self.goto_edit.setPlaceholderText("Go to hh:mm:ss.mmm or #frame")
+        self.goto_edit.setFixedWidth(190)
+        self.goto_edit.returnPressed.connect(self.go_to_time)
+        self.time_progress_layout.addWidget(self.goto_edit)
+        self.step_btn = QPushButton("Next Frame")
+        self.step_btn.setIcon(QIcon.fromTheme("go-next"))
+        self.step_btn.clicked.connect(self.step_frame)
+        self.time_progress_layout.addWidget(self.step_btn)
         
         main_layout.addLayout(self.time_progress_layout)
 
@@ -323,6 +941,12 @@ class MultiVideoPlayer(QMainWindow):
         # 状态栏
         self.status_bar = self.statusBar()
         self.status_bar.showMessage("Ready")
+        self.drift_label = QLabel()
+        self.status_bar.addPermanentWidget(self.drift_label)
+        self.stats_label = QLabel()
+        self.status_bar.addPermanentWidget(self.stats_label)
+        self.memory_label = QLabel()
+        self.status_bar.addPermanentWidget(self.memory_label)
         
         # 根据默认模式创建窗口
         self.setup_video_windows()
@@ -330,47 +954,105 @@ class MultiVideoPlayer(QMainWindow):
     def mode_changed(self, index):
         # 根据模式切换更新界面
         self.current_mode = self.mode_combo.currentText()
+        self.set_record_checked(False)  # 切换模式时窗口重建，录像随之停止
         if self.current_mode == "Single Video":
-            self.open_btn.setEnabled(True)
+            self.open_btn.setEnabled(not self.libvlc_failed)
             self.time_progress_layout.setEnabled(True)
             self.play_btn.setEnabled(True)
             self.stop_btn.setEnabled(True)
+            self.goto_edit.setEnabled(True)
+            self.step_btn.setEnabled(True)
             self.speed_container.show()  # 显示整个倍速容器
+            self.shared_check.show()
+            self.mosaic_check.show()
             self.status_bar.showMessage("Single Video mode - all windows play the same video")
         else:
             self.open_btn.setEnabled(False)
             self.time_progress_layout.setEnabled(False)
             self.play_btn.setEnabled(False)
             self.stop_btn.setEnabled(False)
+            self.goto_edit.setEnabled(False)
+            self.step_btn.setEnabled(False)
             self.speed_container.hide()  # 隐藏整个倍速容器
+            self.shared_check.hide()
+            self.mosaic_check.hide()
             self.status_bar.showMessage("Multi Video mode - each window can play independent videos (right-click to load)")
         # 清除现有窗口并重新创建
         self.clear_video_container()
         self.setup_video_windows()
 
     def change_window_count(self, index):
-        text = self.window_combo.itemText(index)
-        self.current_window_count = int(text)
-        self.clear_video_container()
+        self.current_layout = self.window_combo.itemText(index)
+        self.current_window_count = len(compute_layout(self.layouts[self.current_layout]))
+        # 只增减差额部分的窗口，已有的播放器和窗口继续使用
         self.setup_video_windows()
         self.status_bar.showMessage(f"Changed to {self.current_window_count} window layout")
 
+    def shared_decode_changed(self, checked):
+        self.shared_decode = checked
+        if checked and self.mosaic:
+            # 两种方式互斥，只重建一次窗口
+            self.mosaic = False
+            self.mosaic_check.blockSignals(True)
+            self.mosaic_check.setChecked(False)
+            self.mosaic_check.blockSignals(False)
+        if self.current_mode != "Single Video":
+            return
+        self.rebuild_single_windows()
+        mode = "shared decode" if checked else "one decoder per window"
+        self.status_bar.showMessage(f"Single Video mode - {mode}")
+
+    def mosaic_changed(self, checked):
+        self.mosaic = checked
+        if checked and self.shared_decode:
+            self.shared_decode = False
+            self.shared_check.blockSignals(True)
+            self.shared_check.setChecked(False)
+            self.shared_check.blockSignals(False)
+        if self.current_mode != "Single Video":
+            return
+        self.rebuild_single_windows()
+        mode = "mosaic (right-click to record)" if checked else "one decoder per window"
+        self.status_bar.showMessage(f"Single Video mode - {mode}")
+
+    def rebuild_single_windows(self):
+        # 重建窗口后把已加载的媒体重新挂到新的播放器上
+        media = self.media if self.media_available() else None
+        self.clear_video_container()
+        self.setup_video_windows()
+        if media is not None:
+            self.media = None
+            self.load_video(media.get_mrl())
+            self.toggle_play()
+
     def change_global_speed(self, speed_text):
         speed = float(speed_text)
-        for player, _ in self.players:
-            player.set_rate(speed)
+        self.dispatcher.run(self.single_players(), "set_rate", speed)
+        self.sync_engine.set_rate(speed)
         self.status_bar.showMessage(f"Global playback speed set to {speed}x")
 
     
     def clear_video_container(self):
-        # 单视频模式下终止播放器
-        if self.current_mode == "Single Video":
-            for player, frame in self.players:
-                if player.is_playing():
-                    player.stop()
-            self.players.clear() 
-        else: # 多视频模式
-            self.multi_widgets.clear() # Clear the list of widgets
+        self.clock.detach_all()
+        self.audio_focus.set_players([], None)
+        self.sync_engine.stop()
+        self.sync_engine.set_players([])
+        self.drift_label.clear()
+        # 模式切换时两种模式的窗口都要回收（此时 current_mode 可能已经是新模式）
+        # Single Video的播放器归还到播放器池；共享解码的播放器带有视频回调，不可复用，直接释放
+        for player in self.single_players():
+            self.release_player(player, discard=self.frame_buffer is not None or self.mosaic_view is not None)
+        self.players.clear()
+        self.frame_buffer = None
+        self.stop_recording()
+        self.snapshot_batch = None  # 播放器已回收，尚未写完的截图不再恢复播放
+        self.snapshot_resume.clear()
+        self.mosaic_view = None  # 随网格中的部件一起删除
+        self.mosaic_buffers.clear()
+        for index, widget in enumerate(self.multi_widgets):
+            self.release_widget(index, widget)
+        self.multi_widgets.clear()
+        self.focus_index = 0
 
         # 清除网格布局中的部件
         while self.grid.count():
@@ -379,65 +1061,416 @@ class MultiVideoPlayer(QMainWindow):
             if widget is not None:
                 widget.setParent(None)
                 widget.deleteLater()
+        self.grid_cells.clear()
 
+    def release_player(self, player, discard=False):
+        # 播放器归还到池中之前解除所有订阅
+        self.clock.detach(player)
+        self.seeker.forget(player)
+        self.starts.cancel(player)
+        self.governor.forget(player)
+        self.audio_focus.forget(player)
+        self.memory.forget(player)
+        self.unwatch_end(player)
+        if discard:
+            self.pool.discard(player)  # 带有视频回调的播放器不可复用
+        else:
+            self.pool.release(player)
+
+    def release_widget(self, index, widget):
+        # 记住控件的播放列表，归还它的播放器（包括预加载的播放器）
+        if widget.playlist is not None:
+            self.playlists[str(index)] = widget.playlist.to_dict()
+        elif widget.path is not None:
+            self.playlists.pop(str(index), None)
+        widget.teardown()
+        if widget.player is not None:
+            self.release_player(widget.player)
+
+    def tile_player_changed(self, old, new):
+        # 播放列表切换到预加载的播放器：回收旧播放器，音频焦点转移到新播放器；
+        # 空窗口第一次打开媒体时 old 为 None，只需把新播放器加入音频焦点
+        if old is not None:
+            self.memory.replace(old, new)
+            self.release_player(old)
+        self.update_audio_focus()
+
+    def remove_tile(self, widget):
+        if self.focus_index >= self.current_window_count:
+            self.set_focus_tile(0)
+        self.grid.removeWidget(widget)
+        self.grid_cells.pop(widget, None)
+        widget.setParent(None)
+        widget.deleteLater()
 
     def setup_video_windows(self):
-        # 根据当前模式和窗口个数创建视频窗口
+        # 根据当前模式和窗口个数增减视频窗口，已有的窗口和播放器原样保留
         if self.current_mode == "Single Video":
-            self.create_single_mode_windows()
+            added = self.create_single_mode_windows()
         else:
             self.create_multi_mode_windows()
         self.arrange_windows()
+        if self.current_mode == "Multi Video":
+            self.restore_playlists()
+        # Single Video下只订阅主播放器的进度，其余播放器与其同步
+        if self.current_mode == "Single Video" and self.single_players():
+            self.clock.attach(self.single_players()[0], self.update_ui)
+            self.sync_engine.set_players(self.single_players())
+            # 播放中新增的窗口直接加入播放，由同步引擎跳转到主播放器的位置
+            if self.media_available() and self.is_playing():
+                for player in added:
+                    player.play()
+        self.update_audio_focus()
 
     def create_single_mode_windows(self):
         # 原有Single Video：所有窗口共用同一媒体（后续调用 open_file 和 toggle_play 影响所有窗口）
-        for _ in range(self.current_window_count):
-            frame = QFrame()
+        if self.shared_decode:
+            self.create_shared_decode_windows()
+            return []
+        if self.mosaic:
+            return self.create_mosaic_windows()
+        # 多余的窗口：播放器归还到池中
+        while len(self.players) > self.current_window_count:
+            player, frame = self.players.pop()
+            if player is not None:
+                self.release_player(player)
+            self.remove_tile(frame)
+        added = []
+        while len(self.players) < self.current_window_count:
+            frame = FrameView()
             frame.setFrameShape(QFrame.Box)
             frame.setStyleSheet("background-color: black; border: 2px solid #444;")
-            player = self.vlc_instance.media_player_new()
-            # 设置初始倍速
+            frame.installEventFilter(self)
+            player = None
+            if self.media_available():
+                # 没有媒体时只创建画面，播放器在打开文件时才创建（见 admit_single_players）
+                self.memory.refresh()
+                extra = self.memory.check(1, os.path.basename(self.media_path or ""))
+                if extra is None:
+                    # 超出内存预算：窗口留空，不创建播放器
+                    self.players.append((None, frame))
+                    continue
+                player = self.create_single_player()
+                self.memory.add([player], extra)
+                # 每个播放器使用独立的媒体副本，统计信息才能按窗口区分
+                self.pool.set_media(player, self.pool.media_new(player, self.media.get_mrl(), *self.media_options,
+                                                                *extra))
+                added.append(player)
+            self.players.append((player, frame))
+        return added
+
+    def create_single_player(self):
+        player = self.pool.acquire()
+        # 设置初始倍速
+        player.set_rate(float(self.speed_combo.currentText()))
+        return player
+
+    def admit_single_players(self, label):
+        # 打开文件前逐个窗口检查内存预算，超出时这个窗口降级或留空，画面墙逐步降级而不是整批拒绝；
+        # 还没有播放器的窗口通过检查后才创建播放器，并订阅进度、加入同步和音频焦点。
+        # 返回 {player: 需要附加的媒体选项}，不在其中的窗口不打开
+        self.memory.refresh()
+        admitted, added = {}, []
+        for index, (player, frame) in enumerate(self.players):
+            if player in admitted:
+                continue  # 共享解码时所有窗口是同一个播放器
+            if player is None:
+                extra = self.memory.check(1, label)
+                if extra is None:
+                    continue
+                player = self.create_single_player()
+                self.players[index] = (player, frame)
+                self.memory.add([player], extra)
+                added.append(player)
+            else:
+                extra = self.memory.admit([player], label)
+                if extra is None:
+                    continue
+            admitted[player] = extra
+        if added:
+            self.clock.attach(self.single_players()[0], self.update_ui)
+            self.sync_engine.set_players(self.single_players())
+            self.update_audio_focus()
+        return admitted
+
+    def create_shared_decode_windows(self):
+        # 共享解码：只创建一个播放器解码到内存，所有窗口绘制同一帧缓冲
+        if self.frame_buffer is None:
+            player = self.pool.acquire()
             player.set_rate(float(self.speed_combo.currentText()))
+            self.frame_buffer = SharedFrameBuffer(player)
+            self.frame_buffer.frame_ready.connect(self.repaint_shared_frames)
+        player = self.frame_buffer.player
+        while len(self.players) > self.current_window_count:
+            _, frame = self.players.pop()
+            self.remove_tile(frame)
+        while len(self.players) < self.current_window_count:
+            frame = FrameView(self.frame_buffer)
+            frame.installEventFilter(self)
+            frame.setFrameShape(QFrame.Box)
+            frame.setStyleSheet("background-color: black; border: 2px solid #444;")
             self.players.append((player, frame))
 
+    def create_mosaic_windows(self):
+        # 马赛克：每个播放器解码到各自的帧缓冲，由同一个离屏合成画面按布局绘制
+        if self.mosaic_view is None:
+            self.mosaic_view = create_mosaic_view()
+            self.mosaic_view.installEventFilter(self)
+            self.mosaic_view.setContextMenuPolicy(Qt.CustomContextMenu)
+            self.mosaic_view.customContextMenuRequested.connect(self.show_mosaic_menu)
+        while len(self.players) > self.current_window_count:
+            player, _ = self.players.pop()
+            self.mosaic_buffers.pop(player, None)
+            self.release_player(player, discard=True)
+        added = []
+        while len(self.players) < self.current_window_count:
+            player = self.pool.acquire()
+            player.set_rate(float(self.speed_combo.currentText()))
+            buffer = SharedFrameBuffer(player, 1280, 720)
+            buffer.frame_ready.connect(self.mosaic_view.frame_ready)
+            self.mosaic_buffers[player] = buffer
+            if self.media_available():
+                self.pool.set_media(player, self.pool.media_new(player, self.media.get_mrl(), *self.media_options))
+            self.players.append((player, self.mosaic_view))
+            added.append(player)
+        return added
+
+    def show_mosaic_menu(self, pos):
+        menu = QMenu(self)
+        if self.recorder is None:
+            menu.addAction("Record to file...", self.record_mosaic)
+            menu.addAction("Broadcast to URL...", self.broadcast_mosaic)
+        else:
+            menu.addAction("Stop recording", self.stop_recording)
+        menu.exec_(self.mosaic_view.mapToGlobal(pos))
+
+    def record_mosaic(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Record mosaic", "mosaic.mp4",
+                                              "Video Files (*.mp4 *.mkv *.ts)")
+        if path:
+            self.start_recording(path)
+
+    def broadcast_mosaic(self):
+        url, ok = QInputDialog.getText(self, "Broadcast mosaic", "URL:", text="rtmp://")
+        if ok and url.strip():
+            self.start_recording(url.strip())
+
+    def start_recording(self, output):
+        if self.mosaic_view is None:
+            return
+        try:
+            self.recorder = MosaicRecorder(self.mosaic_view, output, parent=self)
+        except (RuntimeError, OSError) as e:
+            self.status_bar.showMessage(f"Recording failed: {e}")
+            return
+        # 编码线程结束（ffmpeg 退出）时排队回到 GUI 线程处理；先连接再启动，不会错过立即失败的通知
+        self.recorder.stopped.connect(self.recording_stopped, Qt.QueuedConnection)
+        self.recorder.start()
+        self.status_bar.showMessage(f"Recording mosaic to {output}")
+
+    def stop_recording(self, wait=False):
+        if self.recorder is not None:
+            self.recorder.stop()
+            if wait:
+                self.recorder.writer.join(5)  # 退出前让 ffmpeg 写完文件尾
+
+    def recording_stopped(self, error):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return
+        self.set_record_checked(False)
+        message = error or "Recording stopped"
+        self.status_bar.showMessage(f"{message} ({recorder.dropped} frames dropped)")
+        recorder.deleteLater()
+
+    def snapshot_wall(self):
+        # 整面墙截图：所有窗口在同一时刻截取，写盘后按布局拼成一张图
+        cells = compute_layout(self.layouts[self.current_layout])
+        stamp = capture_stamp()
+        if self.current_mode == "Multi Video":
+            # 各窗口播放不同的媒体：同时暂停，截取同一时刻的画面，写完后恢复
+            playing = [widget.player for widget in self.multi_widgets if widget.player is not None
+                       and (widget.player.is_playing() or widget.player in self.snapshot_held())]
+            self.take_over_resume(playing)
+            for player in playing:
+                player.set_pause(1)
+            tiles = [(player_snapshot(widget.player), self.capture.path(widget.path, f"-{index + 1}.png", stamp))
+                     if widget.path else None for index, widget in enumerate(self.multi_widgets)]
+            self.submit_snapshot(tiles, cells, stamp, playing)
+            return
+        if not self.media_available():
+            self.status_bar.showMessage("No video loaded")
+            return
+        if self.frame_buffer is not None:
+            # 共享解码只有一个画面：复制当前帧即可，不必暂停
+            with self.frame_buffer.lock:
+                image = self.frame_buffer.image.copy()
+            self.capture.submit(image_snapshot(image), self.capture.path(self.media_path, ".png", stamp))
+            return
+        if self.mosaic_view is not None:
+            tiles = []
+            for index, (player, _) in enumerate(self.players):
+                buffer = self.mosaic_buffers[player]
+                with buffer.lock:
+                    image = buffer.image.copy()
+                tiles.append((image_snapshot(image), self.capture.path(self.media_path, f"-{index + 1}.png", stamp)))
+            self.submit_snapshot(tiles, cells, stamp, [])
+            return
+        # 所有窗口播放同一文件：暂停后对齐到主播放器的位置，跳转完成后再截图
+        if self.snapshot_batch is not None:
+            self.status_bar.showMessage("Snapshot in progress", 2000)
+            return
+        players = self.single_players()
+        playing = players if self.is_playing() or self.snapshot_held() & set(players) else []
+        self.take_over_resume(playing)
+        self.sync_engine.stop()
+        for player in players:
+            player.set_pause(1)
+        tiles = [(player_snapshot(player), self.capture.path(self.media_path, f"-{index + 1}.png", stamp))
+                 for index, player in enumerate(players)]
+        self.snapshot_batch = (tiles, cells, stamp, playing)
+        self.seeker.seek(players, players[0].get_position(), tag=stamp)  # 只有这次跳转完成才截图
+
+    def snapshot_held(self):
+        # 之前的批量截图暂停、尚未恢复的播放器
+        return set(player for players in self.snapshot_resume.values() for player in players)
+
+    def take_over_resume(self, players):
+        # 新的一批截图接管这些播放器，由它截取完成后恢复，之前的批次不再恢复它们
+        for path, paused in self.snapshot_resume.items():
+            self.snapshot_resume[path] = [player for player in paused if player not in players]
+
+    def snapshot_seeked(self, results, tag):
+        if self.snapshot_batch is not None and self.snapshot_batch[2] == tag:
+            batch, self.snapshot_batch = self.snapshot_batch, None
+            self.submit_snapshot(*batch)
+
+    def submit_snapshot(self, tiles, cells, stamp, paused):
+        path = self.capture.path("wall", ".png", stamp)
+        count = sum(tile is not None for tile in tiles)
+        # 各窗口截取完成后立即恢复播放，拼图和写入整面墙在后台继续
+        taken = lambda: self.snapshot_taken.emit(path)
+        if count and self.capture.submit(batch_snapshot(tiles, cells, taken), path, count):
+            self.snapshot_resume[path] = paused
+        else:
+            self.resume_players(paused)
+
+    def snapshot_done(self, path):
+        self.resume_players(self.snapshot_resume.pop(path, []))
+
+    def resume_players(self, players):
+        for player in players:
+            player.set_pause(0)
+        if players and self.current_mode == "Single Video":
+            self.sync_engine.hold(1000)
+            self.sync_engine.start()
+
+    def capture_saved(self, path, error):
+        self.resume_players(self.snapshot_resume.pop(path, []))  # 截取中途出错时没有 snapshot_taken
+        message = f"Snapshot failed: {error}" if error else f"Saved {os.path.basename(path)}"
+        if self.capture.dropped:
+            message += f" ({self.capture.dropped} snapshots dropped)"
+        self.status_bar.showMessage(message, 5000)
+
+    def record_wall(self, record):
+        # Multi Video下每个窗口各自写录像文件；Single Video录主播放器的流，马赛克录合成画面
+        self.record = record
+        if self.current_mode == "Multi Video":
+            for widget in self.multi_widgets:
+                widget.set_recording(record)
+        elif self.mosaic_view is not None:
+            if not record:
+                self.stop_recording()
+                return
+            self.start_recording(self.capture.path("mosaic", ".mp4"))
+            if self.recorder is None:
+                self.set_record_checked(False)
+            return
+        elif self.media_available():
+            # 从当前位置重新打开媒体，加上或去掉录制输出
+            path = self.media_path
+            start_ms = 0 if is_stream(path) else max(0, self.single_players()[0].get_time())
+            paused = not self.is_playing()
+            self.media = None
+            self.load_video(path, start_ms, paused)
+            self.toggle_play()
+        if record:
+            self.status_bar.showMessage(f"Recording to {self.capture.directory}")
+
+    def set_record_checked(self, checked):
+        self.record = checked
+        self.record_btn.blockSignals(True)
+        self.record_btn.setChecked(checked)
+        self.record_btn.blockSignals(False)
+
+    def repaint_shared_frames(self):
+        if self.frame_buffer is None:
+            return
+        self.frame_buffer.frame_consumed()
+        for _, frame in self.players:
+            frame.update()
+
+    def single_players(self):
+        # 共享解码时多个窗口对应同一个播放器，去重后再下发命令
+        players = []
+        for player, _ in self.players:
+            if player is not None and player not in players:
+                players.append(player)
+        return players
+
     def create_multi_mode_windows(self):
         # 每个窗口为独立 VideoPlayerWidget（内置控件包括右键选文件、独立控制、音量等）
-        for _ in range(self.current_window_count):
-            widget = VideoPlayerWidget(self.vlc_instance)
-            widget.setStyleSheet(STYLE_SHEET)
+        while len(self.multi_widgets) > self.current_window_count:
+            widget = self.multi_widgets.pop()
+            self.release_widget(len(self.multi_widgets), widget)
+            self.remove_tile(widget)
+        while len(self.multi_widgets) < self.current_window_count:
+            widget = VideoPlayerWidget(self.pool, self.clock, self.prober, self.thumbnails, self.seeker,
+                                       self.capture, self.memory, self.starts)
+            widget.stats_overlay = self.stats_overlay
+            widget.installEventFilter(self)
+            widget.player_changed.connect(self.tile_player_changed)
             widget.volume_icon.setStyleSheet("background-color: #1e1e1e;color: white;padding: 0px; margin: 0px; border: none;")
             self.multi_widgets.append(widget)
 
+    def restore_playlists(self):
+        # 新建的空窗口恢复上次的播放列表（控件已放入布局，可以绑定视频输出）
+        for index, widget in enumerate(self.multi_widgets):
+            data = self.playlists.get(str(index))
+            if data and widget.path is None and widget.playlist is None:
+                widget.set_playlist(Playlist.from_dict(data))
+
     def arrange_windows(self):
-        count = self.current_window_count
-        rows = int(count ** 0.5)
-        cols = count // rows
-        if rows * cols < count:
-            cols += 1
-        # 清空旧布局
-        while self.grid.count():
-            child = self.grid.takeAt(0)
-            if child.widget():
-                child.widget().setParent(None)
-        # 添加视频窗口到网格中
-        if self.current_mode == "Single Video":
-            for index, (player, frame) in enumerate(self.players):
-                row = index // cols
-                col = index % cols
-                self.grid.addWidget(frame, row, col)
-                # 设置视频输出
-                if self.media_available() and frame.winId():
-                    if platform.system() == "Windows":
-                        player.set_hwnd(frame.winId())
-                    elif platform.system() == "Darwin":
-                        player.set_nsobject(frame.winId())
-                    elif platform.system() == "Linux":
-                        player.set_xwindow(frame.winId())
+        cells = compute_layout(self.layouts[self.current_layout])
+        if self.current_mode == "Single Video" and self.mosaic_view is not None:
+            # 马赛克只有一个画面控件占满整个网格，窗口布局由合成画面自己绘制
+            self.mosaic_view.set_tiles([self.mosaic_buffers[player] for player, _ in self.players], cells)
+            cells = ((0, 0) + grid_size(cells),)
+            tiles = [(self.mosaic_view, None)]
+        elif self.current_mode == "Single Video":
+            tiles = [(frame, player) for player, frame in self.players]
         else:
-            for index, widget in enumerate(self.multi_widgets):
-                row = index // cols
-                col = index % cols
-                self.grid.addWidget(widget, row, col)
+            tiles = [(widget, None) for widget in self.multi_widgets]
+        # 只移动位置变化的控件：从网格中移除后重新加入，不改变父窗口，原生窗口句柄保持不变
+        for (widget, player), cell in zip(tiles, cells):
+            previous = self.grid_cells.get(widget)
+            if previous == cell:
+                continue
+            if previous is not None:
+                self.grid.removeWidget(widget)
+            self.grid.addWidget(widget, *cell)
+            self.grid_cells[widget] = cell
+            # 新加入的 Single Video 窗口绑定视频输出（共享解码的窗口自行绘制，无需绑定句柄）
+            if previous is None and player is not None and self.media_available() \
+                    and self.frame_buffer is None and widget.winId():
+                bind_video_output(player, widget)
+        # 使用中的行列等分空间，多余的行列不占空间
+        rows, cols = grid_size(cells)
+        for row in range(max(rows, self.grid_shape[0])):
+            self.grid.setRowStretch(row, 1 if row < rows else 0)
+        for col in range(max(cols, self.grid_shape[1])):
+            self.grid.setColumnStretch(col, 1 if col < cols else 0)
+        self.grid_shape = (rows, cols)
 
     def media_available(self):
         # 检查是否已加载媒体（用于Single Video）
@@ -450,26 +1483,107 @@ class MultiVideoPlayer(QMainWindow):
         path, _ = QFileDialog.getOpenFileName(
             self, "Select a video file", "", "Video (*.mp4 *.avi *.mkv *.mov)")
         if path:
-            self.load_video(path)
-            self.toggle_play()  
-            self.status_bar.showMessage(f"Playing: {os.path.basename(path)}")
+            self.play_file(path)
         else:
             self.status_bar.showMessage("File not selected")
 
-    def load_video(self, path):
+    def play_file(self, path):
+        # 先显示文件名，元数据（缓存命中时立即）由 media_probed 补充
+        self.status_bar.showMessage(f"Playing: {os.path.basename(path)}")
+        self.reconnector.reset()
+        self.media_options = []
+        self.load_video(path)
+        self.toggle_play()
+
+    def load_video(self, path, start_ms=0, paused=False):
         # 加载视频文件，并将同一媒体设置到所有播放器中
         # 避免重复加载相同文件
         if self.media_available() and self.media.get_mrl() == path:
             return
-        self.media = self.vlc_instance.media_new(path)
-        for player, frame in self.players:
-            player.set_media(self.media)
-            if platform.system() == "Windows":
-                player.set_hwnd(frame.winId())
-            elif platform.system() == "Darwin":
-                player.set_nsobject(frame.winId())
-            elif platform.system() == "Linux":
-                player.set_xwindow(frame.winId())
+        admitted = self.admit_single_players(os.path.basename(path))
+        master = self.players[0][0] if self.players else None
+        if master not in admitted:
+            return  # 第一个窗口（主播放器）也超出内存预算：不打开
+        self.media_path = path
+        self.set_duration(path, 0)
+        self.fps = None
+        self.shown_time = -1
+        self.progress.set_media(0)
+        self.prober.probe(path)  # 后台解析，缓存命中时立即返回
+        players = self.single_players()
+        options = self.media_options + admitted[master]
+        # 录制时只有主播放器的媒体带录制输出，其余窗口播放同一文件不必重复写入
+        self.record_path = self.capture.path(path, ".ts") if self.record and self.mosaic_view is None else None
+        record = record_options(self.record_path) if self.record_path else []
+        self.media = self.pool.media_new(players[0], path, *options, *record)
+        self.watch_duration(path)
+        for player in players:
+            self.governor.forget(player)
+        if is_stream(path):
+            self.watch_end(players[0])  # 跟随主播放器判断断流
+        if self.frame_buffer is not None:
+            self.pool.set_media(self.frame_buffer.player, self.media)
+            self.starts.arm(self.frame_buffer.player, start_ms, paused)
+            return
+        for index, (player, frame) in enumerate(self.players):
+            if player not in admitted:
+                if player is not None:
+                    self.pool.set_media(player, None)  # 超出内存预算：窗口留空
+                continue
+            # 每个播放器使用独立的媒体对象，统计信息才能按窗口区分
+            media = self.media if index == 0 else self.pool.media_new(player, path, *self.media_options,
+                                                                      *admitted[player])
+            self.pool.set_media(player, media)
+            self.starts.arm(player, start_ms, paused)
+            if self.mosaic_view is None:
+                bind_video_output(player, frame)
+
+    def open_stream(self):
+        stream = StreamDialog.get_stream(self, self.decode.network_caching or 1000)
+        if stream is None:
+            return
+        url, options = stream
+        if self.current_mode == "Multi Video":
+            if self.focus_index < len(self.multi_widgets):
+                self.multi_widgets[self.focus_index].play_stream(url, options)
+            return
+        self.status_bar.showMessage(f"Playing: {url}")
+        self.reconnector.reset()
+        self.media_options = options
+        self.media = None
+        self.load_video(url)
+        self.toggle_play()
+
+    def watch_end(self, player):
+        # 经播放器的事件分发订阅，与窗口控件对同一播放器的订阅互不覆盖
+        events = self.pool.events(player)
+        events.attach(vlc.EventType.MediaPlayerEndReached, self._stream_ended, player)
+        events.attach(vlc.EventType.MediaPlayerEncounteredError, self._stream_ended, player)
+
+    def unwatch_end(self, player):
+        events = self.pool.events(player)
+        events.detach(vlc.EventType.MediaPlayerEndReached, self._stream_ended)
+        events.detach(vlc.EventType.MediaPlayerEncounteredError, self._stream_ended)
+
+    def _stream_ended(self, event, player):
+        # 运行在 libvlc 线程中，不能直接调用 libvlc
+        self.stream_ended.emit(player)
+
+    def master_ended(self, player):
+        players = self.single_players()
+        if players and player is players[0] and is_stream(self.media_path):
+            self.reconnector.schedule()
+
+    def reconnect_stream(self):
+        # 所有窗口重新打开同一个流
+        if self.current_mode != "Single Video" or not is_stream(self.media_path):
+            return
+        self.media = None
+        self.load_video(self.media_path)
+        self.toggle_play()
+
+    def show_reconnecting(self, attempt, delay):
+        self.status_bar.showMessage(f"Stream lost, reconnecting (attempt {attempt}) in {delay / 1000:.0f} s")
 
     def toggle_play(self):
         # 仅针对Single Video，全局控制所有播放器播放或暂停
@@ -478,91 +1592,569 @@ class MultiVideoPlayer(QMainWindow):
             return
 
         if self.is_playing():
-            for player, _ in self.players:
-                player.pause()
+            self.sync_engine.stop()
+            self.dispatcher.run(self.single_players(), "pause")
             self.play_btn.setIcon(QIcon.fromTheme("media-playback-start"))
             self.play_btn.setText("Play")
-            self.timer.stop()
         else:
-            for player, _ in self.players:
-                player.play()
+            players = self.single_players()
+            self.dispatcher.run(players, "play")
+            if len(players) > 1:
+                message = f"Started {len(players)} players, start skew {self.dispatcher.skew_ms:.1f} ms"
+                if self.dispatcher.late:
+                    message += f" ({self.dispatcher.late} still starting)"
+                self.status_bar.showMessage(message, 3000)
+            self.sync_engine.hold(1000)
+            self.sync_engine.start()
             self.play_btn.setIcon(QIcon.fromTheme("media-playback-pause"))
             self.play_btn.setText("Pause")
-            self.timer.start(100)
 
     def stop_all(self):
         if self.current_mode == "Single Video":
-            for player, _ in self.players:
-                player.stop()
+            self.reconnector.reset()
+            self.sync_engine.stop()
+            self.dispatcher.run(self.single_players(), "stop")
             self.play_btn.setIcon(QIcon.fromTheme("media-playback-start"))
-            self.timer.stop()
         else:
             for widget in self.multi_widgets:
                 widget.stop()
         self.status_bar.showMessage("Playback stopped")
 
     def is_playing(self):
-        if self.players:
-            return self.players[0][0].is_playing()
+        players = self.single_players()
+        if players:
+            return players[0].is_playing()
         return False
 
     def slider_pressed_event(self):
+        # 拖动中只有主播放器跟随，纠偏会把其余播放器也拉过去，松开后再恢复
         self.slider_pressed = True
+        self.sync_resume = self.sync_engine.running()
+        self.sync_engine.stop()
 
     def slider_released_event(self):
         self.slider_pressed = False
         self.sync_playback()
+        if self.sync_resume:
+            self.sync_engine.start()
+        self.sync_resume = False
 
-    def seek_video(self, value):
-        if self.slider_pressed:
-            self.sync_playback()
+    def scrub(self, value):
+        # 拖动中只让主播放器做合并后的关键帧跳转，其余播放器等松开后再跳
+        if self.media_available():
+            self.seeker.request(self.single_players()[:1], value / 1000.0)
 
     def sync_playback(self):
+        # 每个播放器只做一次精确跳转
         position = self.progress.value() / 1000.0
-        for player, _ in self.players:
-            player.set_position(position)
+        self.seeker.seek(self.single_players(), position)
+        self.sync_engine.hold(1000)
 
-    def update_ui(self):
-        # 仅用于Single Video：更新时间进度条和标签
+    def worker_restarted(self, player, reason):
+        if self.current_mode == "Single Video":
+            players = self.single_players()
+        else:
+            players = [widget.player for widget in self.multi_widgets]
+        tile = players.index(player) + 1 if player in players else "?"
+        self.status_bar.showMessage(f"Window {tile}: {reason}, restarted ({self.supervisor.restarts} restarts)", 5000)
+
+    def show_seek_latency(self, results):
+        if len(results) < 2:
+            return
+        latencies = [latency for _, latency in results]
+        self.status_bar.showMessage(
+            f"Seek: {len(latencies)} players, avg {sum(latencies) / len(latencies):.0f} ms, "
+            f"max {max(latencies):.0f} ms", 3000)
+
+    def show_drift(self, drift):
+        # 在状态栏显示各窗口相对主播放器的偏移（毫秒）
+        text = "Drift: " + " ".join(f"{offset:+d}" for offset in drift[1:]) + " ms"
+        if text != self.drift_label.text():
+            self.drift_label.setText(text)
+
+    def update_ui(self, position, time_ms):
+        # 仅用于Single Video：由全局时钟在主播放器进度变化时回调，只刷新变化的控件
         if self.current_mode != "Single Video":
             return
-        if not self.slider_pressed and self.players:
-            positions = []
-            for player, _ in self.players:
-                pos = player.get_position()
-                if pos != -1:
-                    positions.append(pos)
-            if positions:
-                avg_position = sum(positions) / len(positions)
-                self.progress.setValue(int(avg_position * 1000))
-
-        if self.players and self.media_available():
-            total_time = self.players[0][0].get_length() // 1000  # 单位秒
-            current_time = self.players[0][0].get_time() // 1000
-            total_time_str = self.format_time(total_time)
-            current_time_str = self.format_time(current_time)
-            self.time_label.setText(f"{current_time_str} / {total_time_str}")
-
-    def format_time(self, seconds):
+        if not self.slider_pressed and position >= 0:
+            value = int(position * 1000)
+            if value != self.progress.value():
+                self.progress.setValue(value)
+        if self.reconnector.attempts and time_ms > 0:
+            self.reconnector.reset()  # 重连成功，退避延迟复位
+        if time_ms > 0 and "first frame" not in self.startup_times:
+            # 启动后第一次播放出画面
+            self.report_startup("first frame", (time.monotonic() - STARTED) * 1000)
+
+        if self.players and self.media_available() and time_ms >= 0 and time_ms != self.shown_time:
+            # 只在显示的时间变化时更新标签，时长使用缓存的文字
+            self.shown_time = time_ms
+            self.time_label.setText(f"{time_text(time_ms, self.fps)} / {self.duration_text}")
+
+    def watch_duration(self, path):
+        # 媒体的 EventManager 与媒体一起保存，换媒体时先解除旧媒体的订阅
+        if self.media_events is not None:
+            self.media_events.detach_all()
+        self.media_events = EventDispatcher(self.media)
+        self.media_events.attach(vlc.EventType.MediaDurationChanged, self._duration_changed, path)
+
+    def _duration_changed(self, event, path):
+        self.duration_changed.emit(path, event.u.new_duration)
+
+    def set_duration(self, path, duration_ms):
+        # 时长来自探测缓存或 libvlc 的 MediaDurationChanged，每个媒体只格式化一次
+        if path != self.media_path or duration_ms == self.duration_ms:
+            return
+        self.duration_ms = duration_ms
+        self.duration_text = format_timecode(duration_ms) if duration_ms > 0 else "--:--:--.---"
+        self.time_label.setText(f"{time_text(max(0, self.shown_time), self.fps)} / {self.duration_text}")
+
+    def media_probed(self, path, info):
+        if path != self.media_path or not info:
+            return
+        self.fps = info.get("fps")
+        self.set_duration(path, info.get("duration_ms", 0))
+        self.status_bar.showMessage(f"Playing: {os.path.basename(path)}  {describe(info)}")
+        self.progress.set_media(self.duration_ms)
+        self.thumbnails.request(path, self.duration_ms)
+
+    def go_to_time(self):
+        players = self.single_players()
+        if not self.media_available() or not players:
+            return
+        try:
+            target = parse_timecode(self.goto_edit.text(), self.fps)
+        except ValueError as e:
+            self.status_bar.showMessage(f"Go to: {e}")
+            return
+        self.seek_to_time(target)
+        self.goto_edit.clear()
+
+    def seek_to_time(self, target):
+        players = self.single_players()
+        if self.duration_ms > 0:
+            # 经跳转调度精确跳转，所有窗口一起跳并记录延迟
+            self.seeker.seek(players, min(target, self.duration_ms - 1) / self.duration_ms)
+        else:
+            for player in players:
+                player.set_time(target)
+
+    def step_frame(self):
+        # 所有窗口同步逐帧前进：播放中先全部暂停并对齐到主播放器的时间，之后每次各前进一帧
+        players = self.single_players()
+        if not self.media_available() or not players:
+            return
+        if self.is_playing():
+            self.toggle_play()
+            master_time = players[0].get_time()
+            for player in players[1:]:
+                player.set_time(master_time)
+        for player in players:
+            player.next_frame()
+
+    def thumbnails_ready(self, path, index):
+        if path == self.media_path:
+            self.progress.set_media(index.duration_ms, index)
+
+    def stat_tiles(self):
+        # 参与统计的窗口：Single Video按播放器（共享解码只有一个），Multi Video按已加载媒体的控件
+        if self.current_mode == "Single Video":
+            tiles = [(str(index + 1), player) for index, player in enumerate(self.single_players())]
+        else:
+            tiles = [(str(index + 1), widget.player) for index, widget in enumerate(self.multi_widgets)
+                     if widget.player is not None]
+        return [(name, player, self.pool.media_of(player)) for name, player in tiles
+                if self.pool.media_of(player) is not None]
+
+    def governor_tiles(self):
+        # 自适应质量调节的对象：(窗口名, player, 显示控件, 是否焦点)
+        if self.current_mode == "Multi Video":
+            return [(str(index + 1), widget.player, widget.video_frame, index == self.focus_index)
+                    for index, widget in enumerate(self.multi_widgets) if widget.player is not None]
+        if self.frame_buffer is not None:
+            # 共享解码只有一个解码器，总是包含焦点窗口，只在整个视频区域不可见时暂停
+            return [("1", self.frame_buffer.player, self.video_container, True)]
+        # 主播放器的媒体绑定着主窗口的时长和事件订阅，重新打开会让它们失效：与焦点窗口一样保持原始质量
+        return [(str(index + 1), player, frame, index in (0, self.focus_index))
+                for index, (player, frame) in enumerate(self.players) if player is not None]
+
+    def tile_widgets(self):
+        if self.current_mode == "Single Video":
+            return [frame for _, frame in self.players]
+        return self.multi_widgets
+
+    def eventFilter(self, obj, event):
+        # 鼠标进入或点击窗口时将其设为焦点窗口
+        if event.type() in (QEvent.Enter, QEvent.MouseButtonPress):
+            widgets = self.tile_widgets()
+            if obj in widgets:
+                self.set_focus_tile(widgets.index(obj))
+        return super().eventFilter(obj, event)
+
+    def set_focus_tile(self, index):
+        if index == self.focus_index:
+            return
+        self.focus_index = index
+        self.update_audio_focus()
+
+    def update_audio_focus(self):
+        # Single Video下所有窗口播放同一音频，固定由第一个播放器输出
+        if self.current_mode == "Single Video":
+            players = self.single_players()
+            focus = players[0] if players else None
+        else:
+            players = [widget.player for widget in self.multi_widgets if widget.player is not None]
+            focus = self.multi_widgets[self.focus_index].player if self.focus_index < len(self.multi_widgets) else None
+            # 高亮焦点窗口
+            for index, widget in enumerate(self.multi_widgets):
+                color = "#0078ff" if index == self.focus_index else "#444"
+                widget.video_frame.setStyleSheet(f"background-color: black; border: 2px solid {color};")
+        self.audio_focus.set_players(players, focus)
+
+    def show_memory(self, rows):
+        # 与统计采集同频：状态栏显示当前用量和预算，tooltip 中列出每个窗口的占用
+        used = self.memory.refresh()
+        budget = self.memory.budget_mb
+        text = f"Mem {used:.0f}/{budget} MB" if budget else f"Mem {used:.0f} MB"
+        if not self.memory.measured:
+            text += " (est.)"
+        if text != self.memory_label.text():
+            self.memory_label.setText(text)
+        over = budget and self.memory.projected() > budget
+        self.memory_label.setStyleSheet("color: #ff9800;" if over else "")
+        lines = [f"Next window: +{self.memory.tile_mb:.0f} MB, projected {self.memory.projected():.0f} MB"]
+        for name, player, _ in self.stat_tiles():
+            tile = self.memory.tiles.get(player)
+            if tile is not None:
+                lines.append(f"#{name}: {tile[0]:.0f} MB ({'measured' if tile[1] else 'estimated'}"
+                             f"{', reduced quality' if tile[2] else ''})")
+        self.memory_label.setToolTip("\n".join(lines))
+
+    def show_memory_decision(self, text):
+        self.status_bar.showMessage(text, 10000)
+
+    def show_quality_level(self, name, level):
+        levels = ["full quality", "reduced quality", "low quality"]
+        self.status_bar.showMessage(f"Window {name}: {levels[level]}")
+
+    def governor_paused(self, player, paused):
+        # 不可见的窗口被暂停或恢复：同步对应的播放按钮
+        text = "Play" if paused else "Pause"
+        if self.current_mode == "Multi Video":
+            for widget in self.multi_widgets:
+                if widget.player is player:
+                    widget.play_btn.setText(text)
+        elif self.single_players()[:1] == [player]:
+            # Single Video的按钮跟随主播放器
+            self.play_btn.setIcon(QIcon.fromTheme("media-playback-start" if paused else "media-playback-pause"))
+            self.play_btn.setText(text)
+
+    def set_stats_overlay(self, enabled):
+        self.stats_overlay = enabled
+        for widget in self.multi_widgets:
+            widget.set_stats_overlay(enabled)
+        if not enabled:
+            for player in self.single_players():
+                hide_overlay(player)
+
+    def show_stats(self, rows):
+        # 状态栏显示汇总，tooltip 中列出每个窗口的明细
+        if rows:
+            fps = sum(row["fps"] for row in rows)
+            lost = sum(row["lost_pictures"] for row in rows)
+            kbps = sum(row["input_kbps"] for row in rows)
+            text = f"{len(rows)} decoding  {fps:.0f} fps  lost {lost}  in {kbps:.0f} kb/s"
+        else:
+            text = ""
+        if text != self.stats_label.text():
+            self.stats_label.setText(text)
+            self.stats_label.setToolTip("\n".join(f"#{row['tile']}: {overlay_text(row)}" for row in rows))
+        # 画面叠加：Single Video由全局开关控制，Multi Video由每个控件自己的开关控制
+        tiles = {name: player for name, player, _ in self.stat_tiles()}
+        for row in rows:
+            player = tiles.get(row["tile"])
+            if player is None:
+                continue
+            if self.current_mode == "Single Video":
+                enabled = self.stats_overlay
+            else:
+                enabled = self.multi_widgets[int(row["tile"]) - 1].stats_overlay
+            if enabled:
+                show_overlay(player, overlay_text(row))
+
+    @staticmethod
+    def format_time(seconds):
         hours = seconds // 3600
         minutes = (seconds % 3600) // 60
         secs = seconds % 60
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
-    def closeEvent(self, event):
-        # 关闭时释放所有播放器资源
+    def session_state(self):
+        # 当前布局和每个窗口的媒体、位置、倍速、音量
+        state = {"mode": self.current_mode, "layout": self.current_layout,
+                 "window_count": self.current_window_count,
+                 "shared_decode": self.shared_decode, "mosaic": self.mosaic}
         if self.current_mode == "Single Video":
-            for player, _ in self.players:
-                player.stop()
-                player.release()
+            if self.media_available() and self.players:
+                player = self.single_players()[0]
+                state["single"] = {"path": self.media_path, "position_ms": max(0, player.get_time()),
+                                   "rate": float(self.speed_combo.currentText()),
+                                   "volume": player.audio_get_volume(),
+                                   "muted": player.audio_get_mute() == 1,
+                                   "playing": self.is_playing(), "options": self.media_options}
         else:
-            for widget in self.multi_widgets:
-                widget.player.stop()
-                widget.player.release()
+            state["tiles"] = [widget.session_state() for widget in self.multi_widgets]
+        return state
+
+    def restore_session(self, session):
+        # 恢复布局后所有窗口同时打开媒体（libvlc 各自在输入线程中打开），
+        # 开始播放后各自跳转到保存的位置（见 StartPositions）
+        playlists, self.playlists = self.playlists, {}  # 避免切换模式时先按旧播放列表加载一次
+        self.shared_check.setChecked(session.get("shared_decode", False))
+        self.mosaic_check.setChecked(session.get("mosaic", False))
+        layout = session.get("layout")
+        if layout not in self.layouts:
+            layout = str(session.get("window_count", self.current_window_count))
+        self.window_combo.setCurrentText(layout)
+        self.mode_combo.setCurrentText(session["mode"])
+        self.playlists = playlists
+        single = session.get("single")
+        if self.current_mode == "Single Video" and single and single.get("path"):
+            self.speed_combo.setCurrentText(str(single.get("rate", 1.0)))
+            paused = not single.get("playing", True)
+            self.media_options = list(single.get("options", []))
+            self.load_video(single["path"], single.get("position_ms", 0), paused)
+            self.toggle_play()
+            for player in self.single_players():
+                player.audio_set_volume(single.get("volume", 100))
+                player.audio_set_mute(single.get("muted", False))
+            if paused:
+                self.sync_engine.stop()
+                self.play_btn.setText("Play")
+            self.status_bar.showMessage(f"Playing: {os.path.basename(single['path'])}")
+        elif self.current_mode == "Multi Video":
+            for widget, state in zip(self.multi_widgets, session.get("tiles", [])):
+                widget.restore_state(state)
+        self.restore_players = [player for _, player, media in self.stat_tiles()]
+        if self.restore_players:
+            self.restore_timer.start()
+
+    def check_restored(self):
+        # 所有恢复的播放器都开始播放（或按会话停在第一帧）后统计冷启动耗时
+        elapsed = (time.monotonic() - STARTED) * 1000
+        waiting = [player for player in self.restore_players
+                   if player.get_state() not in (vlc.State.Playing, vlc.State.Paused,
+                                                 vlc.State.Ended, vlc.State.Error)]
+        if waiting and elapsed < self.restore_target_ms * 10:
+            return
+        self.restore_timer.stop()
+        count = len(self.restore_players) - len(waiting)
+        self.restore_players = []
+        text = f"Session restored: {count} players started in {elapsed:.0f} ms"
+        if elapsed > self.restore_target_ms:
+            text += f" (target {self.restore_target_ms} ms)"
+            print(text)
+        self.status_bar.showMessage(text, 10000)
+
+    def window_shown(self):
+        self.report_startup("window", (time.monotonic() - STARTED) * 1000)
+
+    def libvlc_ready(self, ok, elapsed_ms):
+        # libvlc 初始化在后台进行，记录的是初始化本身的耗时，不计入窗口显示时间
+        if ok:
+            self.report_startup("libvlc", elapsed_ms)
+            return
+        # 初始化失败：所有打开媒体和创建播放器的入口都不可用，提示一直显示
+        self.libvlc_failed = True
+        for widget in (self.open_btn, self.stream_btn, self.mode_combo):
+            widget.setEnabled(False)
+        text = f"libvlc could not be initialised ({self.vlc_loader.error}), check the VLC installation"
+        print(text)
+        # 状态栏消息会被后续消息覆盖，另外放一个常驻的标签
+        label = QLabel("libvlc not available")
+        label.setToolTip(text)
+        label.setStyleSheet("color: #e05050;")
+        self.status_bar.addPermanentWidget(label)
+        self.status_bar.showMessage(text)
+
+    def report_startup(self, stage, elapsed_ms):
+        # 启动耗时报告：导入、窗口显示、libvlc 初始化、第一帧（均从进程启动算起，libvlc 除外）
+        self.startup_times[stage] = elapsed_ms
+        text = "Startup: " + ", ".join(f"{name} {value:.0f} ms" for name, value in self.startup_times.items())
+        print(text)
+        self.status_bar.showMessage(text, 10000)
+
+    def run_commands(self, commands):
+        # 控制接口：先按顺序检查整批命令（批内切换模式或布局后的窗口数也计算在内），
+        # 全部有效才依次执行，任何一条有误时整批都不执行
+        mode, count = self.current_mode, self.current_window_count
+        for index, command in enumerate(commands):
+            try:
+                mode, count = self.check_command(command, mode, count)
+            except ValueError as e:
+                raise ValueError(f"command {index + 1}: {e}") from None
+        return [self.apply_command(command) for command in commands]
+
+    def check_command(self, command, mode, count):
+        # 返回执行这条命令之后的 (模式, 窗口数)
+        name = command.get("cmd")
+        if name not in CONTROL_COMMANDS:
+            raise ValueError(f"unknown command {name!r}, expected one of {', '.join(CONTROL_COMMANDS)}")
+        if name == "mode":
+            if command.get("mode") not in ("Single Video", "Multi Video"):
+                raise ValueError("'mode' must be 'Single Video' or 'Multi Video'")
+            if self.libvlc_failed and command["mode"] == "Multi Video":
+                raise ValueError("libvlc could not be initialised, no players can be created")
+            return command["mode"], count
+        if name == "layout":
+            layout = str(command.get("layout"))
+            if layout not in self.layouts:
+                raise ValueError(f"unknown layout {layout!r}, expected one of {', '.join(self.layouts)}")
+            return mode, len(compute_layout(self.layouts[layout]))
+        if name in ("state", "stats"):
+            return mode, count
+        tile = command.get("tile")
+        if mode == "Multi Video":
+            if not isinstance(tile, int) or not 1 <= tile <= count:
+                raise ValueError(f"'tile' must be 1 to {count} in Multi Video mode")
+        elif tile is not None:
+            raise ValueError("Single Video mode controls all windows together, leave out 'tile'")
+        if name == "open" and not (isinstance(command.get("path"), str) and command["path"]):
+            raise ValueError("'open' needs a 'path' (file or stream URL)")
+        if self.libvlc_failed and name == "open":
+            raise ValueError("libvlc could not be initialised, no media can be opened")
+        if name == "seek":
+            if "time" in command:
+                self.command_time(command, tile)
+            elif not isinstance(command.get("position"), (int, float)) or not 0 <= command["position"] <= 1:
+                raise ValueError("'seek' needs 'time' (milliseconds or [[hh:]mm:]ss[.mmm]) or 'position' (0 to 1)")
+        if name == "rate":
+            speeds = [self.speed_combo.itemText(i) for i in range(self.speed_combo.count())]
+            if not isinstance(command.get("rate"), (int, float)) or str(float(command["rate"])) not in speeds:
+                raise ValueError(f"'rate' must be one of {', '.join(speeds)}")
+        if name == "volume":
+            if not isinstance(command.get("volume"), int) or not 0 <= command["volume"] <= 100:
+                raise ValueError("'volume' must be an integer from 0 to 100")
+        return mode, count
+
+    def command_time(self, command, tile):
+        # 数字为毫秒，字符串按 Go to 框的格式解析（#帧号需要已知帧率）
+        value = command["time"]
+        if isinstance(value, (int, float)) and math.isfinite(value) and value >= 0:
+            return int(value)
+        if isinstance(value, str):
+            fps = self.multi_widgets[tile - 1].info.get("fps") \
+                if tile is not None and tile <= len(self.multi_widgets) else self.fps
+            return parse_timecode(value, fps)
+        raise ValueError("'time' must be milliseconds or [[hh:]mm:]ss[.mmm]")
+
+    def apply_command(self, command):
+        # 执行一条已检查过的命令；读取类命令返回数据，其余返回 None
+        name = command["cmd"]
+        if name == "mode":
+            self.mode_combo.setCurrentText(command["mode"])
+        elif name == "layout":
+            self.window_combo.setCurrentText(str(command["layout"]))
+        elif name == "state":
+            return self.session_state()
+        elif name == "stats":
+            return {"tiles": self.stats.rows, "memory_mb": round(self.memory.used_mb, 1),
+                    "memory_budget_mb": self.memory.budget_mb,
+                    "control_latency_ms": [list(item) for item in self.control.latency] if self.control else []}
+        elif self.current_mode == "Multi Video":
+            self.apply_tile_command(self.multi_widgets[command["tile"] - 1], command)
+        elif name == "open":
+            self.play_file(command["path"])
+        elif name in ("play", "pause"):
+            if self.media_available() and self.is_playing() != (name == "play"):
+                self.toggle_play()
+        elif name == "stop":
+            self.stop_all()
+        elif name == "seek" and not self.media_available():
+            pass
+        elif name == "seek" and "time" in command:
+            self.seek_to_time(self.command_time(command, None))
+        elif name == "seek":
+            self.seeker.seek(self.single_players(), float(command["position"]))
+        elif name == "rate":
+            self.speed_combo.setCurrentText(str(float(command["rate"])))
+        elif name == "volume":
+            for player in self.single_players():
+                player.audio_set_volume(command["volume"])
+        return None
+
+    def apply_tile_command(self, widget, command):
+        name = command["cmd"]
+        if name == "open":
+            widget.set_playlist(None)
+            widget.load_file(command["path"])
+        elif name in ("play", "pause"):
+            if widget.path is not None and widget.player.is_playing() != (name == "play"):
+                widget.toggle_play()
+        elif name == "stop":
+            widget.stop()
+        elif name == "seek" and widget.path is None:
+            pass
+        elif name == "seek" and "time" in command:
+            widget.seek_to_time(self.command_time(command, command["tile"]))
+        elif name == "seek":
+            widget.seeker.seek([widget.player], float(command["position"]))
+        elif name == "rate":
+            widget.speed_combo.setCurrentText(str(float(command["rate"])))
+        elif name == "volume":
+            widget.volume.setValue(command["volume"])
+
+    def closeEvent(self, event):
+        # 关闭时释放所有播放器资源（包括池中空闲的播放器）
+        self.session = self.session_state()  # 先记录状态，播放器释放后就读不到位置了
+        self.clock.detach_all()
+        self.sync_engine.stop()
+        self.stats.stop()
+        self.prober.shutdown()
+        self.thumbnails.shutdown()
+        for helper in self.helpers:
+            helper.close()
+        self.stop_recording(wait=True)
+        self.capture.shutdown()  # 写完排队的截图，之后才能释放播放器
+        self.dispatcher.shutdown()
+        for index, widget in enumerate(self.multi_widgets):
+            self.release_widget(index, widget)
+        self.multi_widgets.clear()
+        self.session["playlists"] = self.playlists
+        try:
+            save_session(self.session_path, self.session)
+        except OSError as e:
+            print(f"Failed to save session: {e}")
+        if self.exporter is not None:
+            self.exporter.close()
+        if self.control is not None:
+            self.control.close()
+        self.pool.clear()  # 进程隔离时同时结束所有子进程
+        if self.profiler is not None:
+            self.profiler.dump()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # 无界面基准测试：python play.py --bench [--bench-out bench.json] ...
+    if "--bench" in sys.argv:
+        from bench import main
+        sys.exit(main([arg for arg in sys.argv[1:] if arg != "--bench"]))
+
+    parser = argparse.ArgumentParser(description="Multi-Window Video Player")
+    parser.add_argument("--metrics-file", help="append per-window stats to a .jsonl or .csv file")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--decode-profile", choices=list(PROFILES),
+                        help="decode profile (default: 'profile' in the [decode] section of play.conf)")
+    parser.add_argument("--session", metavar="FILE",
+                        help="restore the layout and every window from FILE at startup and save it there on exit")
+    parser.add_argument("--control-port", type=int, metavar="PORT",
+                        help="accept JSON commands on 127.0.0.1:PORT (0 picks a free port)")
+    parser.add_argument("--profile", metavar="FILE", default=os.environ.get(PROFILE_ENV),
+                        help=f"time slots, libvlc calls and event-loop lag, write a Chrome trace to FILE on exit "
+                             f"(or set {PROFILE_ENV}=FILE)")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')  # 使用Fusion风格，看起来更现代
     
     # 设置默认字体
@@ -570,19 +2162,18 @@ if __name__ == "__main__":
     font.setFamily("Segoe UI")  # Windows
     font.setPointSize(10)
     app.setFont(font)
+
+    # 剖析：在创建窗口之前给槽函数和 libvlc 调用加上计时包装，不开启时没有任何开销
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile)
+        profiler.instrument(MultiVideoPlayer, "slot")
+        profiler.instrument(VideoPlayerWidget, "slot")
+        for cls in (vlc.Instance, vlc.MediaPlayer, vlc.Media, RemotePlayer):
+            profiler.instrument(cls, "libvlc")
     
-    player = MultiVideoPlayer()
+    player = MultiVideoPlayer(decode=DecodeSettings(CONFIG, args.decode_profile),
+                              metrics_file=args.metrics_file, metrics_port=args.metrics_port,
+                              session=args.session, profiler=profiler, control_port=args.control_port)
     player.show()
     sys.exit(app.exec_())
-
-# 读取配置文件
-config = configparser.ConfigParser()
-config.read('play.conf')
-try:
-    vlc_path = config.get('DEFAULT', 'vlc_path')
-except (configparser.NoSectionError, configparser.NoOptionError):
-    print("未能从配置文件中读取 vlc_path，使用默认值或请检查配置文件。")
-    # 可以在这里设置默认值
-    vlc_path = r'C:\Program Files\VideoLAN\VLC'
-
-os.add_dll_directory(vlc_path)
@@ -0,0 +1,76 @@
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+
+
+def scan_directory(directory):
+    # 目录中的视频文件，按文件名排序
+    try:
+        names = sorted(os.listdir(directory), key=str.lower)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names
+            if name.lower().endswith(VIDEO_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))]
+
+
+# --- 单个窗口的播放列表：文件队列或监视的目录，播放到末尾后循环 ---
+class Playlist(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, items=(), directory=None, loop=True, index=0, parent=None):
+        super().__init__(parent)
+        self.items = list(items)
+        self.directory = directory
+        self.loop = loop
+        self.index = index
+        self.watcher = None
+        if directory:
+            # 目录内容变化时重新扫描，当前播放的文件保持不变
+            self.watcher = QFileSystemWatcher([directory], self)
+            self.watcher.directoryChanged.connect(self.rescan)
+            self.items = scan_directory(directory)
+        if not 0 <= self.index < len(self.items):
+            self.index = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def current(self):
+        return self.items[self.index] if self.items else None
+
+    def next_index(self):
+        if self.index + 1 < len(self.items):
+            return self.index + 1
+        return 0 if self.loop and self.items else None
+
+    def peek(self):
+        # 下一个要播放的文件（用于预加载），没有时返回 None
+        index = self.next_index()
+        return None if index is None else self.items[index]
+
+    def advance(self):
+        index = self.next_index()
+        if index is None:
+            return None
+        self.index = index
+        return self.items[index]
+
+    def rescan(self):
+        current = self.current()
+        self.items = scan_directory(self.directory)
+        self.index = self.items.index(current) if current in self.items else 0
+        self.changed.emit()
+
+    def to_dict(self):
+        data = {"loop": self.loop, "index": self.index}
+        if self.directory:
+            data["directory"] = self.directory
+        else:
+            data["items"] = self.items
+        return data
+
+    @classmethod
+    def from_dict(cls, data, parent=None):
+        return cls(data.get("items", ()), data.get("directory"), data.get("loop", True),
+                   data.get("index", 0), parent)
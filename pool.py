@@ -0,0 +1,205 @@
+import time
+import threading
+from collections import OrderedDict
+import vlc
+from layout import MAX_TILES
+from audio import first_audio_track
+
+
+# --- 后台初始化 libvlc：vlc.Instance() 首次运行要扫描插件缓存，放到线程中，窗口可以先显示 ---
+class InstanceLoader:
+    def __init__(self, args, done=None):
+        self.args = list(args)
+        self.done = done          # 初始化结束后在后台线程中调用，参数为 (是否成功, 耗时毫秒)
+        self.instance = None
+        self.error = None         # 初始化失败的原因
+        self.elapsed_ms = None
+        self.thread = threading.Thread(target=self.load, name="libvlc-init", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        start = time.monotonic()
+        try:
+            self.instance = vlc.Instance(*self.args)
+            if self.instance is None:
+                self.error = "libvlc_new failed, check the libvlc arguments in play.conf"
+        except Exception as e:
+            # 找不到 libvlc 动态库时 python-vlc 抛出 NameError 等异常
+            self.error = f"{type(e).__name__}: {e}"
+        self.elapsed_ms = (time.monotonic() - start) * 1000
+        if self.done is not None:
+            self.done(self.instance is not None, self.elapsed_ms)
+
+    def get(self):
+        # 第一次真正需要实例时才等待初始化完成
+        self.thread.join()
+        if self.instance is None:
+            raise RuntimeError(f"libvlc could not be initialised ({self.error}), check the VLC installation")
+        return self.instance
+
+
+# --- 事件分发：每个播放器（或媒体）只取一次 EventManager 并一直持有，libvlc 回调的包装对象不会被回收；
+#     libvlc 每种事件只能注册一个回调，这里每种事件只注册一次，再分发给所有订阅者 ---
+class EventDispatcher:
+    def __init__(self, source):
+        self.manager = source.event_manager()
+        self.lock = threading.Lock()
+        self.handlers = {}  # 事件类型 -> {callback: args}，同一个回调重复订阅时只替换参数
+
+    def attach(self, event_type, callback, *args):
+        with self.lock:
+            handlers = self.handlers.setdefault(event_type, {})
+            first = not handlers
+            handlers[callback] = args
+        if first:
+            self.manager.event_attach(event_type, self.dispatch, event_type)
+
+    def detach(self, event_type, callback):
+        with self.lock:
+            handlers = self.handlers.get(event_type)
+            if handlers is None or handlers.pop(callback, None) is None:
+                return
+            last = not handlers
+            if last:
+                del self.handlers[event_type]
+        if last:
+            self.manager.event_detach(event_type)
+
+    def detach_all(self):
+        with self.lock:
+            event_types = list(self.handlers)
+            self.handlers.clear()
+        for event_type in event_types:
+            self.manager.event_detach(event_type)
+
+    def dispatch(self, event, event_type):
+        # 运行在 libvlc 线程中
+        with self.lock:
+            handlers = list(self.handlers.get(event_type, {}).items())
+        for callback, args in handlers:
+            callback(event, *args)
+
+
+# --- 播放器池：绑定共享的 vlc.Instance，复用已创建的播放器，空闲数超过上限时按 LRU 释放 ---
+class PlayerPool:
+    def __init__(self, vlc_instance, capacity=MAX_TILES, per_tile_args=None, muted_options=(), supervisor=None):
+        self.instance = vlc_instance  # vlc.Instance，或者尚未完成的 InstanceLoader
+        # 不为 None 时每个播放器使用以这些参数创建的独立 vlc.Instance
+        self.per_tile_args = per_tile_args
+        # 不为 None 时每个播放器运行在由它监督的子进程中
+        self.supervisor = supervisor
+        self.muted_options = list(muted_options)  # 静音窗口的媒体附加的选项
+        self.capacity = capacity      # 使用中 + 空闲播放器的总数上限（超出时只释放空闲的）
+        self.in_use = set()
+        self.idle = OrderedDict()     # 按归还顺序排列，最早归还的最先被释放
+        # 播放器当前的媒体；player.get_media() 每次都会增加引用计数并返回新的包装对象，不宜频繁调用
+        self.media = {}
+        self.options = {}      # 媒体 -> 创建时的选项，重新打开（例如调整解码质量）时沿用
+        self.dispatchers = {}  # player -> EventDispatcher，与播放器同生命周期
+        self.created = 0
+        self.released = 0
+
+    def acquire(self):
+        # 优先复用最近归还的播放器，其次新建
+        if self.idle:
+            player, _ = self.idle.popitem(last=True)
+        elif self.supervisor is not None:
+            player = self.supervisor.spawn()
+            self.created += 1
+        elif self.per_tile_args is not None:
+            player = vlc.Instance(*self.per_tile_args).media_player_new()
+            self.created += 1
+        else:
+            player = self.get_instance().media_player_new()
+            self.created += 1
+        self.in_use.add(player)
+        return player
+
+    def get_instance(self):
+        # 后台初始化的实例在第一次创建播放器或媒体时才取用（可能需要等待），可在任意线程调用
+        if isinstance(self.instance, InstanceLoader):
+            self.instance = self.instance.get()
+        return self.instance
+
+    def media_new(self, player, mrl, *options, muted=False):
+        # 媒体必须由播放器所属的实例创建（独立实例模式下每个播放器的实例不同）
+        instance = player.get_instance() or self.get_instance()
+        if muted:
+            options = options + tuple(self.muted_options)
+        media = instance.media_new(mrl, *options)
+        self.options[media] = options
+        return media
+
+    def set_media(self, player, media):
+        player.set_media(media)
+        old = self.media.pop(player, None)
+        if old is not None and old is not media:
+            self.options.pop(old, None)
+        if media is not None:
+            self.media[player] = media
+
+    def media_of(self, player):
+        return self.media.get(player)
+
+    def options_of(self, player):
+        # 播放器当前媒体创建时的选项（包括静音窗口附加的选项）
+        return list(self.options.get(self.media.get(player), ()))
+
+    def events(self, player):
+        # 所有组件都通过这里订阅播放器事件，不要直接调用 player.event_manager()
+        dispatcher = self.dispatchers.get(player)
+        if dispatcher is None:
+            dispatcher = self.dispatchers[player] = EventDispatcher(player)
+        return dispatcher
+
+    def release(self, player):
+        # 停止并归还到空闲列表，超出容量时释放最久未用的播放器
+        if player not in self.in_use:
+            return
+        self.in_use.discard(player)
+        if player.audio_get_track() == -1:
+            # 关闭了音轨的播放器（见 AudioFocus）：停止前恢复，复用时与新建的播放器一样有声音
+            player.audio_set_mute(True)
+            track = first_audio_track(player)
+            if track is not None:
+                player.audio_set_track(track)
+        player.stop()
+        if player in self.dispatchers:
+            self.dispatchers[player].detach_all()  # 复用时不能再回调到之前的订阅者
+        self.set_media(player, None)
+        player.set_rate(1.0)
+        player.audio_set_mute(False)
+        player.audio_set_volume(100)  # libvlc 的默认音量
+        player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 0)  # 复位叠加文字
+        self.idle[player] = True
+        self.evict()
+
+    def discard(self, player):
+        # 带有视频回调等不可复用状态的播放器直接释放
+        self.in_use.discard(player)
+        self.idle.pop(player, None)
+        self.options.pop(self.media.pop(player, None), None)
+        player.stop()
+        self.free(player)
+
+    def free(self, player):
+        dispatcher = self.dispatchers.pop(player, None)
+        if dispatcher is not None:
+            dispatcher.detach_all()
+        instance = player.get_instance()
+        player.release()
+        if self.per_tile_args is not None and instance is not None and instance is not self.instance:
+            instance.release()
+        self.released += 1
+
+    def evict(self):
+        while self.idle and len(self.in_use) + len(self.idle) > self.capacity:
+            player, _ = self.idle.popitem(last=False)
+            self.free(player)
+
+    def clear(self):
+        for player in list(self.in_use):
+            self.discard(player)
+        while self.idle:
+            player, _ = self.idle.popitem(last=False)
+            self.free(player)
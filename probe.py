@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import ctypes
+import tempfile
+import threading
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from concurrent.futures import ThreadPoolExecutor
+import vlc
+from PyQt5.QtCore import QObject, pyqtSignal
+
+TRACK_TYPES = {0: "audio", 1: "video", 2: "subtitle"}
+
+
+def fourcc(codec):
+    return codec.to_bytes(4, "little").decode("ascii", "replace").strip()
+
+
+def local_path(mrl):
+    # file:// 形式的 MRL 转换为本地路径，其他协议返回 None
+    if mrl.startswith("file://"):
+        return url2pathname(urlparse(mrl).path)
+    return None if "://" in mrl else mrl
+
+
+def cache_key(path):
+    # 只缓存本地文件：路径 + 修改时间 + 大小，文件变化后自动失效
+    path = local_path(path)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def read_tracks(media):
+    # 直接调用 libvlc，读取完毕后释放轨道数组（vlc.Media.tracks_get 不会释放）
+    tracks_pp = ctypes.POINTER(ctypes.POINTER(vlc.MediaTrack))()
+    count = vlc.libvlc_media_tracks_get(media, ctypes.byref(tracks_pp))
+    tracks = []
+    try:
+        for i in range(count):
+            track = tracks_pp[i].contents
+            info = {"type": TRACK_TYPES.get(track.type.value, "unknown"),
+                    "id": track.id, "codec": fourcc(track.codec), "bitrate": track.bitrate}
+            if track.language:
+                info["language"] = track.language.decode("utf-8", "replace")
+            if info["type"] == "video" and track.video:
+                video = track.video.contents
+                info.update(width=video.width, height=video.height)
+                if video.frame_rate_den:
+                    info["fps"] = round(video.frame_rate_num / video.frame_rate_den, 3)
+            elif info["type"] == "audio" and track.audio:
+                audio = track.audio.contents
+                info.update(channels=audio.channels, rate=audio.rate)
+            tracks.append(info)
+    finally:
+        if count:
+            vlc.libvlc_media_tracks_release(tracks_pp, count)
+    return tracks
+
+
+def summarize(duration_ms, tracks):
+    info = {"duration_ms": duration_ms, "tracks": tracks}
+    video = next((t for t in tracks if t["type"] == "video"), None)
+    audio = next((t for t in tracks if t["type"] == "audio"), None)
+    if video:
+        info.update(width=video.get("width"), height=video.get("height"),
+                    video_codec=video["codec"], fps=video.get("fps"))
+    if audio:
+        info["audio_codec"] = audio["codec"]
+    return info
+
+
+def parse_media(instance, path, timeout):
+    # 解析媒体并返回元数据，失败或超时返回空 dict；会阻塞，只在后台线程或辅助子进程中调用
+    info = {}
+    media = instance.media_new(path)
+    try:
+        flags = vlc.MediaParseFlag.local if local_path(path) else vlc.MediaParseFlag.network
+        media.parse_with_options(flags, timeout)
+        deadline = time.monotonic() + timeout / 1000.0 + 1
+        status = media.get_parsed_status()
+        while status not in (vlc.MediaParsedStatus.done, vlc.MediaParsedStatus.failed,
+                             vlc.MediaParsedStatus.timeout, vlc.MediaParsedStatus.skipped):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.02)
+            status = media.get_parsed_status()
+        if status == vlc.MediaParsedStatus.done:
+            info = summarize(media.get_duration(), read_tracks(media))
+    finally:
+        media.release()
+    return info
+
+
+def describe(info):
+    # 状态栏/提示文字中使用的简要描述
+    parts = []
+    if info.get("width"):
+        parts.append(f"{info['width']}x{info['height']}")
+    if info.get("video_codec"):
+        parts.append(info["video_codec"])
+    if info.get("fps"):
+        parts.append(f"{info['fps']:g} fps")
+    if info.get("audio_codec"):
+        parts.append(info["audio_codec"])
+    return " ".join(parts)
+
+
+# --- 媒体元数据磁盘缓存：JSON 文件，按 路径+修改时间+大小 索引 ---
+class MetadataCache:
+    def __init__(self, path, max_entries=2000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # 多个探测线程依次写文件，后写入的一定是较新的内容
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key, info):
+        # 写文件失败时只保留在内存中，返回 False
+        with self.write_lock:
+            with self.lock:
+                self.entries[key] = dict(info, cached_at=time.time())
+                if len(self.entries) > self.max_entries:
+                    # 淘汰最早缓存的条目
+                    oldest = sorted(self.entries, key=lambda k: self.entries[k].get("cached_at", 0))
+                    for old in oldest[:len(self.entries) - self.max_entries]:
+                        del self.entries[old]
+                data = json.dumps(self.entries)
+            # 先写临时文件再替换，避免中途退出损坏缓存；临时文件名唯一，同时运行的其他实例不会写同一个文件
+            tmp = None
+            try:
+                with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(self.path) or ".",
+                                                 prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                                 delete=False) as f:
+                    tmp = f.name
+                    f.write(data)
+                os.replace(tmp, self.path)
+                return True
+            except OSError as e:
+                print(f"Failed to write metadata cache: {e}")
+                if tmp is not None:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+                return False
+
+
+# --- 后台探测：在线程池中解析媒体，结果写入缓存并通过信号回到 GUI 线程 ---
+class MediaProber(QObject):
+    probed = pyqtSignal(str, dict)  # path, 元数据（探测失败时为空 dict）
+
+    def __init__(self, get_instance, cache, workers=2, timeout=5000, parse=None, parent=None):
+        super().__init__(parent)
+        self.get_instance = get_instance  # 返回 vlc.Instance 的函数，实例在后台初始化，探测时才取用
+        # parse(path, timeout) 不为 None 时由它解析（进程隔离模式下在辅助子进程中），不在本进程中调用 libvlc
+        self.parse = parse
+        self.cache = cache
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+
+    def cached(self, path):
+        key = cache_key(path)
+        return self.cache.get(key) if key else None
+
+    def probe(self, path):
+        # 缓存命中时立即发出结果，否则交给后台线程
+        info = self.cached(path)
+        if info is not None:
+            self.probed.emit(path, info)
+            return info
+        self.executor.submit(self._probe, path)
+        return None
+
+    def _probe(self, path):
+        if self.parse is not None:
+            try:
+                info = self.parse(path, self.timeout)
+            except Exception:
+                info = {}  # 辅助子进程中的异常、崩溃或超时都视为探测失败
+        else:
+            info = parse_media(self.get_instance(), path, self.timeout)
+        key = cache_key(path)
+        if info and key:
+            self.cache.put(key, info)
+        self.probed.emit(path, info)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
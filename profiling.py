@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import time
+import random
+import inspect
+import threading
+import functools
+from PyQt5.QtCore import QObject, QTimer
+
+# 开启方式：python play.py --profile trace.json，或设置环境变量 MWVP_PROFILE=trace.json
+PROFILE_ENV = "MWVP_PROFILE"
+LAG_SPAN = "event_loop.lag"
+
+
+def percentile(values, q):
+    # values 已排序
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def thread_group(thread):
+    # 线程池的线程名带序号（dispatch_0、probe_1），同一个池的线程合并统计
+    return re.sub(r"[_-]\d+$", "", thread.name)
+
+
+# 一个 span 的耗时统计：次数、总计和最大值精确累计，分位数来自固定大小的均匀抽样，长时间运行内存不增长
+class Reservoir:
+    def __init__(self, size=4096):
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.values = []
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            # 第 n 个样本以 size/n 的概率替换一个旧样本
+            slot = random.randrange(self.count)
+            if slot < self.size:
+                self.values[slot] = value
+
+
+def public_methods(cls):
+    # 类自身定义的公开方法以及 Qt 事件处理函数（xxxEvent），不包括继承的方法
+    return [name for name, value in vars(cls).items()
+            if inspect.isfunction(value) and (not name.startswith("_") or name.endswith("Event"))]
+
+
+# --- 性能剖析：给槽函数和 libvlc 调用计时，用心跳定时器测量事件循环延迟，输出 Chrome trace ---
+class Profiler(QObject):
+    def __init__(self, path, heartbeat=10, max_events=500000, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.events = []                  # Chrome trace 事件，超过 max_events 后只统计不记录
+        self.max_events = max_events
+        # span 名称 -> Reservoir（毫秒）；其他线程中的 span 名称后加 [线程池名]，不混入 GUI 线程的统计
+        self.samples = {}
+        self.gui_thread = threading.main_thread()
+        self.threads = {}                 # 线程 id -> 线程名
+        self.dumped = False
+        # 心跳：定时器应在 interval 后触发，实际迟到的时间就是事件循环被阻塞的时间
+        self.interval = heartbeat / 1000
+        self.expected = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(heartbeat)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start()
+
+    def beat(self):
+        now = time.perf_counter()
+        if self.expected is not None:
+            lag = max(0.0, now - self.expected)
+            self.record(LAG_SPAN, "event_loop", now - lag, now)
+        self.expected = now + self.interval
+
+    def record(self, name, category, start, end):
+        thread = threading.current_thread()
+        key = name if thread is self.gui_thread else f"{name} [{thread_group(thread)}]"
+        with self.lock:
+            samples = self.samples.get(key)
+            if samples is None:
+                samples = self.samples[key] = Reservoir()
+            samples.add((end - start) * 1000)
+            if len(self.events) < self.max_events:
+                self.threads.setdefault(thread.ident, thread.name)
+                self.events.append({"name": name, "cat": category, "ph": "X", "pid": self.pid,
+                                    "tid": thread.ident, "ts": round((start - self.origin) * 1e6, 1),
+                                    "dur": round((end - start) * 1e6, 1)})
+
+    def wrap(self, function, name, category):
+        # PyQt 按槽函数的参数个数截断信号参数（例如 clicked(bool) 连接到无参数的槽），
+        # 包装后的函数只接受 *args，所以这里按原函数的参数个数做同样的截断
+        code = function.__code__
+        limit = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if limit is not None and len(args) > limit:
+                args = args[:limit]
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, category, start, time.perf_counter())
+        timed.__profiled__ = True
+        return timed
+
+    def instrument(self, cls, category, names=None):
+        # 在创建任何对象之前替换类上的方法，信号连接和 Qt 虚函数调用都会经过计时包装
+        for name in names or public_methods(cls):
+            function = vars(cls).get(name)
+            if inspect.isfunction(function) and not getattr(function, "__profiled__", False):
+                setattr(cls, name, self.wrap(function, f"{cls.__name__}.{name}", category))
+
+    def summary(self):
+        # 按总耗时排序：次数、p50、p99、最大值、总计（毫秒）
+        with self.lock:
+            samples = {name: (sorted(stats.values), stats.count, stats.max, stats.total)
+                       for name, stats in self.samples.items()}
+        rows = [{"name": name, "count": count, "p50_ms": round(percentile(values, 0.5), 3),
+                 "p99_ms": round(percentile(values, 0.99), 3), "max_ms": round(peak, 3),
+                 "total_ms": round(total, 1)} for name, (values, count, peak, total) in samples.items()]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def dump(self):
+        # 关闭窗口时调用一次：写入 trace 文件并打印摘要，trace 可用 chrome://tracing 或 Perfetto 打开
+        if self.dumped:
+            return
+        self.dumped = True
+        self.timer.stop()
+        rows = self.summary()
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        events += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": ident, "args": {"name": name}}
+                   for ident, name in threads.items()]
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                           "otherData": {"summary": rows}}, f)
+        except OSError as e:
+            print(f"Failed to write profile: {e}")
+        print(f"{'span':<60} {'count':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'total ms':>10}")
+        for row in rows:
+            print(f"{row['name'][:60]:<60} {row['count']:>8} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+                  f"{row['max_ms']:>9.3f} {row['total_ms']:>10.1f}")
+        print(f"Profile written to {self.path}")
@@ -0,0 +1,182 @@
+import time
+import inspect
+from collections import deque
+import vlc
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+
+
+# libvlc 4 的 set_position 多一个 b_fast 参数，可以只跳到关键帧；
+# libvlc 3 没有这个参数，跳转精度由 --input-fast-seek（[decode] fast_seek）决定
+FAST_SEEK = len(inspect.signature(vlc.MediaPlayer.set_position).parameters) > 2
+
+
+def fast_seek(player, position):
+    if FAST_SEEK and isinstance(player, vlc.MediaPlayer):
+        player.set_position(position, True)
+    else:
+        player.set_position(position)
+
+
+def frame_ms(player):
+    # 一帧的时长；libvlc 4 去掉了 get_fps，拿不到帧率时按 25fps 算
+    get_fps = getattr(player, "get_fps", None)
+    fps = get_fps() if get_fps is not None else 0
+    return 1000.0 / fps if fps and fps > 0 else 40.0
+
+
+# --- 跳转调度：拖动时按固定间隔发出最新位置并丢弃过时的请求，只做关键帧跳转；松开时每个播放器做一次精确跳转 ---
+class SeekScheduler(QObject):
+    seeked = pyqtSignal(list, object)  # 一次精确跳转完成：[(player, 延迟毫秒), ...], 发起时传入的标记
+
+    def __init__(self, throttle=120, poll=15, timeout=5000, history=20, dispatcher=None, parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher  # 不为 None 时精确跳转由它并行下发到所有播放器
+        self.timeout = timeout / 1000.0
+        self.poll = poll
+        self.pending = {}       # player -> 等待发出的拖动跳转位置，新请求直接覆盖旧请求
+        self.inflight = {}      # player -> (开始时间, 目标毫秒, 跳转前时间, 是否精确)
+        self.batch = []         # 当前精确跳转涉及的播放器
+        self.tag = None         # 当前精确跳转的标记，完成时随 seeked 发出，调用方据此识别自己的跳转
+        self.results = []
+        self.latency = {}       # player -> 最近几次跳转的延迟（毫秒）
+        self.history = history
+        self.throttle = QTimer(self)
+        self.throttle.setInterval(throttle)
+        self.throttle.timeout.connect(self.tick)
+        self.poller = QTimer(self)
+        self.poller.setInterval(poll)
+        self.poller.timeout.connect(self.check)
+
+    def request(self, players, position):
+        # 拖动中：第一次请求立即发出，之后每个间隔最多发出一次最新位置，停止拖动后再发出最后的位置
+        for player in players:
+            self.pending[player] = position
+        if not self.throttle.isActive():
+            self.flush()
+            self.throttle.start()
+
+    def tick(self):
+        if self.pending:
+            self.flush()
+        else:
+            self.throttle.stop()
+
+    def flush(self):
+        for player, position in list(self.pending.items()):
+            # 上一次跳转还没完成时先不发，避免解码器堆积跳转
+            if player in self.inflight:
+                continue
+            del self.pending[player]
+            self.issue(player, position, precise=False)
+
+    def seek(self, players, position, tag=None):
+        # 松开进度条：取消尚未发出的拖动跳转，立即精确跳转
+        self.throttle.stop()
+        if self.batch and self.tag is not None:
+            # 上一次带标记的跳转被新的跳转取代：仍然通知发起方，不让它一直等待
+            self.seeked.emit([], self.tag)
+        self.tag = tag
+        self.batch = list(players)
+        self.results = []
+        for player in players:
+            self.pending.pop(player, None)
+        if self.dispatcher is None:
+            for player in players:
+                self.issue(player, position, precise=True)
+            return
+        # 所有播放器同时跳转，延迟仍从下发的时刻算起
+        before = [player.get_time() for player in self.batch]
+        start = time.monotonic()
+        self.dispatcher.run(self.batch, "set_position", position)
+        for player, previous in zip(self.batch, before):
+            self.inflight[player] = (start, int(position * player.get_length()), previous, True)
+        self.poller.start()
+
+    def issue(self, player, position, precise):
+        before = player.get_time()
+        if precise:
+            player.set_position(position)
+        else:
+            fast_seek(player, position)
+        self.inflight[player] = (time.monotonic(), int(position * player.get_length()), before, precise)
+        self.poller.start()
+
+    def check(self):
+        now = time.monotonic()
+        for player, (start, target, before, precise) in list(self.inflight.items()):
+            current = player.get_time()
+            # 容差为一帧加一次轮询间隔（播放中的窗口在两次轮询之间会继续前进）
+            near = current >= 0 and abs(current - target) <= frame_ms(player) + self.poll
+            # 跳转发出后时间必须变化过才算完成，否则第一次轮询就会把尚未跳转的窗口当作已到位；
+            # 拖动中的关键帧跳转落在关键帧上，向目标移动了一半也算完成
+            moved = current >= 0 and current != before
+            landed = moved and (near or not precise and abs(current - target) < abs(before - target) / 2)
+            if not landed and near and not moved:
+                # 跳转前已经停在目标帧上（例如暂停的主播放器对齐到自己的位置），时间不会变化：
+                # 直接完成，但不记录延迟
+                del self.inflight[player]
+            elif landed:
+                latency = round((now - start) * 1000, 1)
+                self.latency.setdefault(player, deque(maxlen=self.history)).append(latency)
+                del self.inflight[player]
+                if precise and player in self.batch:
+                    self.results.append((player, latency))
+            elif now - start > self.timeout:
+                # 超时的跳转不计入延迟
+                del self.inflight[player]
+        if self.batch and not any(player in self.inflight for player in self.batch):
+            self.seeked.emit([(player, latency) for player, latency in self.results if player in self.batch],
+                             self.tag)
+            self.batch = []
+            self.tag = None
+        if not self.inflight:
+            self.poller.stop()
+
+    def last_latency(self, player):
+        samples = self.latency.get(player)
+        return samples[-1] if samples else 0
+
+    def forget(self, player):
+        # 播放器归还到池中时清除记录
+        self.pending.pop(player, None)
+        self.inflight.pop(player, None)
+        self.latency.pop(player, None)
+        if player in self.batch:
+            self.batch.remove(player)
+
+
+# --- 起始位置：:start-time 和 :start-paused 会一直留在媒体上，停止后再播放仍会回到该位置或再次暂停，
+#     所以打开后等第一次进入 Playing 状态再跳转和暂停，只生效一次 ---
+class StartPositions(QObject):
+    playing = pyqtSignal(object)  # 由 libvlc 线程发出，排队到 GUI 线程处理
+
+    def __init__(self, events, parent=None):
+        super().__init__(parent)
+        self.events = events  # events(player) -> 该播放器的 EventDispatcher（见 PlayerPool.events）
+        self.pending = {}     # player -> (起始毫秒, 是否暂停)
+        self.playing.connect(self.apply, Qt.QueuedConnection)
+
+    def arm(self, player, start_ms=0, paused=False):
+        # 在 set_media 之后、play 之前调用；重新打开媒体时覆盖上一次的设置
+        self.cancel(player)
+        if start_ms > 0 or paused:
+            self.pending[player] = (start_ms, paused)
+            self.events(player).attach(vlc.EventType.MediaPlayerPlaying, self._playing, player)
+
+    def cancel(self, player):
+        if self.pending.pop(player, None) is not None:
+            self.events(player).detach(vlc.EventType.MediaPlayerPlaying, self._playing)
+
+    def _playing(self, event, player):
+        self.playing.emit(player)
+
+    def apply(self, player):
+        start = self.pending.get(player)
+        if start is None:
+            return
+        self.cancel(player)
+        start_ms, paused = start
+        if start_ms > 0:
+            player.set_time(start_ms)
+        if paused:
+            player.set_pause(1)
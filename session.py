@@ -0,0 +1,20 @@
+import os
+import json
+
+
+def load_session(path):
+    # 会话文件不存在或损坏时返回空会话
+    try:
+        with open(path, encoding="utf-8") as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return session if isinstance(session, dict) else {}
+
+
+def save_session(path, session):
+    # 先写临时文件再替换，避免中途退出损坏会话
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(session, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
@@ -0,0 +1,154 @@
+import csv
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import vlc
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# 从 libvlc MediaStats 中导出的计数项
+COUNTERS = ("decoded_video", "displayed_pictures", "lost_pictures",
+            "decoded_audio", "played_abuffers", "lost_abuffers",
+            "read_bytes", "demux_read_bytes", "demux_corrupted")
+FIELDS = ("time", "tile", "fps") + COUNTERS + ("input_kbps", "demux_kbps", "seek_ms")
+
+
+def read_stats(media):
+    # 读取一个媒体的统计信息，不可用时返回 None；码率换算为 kbit/s
+    if media is None:
+        return None
+    stats = vlc.MediaStats()
+    if not media.get_stats(stats):
+        return None
+    values = {key: getattr(stats, key) for key in COUNTERS}
+    values["input_kbps"] = round(stats.input_bitrate * 8000, 1)
+    values["demux_kbps"] = round(stats.demux_bitrate * 8000, 1)
+    return values
+
+
+def overlay_text(row):
+    return (f"{row['fps']:.0f} fps  dec {row['decoded_video']}  disp {row['displayed_pictures']}  "
+            f"lost {row['lost_pictures']}  in {row['input_kbps']:.0f} kb/s  "
+            f"demux {row['demux_kbps']:.0f} kb/s  abuf lost {row['lost_abuffers']}")
+
+
+def show_overlay(player, text):
+    # 使用 libvlc 的 marquee 把文字叠加到视频画面上，原生窗口和共享帧缓冲都适用
+    player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 1)
+    player.video_set_marquee_int(vlc.VideoMarqueeOption.Position, 5)  # 左上角
+    player.video_set_marquee_int(vlc.VideoMarqueeOption.Size, 14)
+    player.video_set_marquee_int(vlc.VideoMarqueeOption.Timeout, 0)
+    player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, text)
+
+
+def hide_overlay(player):
+    player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 0)
+
+
+# --- 统计采集：定时读取每个窗口的媒体统计，计算帧率后发出 ---
+class StatsCollector(QObject):
+    updated = pyqtSignal(list)  # 每个窗口一行 dict，字段见 FIELDS
+
+    def __init__(self, tiles, interval=1000, latency=None, parent=None):
+        super().__init__(parent)
+        self.tiles = tiles        # 返回 [(窗口名, player, media), ...] 的函数
+        self.latency = latency    # 返回播放器最近一次跳转延迟（毫秒）的函数
+        self.previous = {}        # (窗口名, media) -> (时间, 已解码帧数)
+        self.rows = []
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.collect)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def collect(self):
+        now = time.time()
+        rows = []
+        previous = {}
+        for name, player, media in self.tiles():
+            values = read_stats(media)
+            if values is None:
+                continue
+            key = (name, media)
+            last_time, last_decoded = self.previous.get(key, (now, values["decoded_video"]))
+            elapsed = now - last_time
+            fps = (values["decoded_video"] - last_decoded) / elapsed if elapsed > 0 else 0.0
+            previous[key] = (now, values["decoded_video"])
+            seek_ms = self.latency(player) if self.latency is not None else 0
+            rows.append(dict(time=round(now, 3), tile=name, fps=round(fps, 1), seek_ms=seek_ms, **values))
+        self.previous = previous
+        self.rows = rows
+        self.updated.emit(rows)
+
+
+# --- 指标导出：追加写入 JSON lines / CSV 文件，或在本机端口提供 Prometheus 文本格式 ---
+class MetricsExporter:
+    def __init__(self, path=None, port=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows = []
+        self.server = None
+        if path:
+            self.csv = path.lower().endswith(".csv")
+            if self.csv:
+                with open(path, "a", newline="") as f:
+                    if f.tell() == 0:
+                        csv.writer(f).writerow(FIELDS)
+        if port:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def export(self, rows):
+        with self.lock:
+            self.rows = rows
+        if not self.path or not rows:
+            return
+        with open(self.path, "a", newline="") as f:
+            if self.csv:
+                writer = csv.writer(f)
+                for row in rows:
+                    writer.writerow([row[key] for key in FIELDS])
+            else:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+
+    def prometheus_text(self):
+        with self.lock:
+            rows = list(self.rows)
+        lines = []
+        for key in ("fps", "input_kbps", "demux_kbps", "seek_ms") + COUNTERS:
+            metric = f"mwvp_{key}" if key in ("fps", "input_kbps", "demux_kbps", "seek_ms") else f"mwvp_{key}_total"
+            lines.append(f"# TYPE {metric} {'gauge' if not metric.endswith('_total') else 'counter'}")
+            for row in rows:
+                lines.append(f'{metric}{{tile="{row["tile"]}"}} {row[key]}')
+        return "\n".join(lines) + "\n"
+
+    def handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,97 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (QDialog, QDialogButtonBox, QFormLayout, QComboBox, QSpinBox,
+                             QCheckBox)
+
+STREAM_SCHEMES = ("rtsp", "rtmp", "rtp", "udp", "http", "https", "mms", "srt")
+
+
+def is_stream(mrl):
+    return bool(mrl) and "://" in mrl and mrl.split("://", 1)[0].lower() in STREAM_SCHEMES
+
+
+def stream_options(caching=1000, low_latency=False, rtsp_tcp=False):
+    # 每个流单独的媒体选项：缓存时长（毫秒）、低延迟时钟、RTSP 走 TCP（丢包严重的网络）
+    options = [f":network-caching={caching}", f":live-caching={caching}"]
+    if low_latency:
+        options += [":clock-jitter=0", ":clock-synchro=0"]
+    if rtsp_tcp:
+        options.append(":rtsp-tcp")
+    return options
+
+
+# --- 断线重连：流出错或结束后按指数退避延迟重新打开，播放恢复后复位 ---
+class Reconnector(QObject):
+    reconnecting = pyqtSignal(int, int)  # 第几次重连, 延迟（毫秒）
+
+    def __init__(self, reconnect, initial=1000, maximum=30000, parent=None):
+        super().__init__(parent)
+        self.initial = initial
+        self.maximum = maximum
+        self.attempts = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(reconnect)
+
+    def schedule(self):
+        if self.timer.isActive():
+            return
+        delay = min(self.maximum, self.initial * 2 ** self.attempts)
+        self.attempts += 1
+        self.timer.start(delay)
+        self.reconnecting.emit(self.attempts, delay)
+
+    def reset(self):
+        self.attempts = 0
+        self.timer.stop()
+
+
+# --- 打开网络流：地址（保留最近使用的）、缓存、低延迟和 RTSP over TCP ---
+class StreamDialog(QDialog):
+    history = []  # 本次运行中打开过的地址
+
+    def __init__(self, caching=1000, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Open stream")
+        layout = QFormLayout(self)
+        self.url = QComboBox()
+        self.url.setEditable(True)
+        self.url.addItems(self.history)
+        self.url.setCurrentText(self.history[0] if self.history else "rtsp://")
+        self.url.setMinimumWidth(360)
+        layout.addRow("URL:", self.url)
+        self.caching = QSpinBox()
+        self.caching.setRange(0, 60000)
+        self.caching.setSingleStep(100)
+        self.caching.setSuffix(" ms")
+        self.caching.setValue(caching)
+        layout.addRow("Caching:", self.caching)
+        self.low_latency = QCheckBox("Low latency")
+        self.low_latency.toggled.connect(self.low_latency_toggled)
+        layout.addRow("", self.low_latency)
+        self.rtsp_tcp = QCheckBox("RTSP over TCP")
+        layout.addRow("", self.rtsp_tcp)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def low_latency_toggled(self, checked):
+        if checked:
+            self.caching.setValue(min(self.caching.value(), 200))
+
+    def stream(self):
+        # 返回 (地址, 媒体选项)，地址无效时返回 None
+        url = self.url.currentText().strip()
+        if not is_stream(url):
+            return None
+        if url in self.history:
+            self.history.remove(url)
+        self.history.insert(0, url)
+        return url, stream_options(self.caching.value(), self.low_latency.isChecked(), self.rtsp_tcp.isChecked())
+
+    @classmethod
+    def get_stream(cls, parent=None, caching=1000):
+        dialog = cls(caching, parent)
+        if dialog.exec_() != QDialog.Accepted:
+            return None
+        return dialog.stream()
@@ -0,0 +1,83 @@
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+# --- Single Video同步引擎：以第一个播放器为主时钟，用微调倍速或硬跳转纠正其余播放器的偏移 ---
+class SyncEngine(QObject):
+    drift_measured = pyqtSignal(list)  # 每个窗口相对主时钟的偏移（毫秒），主时钟自身为 0
+
+    def __init__(self, interval=500, nudge_threshold=40, seek_threshold=500, nudge=0.03, parent=None):
+        super().__init__(parent)
+        self.nudge_threshold = nudge_threshold  # 超过该偏移（毫秒）开始微调倍速
+        self.seek_threshold = seek_threshold    # 超过该偏移（毫秒）直接跳转
+        self.nudge = nudge                      # 微调倍速的幅度
+        self.players = []
+        self.base_rate = 1.0
+        self.nudged = set()                     # 当前处于微调倍速状态的播放器
+        self.drift = []
+        self.hold_until = 0.0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.correct)
+
+    def set_players(self, players):
+        self.players = list(players)
+        self.nudged.clear()
+        self.drift = [0] * len(self.players)
+
+    def set_rate(self, rate):
+        self.base_rate = rate
+        self.nudged.clear()
+
+    def start(self):
+        if len(self.players) > 1:
+            self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.restore_rates()
+
+    def running(self):
+        return self.timer.isActive()
+
+    def hold(self, ms):
+        # 跳转后播放器需要一段时间恢复，期间暂停纠偏
+        self.hold_until = time.monotonic() + ms / 1000.0
+        self.restore_rates()
+
+    def restore_rates(self):
+        for player in self.nudged:
+            player.set_rate(self.base_rate)
+        self.nudged.clear()
+
+    def measure(self):
+        master = self.players[0]
+        master_time = master.get_time()
+        if master_time < 0:
+            return None
+        return [0] + [player.get_time() - master_time for player in self.players[1:]]
+
+    def correct(self):
+        if len(self.players) < 2 or time.monotonic() < self.hold_until:
+            return
+        if not self.players[0].is_playing():
+            return
+        drift = self.measure()
+        if drift is None:
+            return
+        for player, offset in zip(self.players[1:], drift[1:]):
+            if abs(offset) >= self.seek_threshold:
+                player.set_time(self.players[0].get_time())
+                if player in self.nudged:
+                    player.set_rate(self.base_rate)
+                    self.nudged.discard(player)
+            elif abs(offset) >= self.nudge_threshold:
+                # 落后则加速、超前则减速
+                factor = 1 - self.nudge if offset > 0 else 1 + self.nudge
+                player.set_rate(self.base_rate * factor)
+                self.nudged.add(player)
+            elif player in self.nudged:
+                player.set_rate(self.base_rate)
+                self.nudged.discard(player)
+        self.drift = drift
+        self.drift_measured.emit(drift)
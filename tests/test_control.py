@@ -0,0 +1,173 @@
+import json
+import time
+import threading
+import http.client
+import pytest
+from PyQt5.QtWidgets import QLabel
+from control import ControlServer
+
+
+def wait_for(app, thread, timeout=5):
+    # 在测试线程中处理事件，服务线程排队的命令才会执行
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+    thread.join(0)
+    assert not thread.is_alive()
+
+
+def in_thread(app, function, *args):
+    result = {}
+
+    def target():
+        try:
+            result["value"] = function(*args)
+        except Exception as e:
+            result["error"] = e
+    thread = threading.Thread(target=target)
+    thread.start()
+    wait_for(app, thread)
+    return result
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    connection.request(method, path, body, headers or {})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read() or b"null")
+
+
+@pytest.fixture
+def server(qapp):
+    applied = []
+
+    def execute(commands):
+        for command in commands:
+            if command.get("cmd") == "bad":
+                raise ValueError("bad command")
+        applied.append(commands)
+        return [command.get("cmd") for command in commands]
+    server = ControlServer(execute, timeout=1)
+    server.applied = applied
+    yield server
+    server.close()
+
+
+def test_call_from_worker_thread(qapp, server):
+    result = in_thread(qapp, server.call, [{"cmd": "play"}, {"cmd": "state"}])
+    results, latency = result["value"]
+    assert results == ["play", "state"]
+    assert set(latency) == {"queue_ms", "apply_ms"}
+    assert server.applied == [[{"cmd": "play"}, {"cmd": "state"}]]
+    assert len(server.latency) == 1
+
+
+def test_call_on_gui_thread_applies_directly(server):
+    results, _ = server.call([{"cmd": "state"}])
+    assert results == ["state"]
+
+
+def test_rejected_batch_raises(qapp, server):
+    result = in_thread(qapp, server.call, [{"cmd": "play"}, {"cmd": "bad"}])
+    assert isinstance(result["error"], ValueError)
+    assert server.applied == []
+
+
+def test_timed_out_batch_is_not_applied_later(qapp, server):
+    server.timeout = 0.1
+    thread_result = {}
+    thread = threading.Thread(target=lambda: thread_result.update(
+        error=pytest.raises(TimeoutError, server.call, [{"cmd": "play"}])))
+    thread.start()
+    thread.join(5)  # 不处理事件：GUI 线程“卡住”
+    assert "error" in thread_result
+    for _ in range(10):
+        qapp.processEvents()
+    assert server.applied == []
+
+
+def test_http_batch(qapp, server):
+    body = json.dumps([{"cmd": "play"}, {"cmd": "stop"}])
+    result = in_thread(qapp, request, server, "POST", "/commands", body, {"Content-Type": "application/json"})
+    status, data = result["value"]
+    assert status == 200
+    assert data["results"] == ["play", "stop"]
+    result = in_thread(qapp, request, server, "POST", "/commands", json.dumps({"cmd": "state"}),
+                       {"Content-Type": "application/json; charset=utf-8"})
+    assert result["value"] == (200, {"result": "state", "latency": result["value"][1]["latency"]})
+
+
+def test_http_rejects_invalid_batch_atomically(qapp, server):
+    body = json.dumps([{"cmd": "play"}, {"cmd": "bad"}])
+    status, data = in_thread(qapp, request, server, "POST", "/commands", body,
+                             {"Content-Type": "application/json"})["value"]
+    assert status == 400
+    assert data["error"] == "bad command"
+    assert server.applied == []
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"Content-Type": "text/plain"}, 415),
+    ({"Content-Type": "application/x-www-form-urlencoded"}, 415),
+    ({"Content-Type": "application/json", "Host": "attacker.example:8765"}, 403),
+    ({"Content-Type": "application/json", "Origin": "http://attacker.example"}, 403),
+])
+def test_http_rejects_cross_site_requests(qapp, server, headers, status):
+    result = in_thread(qapp, request, server, "POST", "/commands", json.dumps({"cmd": "play"}), headers)
+    assert result["value"][0] == status
+    assert server.applied == []
+
+
+def test_http_accepts_localhost(qapp, server):
+    headers = {"Host": f"localhost:{server.port}", "Origin": f"http://localhost:{server.port}"}
+    status, data = in_thread(qapp, request, server, "GET", "/state", None, headers)["value"]
+    assert status == 200
+    assert data["result"] == "state"
+
+
+@pytest.fixture
+def window(qapp, tmp_path, monkeypatch):
+    # 不打开媒体时不会创建播放器，不需要 libvlc
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    import play
+    window = play.MultiVideoPlayer(session=str(tmp_path / "session.json"))
+    yield window
+    window.close()
+
+
+def test_run_commands_checks_whole_batch_first(window):
+    layout = window.current_layout
+    with pytest.raises(ValueError, match="command 2"):
+        window.run_commands([{"cmd": "layout", "layout": "4"}, {"cmd": "rate", "rate": 3}])
+    assert window.current_layout == layout
+    with pytest.raises(ValueError, match="command 3"):
+        # 批内切换到 Multi Video 后，tile 按新的窗口数检查
+        window.run_commands([{"cmd": "mode", "mode": "Multi Video"}, {"cmd": "layout", "layout": "4"},
+                             {"cmd": "play", "tile": 5}])
+    assert window.current_mode == "Single Video"
+
+
+@pytest.mark.parametrize("value", ["inf", "1e400", "nan", float("inf")])
+def test_run_commands_rejects_non_finite_time(window, value):
+    with pytest.raises(ValueError, match="command 1"):
+        window.run_commands([{"cmd": "seek", "time": value}])
+
+
+def test_run_commands_applies_valid_batch(window):
+    results = window.run_commands([{"cmd": "layout", "layout": "4"}, {"cmd": "state"}])
+    assert window.current_window_count == 4
+    assert results[1]["layout"] == "4"
+
+
+def test_open_disabled_when_libvlc_fails(qapp, window):
+    window.vlc_loader.thread.join()
+    if window.vlc_loader.instance is not None:
+        pytest.skip("libvlc is installed")
+    qapp.processEvents()
+    assert window.libvlc_failed
+    assert not window.open_btn.isEnabled()
+    labels = [label.toolTip() for label in window.status_bar.findChildren(QLabel)]
+    assert any("libvlc could not be initialised" in text for text in labels)
+    with pytest.raises(ValueError, match="libvlc"):
+        window.run_commands([{"cmd": "open", "path": "clip.mp4"}])
@@ -0,0 +1,78 @@
+import time
+import threading
+import pytest
+from dispatch import CommandDispatcher
+
+
+class FakePlayer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []     # (命令, 参数, 开始时间, 线程)
+
+    def play(self):
+        self.calls.append(("play", (), time.perf_counter(), threading.current_thread()))
+        time.sleep(self.delay)
+
+    def set_rate(self, rate):
+        self.calls.append(("set_rate", (rate,), time.perf_counter(), threading.current_thread()))
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = CommandDispatcher(workers=4, barrier_timeout=1000, wait_timeout=500)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def test_barrier_releases_all_calls_together(dispatcher):
+    players = [FakePlayer() for _ in range(4)]
+    # 占住一个线程一小段时间：其余调用要等它就绪后才一起开始
+    blocker = threading.Event()
+    dispatcher.executor.submit(blocker.wait, 0.1)
+    before = time.perf_counter()
+    timings = dispatcher.run(players, "set_rate", 1.5)
+    assert [player for player, _, _ in timings] == players
+    starts = [player.calls[0][2] for player in players]
+    assert all(player.calls[0][:2] == ("set_rate", (1.5,)) for player in players)
+    assert all(player.calls[0][3] is not threading.current_thread() for player in players)
+    assert min(starts) - before >= 0.09
+    assert max(starts) - min(starts) < 0.05
+
+
+def test_skew_is_latest_start(dispatcher):
+    timings = dispatcher.run([FakePlayer() for _ in range(3)], "play")
+    assert min(start for _, start, _ in timings) == 0
+    assert dispatcher.skew_ms == max(start for _, start, _ in timings)
+    assert all(end >= start for _, start, end in timings)
+    assert dispatcher.late == 0
+
+
+def test_serial_fallback_above_workers(dispatcher):
+    players = [FakePlayer() for _ in range(5)]
+    timings = dispatcher.run(players, "play")
+    assert len(timings) == 5
+    # 超出线程数时在调用线程中依次执行
+    assert all(player.calls[0][3] is threading.current_thread() for player in players)
+    starts = [player.calls[0][2] for player in players]
+    assert starts == sorted(starts)
+
+
+def test_single_player_runs_inline(dispatcher):
+    player = FakePlayer()
+    dispatcher.run([player], "play")
+    assert player.calls[0][3] is threading.current_thread()
+    assert dispatcher.skew_ms == 0
+
+
+def test_slow_call_does_not_block(dispatcher):
+    players = [FakePlayer(), FakePlayer(), FakePlayer(delay=2.0)]
+    before = time.perf_counter()
+    timings = dispatcher.run(players, "play")
+    assert time.perf_counter() - before < 1.5
+    assert [player for player, _, _ in timings] == players[:2]
+    assert dispatcher.late == 1
+
+
+def test_no_players(dispatcher):
+    assert dispatcher.run([], "play") == []
+    assert dispatcher.skew_ms == 0
@@ -0,0 +1,43 @@
+import ctypes
+from framebuffer import SharedFrameBuffer
+
+
+class Player:
+    def video_set_format_callbacks(self, setup, cleanup):
+        pass
+
+    def video_set_callbacks(self, lock, unlock, display, opaque):
+        pass
+
+
+def setup(frames, width=64, height=48):
+    chroma = ctypes.create_string_buffer(4)
+    values = [(ctypes.c_uint * 1)(value) for value in (width, height, 0, 0)]
+    frames._setup(None, chroma, *values)
+
+
+def test_frame_is_counted_and_lock_released(qapp):
+    frames = SharedFrameBuffer(Player())
+    setup(frames)
+    planes = (ctypes.c_void_p * 1)()
+    picture = frames._lock(None, planes)
+    assert planes[0] == ctypes.addressof(frames.buffer)
+    assert frames.lock.locked()
+    frames._unlock(None, picture, planes)
+    frames._display(None, picture)
+    assert frames.frame_count == 1 and frames._pending
+    assert not frames.lock.locked()
+
+
+def test_lock_after_cleanup_does_not_hold_lock(qapp):
+    frames = SharedFrameBuffer(Player())
+    setup(frames)
+    frames._cleanup(None)
+    planes = (ctypes.c_void_p * 1)()
+    picture = frames._lock(None, planes)
+    assert picture is None
+    assert not frames.lock.locked()
+    frames._unlock(None, picture, planes)
+    frames._display(None, picture)
+    assert frames.frame_count == 0 and not frames._pending
+    assert not frames.lock.locked()
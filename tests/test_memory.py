@@ -0,0 +1,35 @@
+from memory import MemoryBudget, DOWNGRADE_OPTIONS
+
+
+def test_tiles_degrade_one_by_one(qapp):
+    memory = MemoryBudget(tile_mb=150, downgrade_ratio=0.6)
+    memory.budget_mb = memory.used_mb + 400
+    decisions = []
+    memory.decision.connect(decisions.append)
+    results = []
+    for tile in range(4):
+        options = memory.check(1, "clip.mp4")
+        if options is not None:
+            memory.add([tile], options)
+        results.append(options)
+    # 前两个窗口正常打开，第三个降级，第四个放不下
+    assert results == [[], [], DOWNGRADE_OPTIONS, None]
+    assert sorted(memory.tiles) == [0, 1, 2]
+    assert memory.tiles[2][2] and not memory.tiles[1][2]
+    assert len(decisions) == 2
+
+
+def test_check_does_not_record(qapp):
+    memory = MemoryBudget(budget_mb=1, tile_mb=150)
+    used = memory.used_mb
+    assert memory.check(3, "clip.mp4") is None
+    assert memory.tiles == {} and memory.used_mb == used
+
+
+def test_reopening_a_tile_costs_nothing(qapp):
+    memory = MemoryBudget(tile_mb=150)
+    player = object()
+    memory.budget_mb = memory.used_mb + 200
+    assert memory.admit([player], "a.mp4") == []
+    memory.budget_mb = 1  # 已经在播放的窗口换文件不增加占用
+    assert memory.admit([player], "b.mp4") == []
@@ -0,0 +1,271 @@
+import os
+import mmap
+import time
+import struct
+import bisect
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import vlc
+from PyQt5.QtCore import Qt, QObject, QBuffer, QByteArray, QIODevice, QPoint, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QColor
+from PyQt5.QtWidgets import QSlider, QLabel, QStyle, QStyleOptionSlider
+from framebuffer import SharedFrameBuffer
+from probe import cache_key
+
+# 缩略图索引文件格式：
+#   头部   MAGIC, 数量(uint32), 宽(uint16), 高(uint16), 时长 ms(uint64)
+#   索引   每项 时间戳 ms(uint64), 偏移(uint64), 长度(uint32)
+#   数据   依次存放的 JPEG
+MAGIC = b"MWVPTHB1"
+HEADER = struct.Struct("<8sIHHQ")
+ENTRY = struct.Struct("<QQI")
+# 生成缩略图用的独立 libvlc 实例的参数
+THUMBNAIL_ARGS = ("--no-audio", "--quiet", "--no-video-title-show", "--no-sub-autodetect-file")
+
+
+# --- 只读的缩略图索引：整个文件内存映射，按时间二分查找 ---
+class ThumbnailIndex:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.width, self.height, self.duration_ms = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"not a thumbnail index: {path}")
+        self.entries = [ENTRY.unpack_from(self.map, HEADER.size + i * ENTRY.size) for i in range(count)]
+        self.times = [entry[0] for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def image_at(self, time_ms):
+        # 取不晚于给定时间的最近一张缩略图
+        if not self.entries:
+            return QImage()
+        i = max(0, bisect.bisect_right(self.times, time_ms) - 1)
+        _, offset, length = self.entries[i]
+        return QImage.fromData(self.map[offset:offset + length], "JPG")
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def write_index(path, width, height, duration_ms, thumbs):
+    # thumbs: [(时间戳, JPEG bytes), ...]；先写临时文件再替换
+    offset = HEADER.size + ENTRY.size * len(thumbs)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(thumbs), width, height, duration_ms))
+        for timestamp, data in thumbs:
+            f.write(ENTRY.pack(timestamp, offset, len(data)))
+            offset += len(data)
+        for _, data in thumbs:
+            f.write(data)
+    os.replace(tmp, path)
+
+
+def jpeg_bytes(image, quality=70):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "JPG", quality)
+    return bytes(data)
+
+
+def wait_frame(frames, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while frames.frame_count == count:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def capture_thumbnails(instance, path, duration_ms, width, height, interval, cancelled=lambda: False):
+    # 解码到内存后按关键帧跳转取帧，返回 [(时间戳, JPEG bytes), ...]；会阻塞，只在后台线程或辅助子进程中调用
+    player = instance.media_player_new()
+    frames = SharedFrameBuffer(player, width, height)
+    # 只按关键帧跳转，速度远快于精确跳转
+    media = instance.media_new(path, ":input-fast-seek", ":no-audio")
+    player.set_media(media)
+    thumbs = []
+    try:
+        player.play()
+        if not wait_frame(frames, frames.frame_count):
+            return thumbs
+        player.set_pause(1)
+        for timestamp in range(0, duration_ms, interval):
+            if cancelled():
+                return []
+            count = frames.frame_count
+            player.set_time(timestamp)
+            if not wait_frame(frames, count):
+                continue
+            with frames.lock:
+                image = frames.image.copy()
+            if not image.isNull():
+                thumbs.append((timestamp, jpeg_bytes(image)))
+    finally:
+        player.stop()
+        player.release()
+        media.release()
+    return thumbs
+
+
+# --- 后台生成缩略图索引：独立的无音频 libvlc 实例，解码到内存后按关键帧跳转取帧 ---
+class ThumbnailIndexer(QObject):
+    ready = pyqtSignal(str, object)  # path, ThumbnailIndex
+    built = pyqtSignal(str, str)     # 由后台线程发出，排队到 GUI 线程处理：path, 索引文件（生成失败时为空）
+
+    def __init__(self, directory, width=160, height=90, max_thumbs=120, min_interval=2000, capture=None,
+                 parent=None):
+        super().__init__(parent)
+        # capture(path, duration_ms, width, height, interval) 不为 None 时由它取帧（进程隔离模式下在辅助子进程中）
+        self.remote_capture = capture
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.width = width
+        self.height = height
+        self.max_thumbs = max_thumbs
+        self.min_interval = min_interval  # 两张缩略图之间的最小间隔（毫秒）
+        self.indexes = {}                 # path -> ThumbnailIndex
+        self.pending = set()
+        self.instance = None
+        self.closed = False
+        # 单线程执行，避免和播放争抢 CPU
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbs")
+        self.built.connect(self.finish, Qt.QueuedConnection)
+
+    def sidecar(self, path):
+        key = cache_key(path)
+        if key is None:
+            return None
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".thumbs")
+
+    def request(self, path, duration_ms):
+        # 已有索引文件时直接加载，否则在后台生成
+        if path in self.indexes:
+            self.ready.emit(path, self.indexes[path])
+            return
+        sidecar = self.sidecar(path)
+        if sidecar is None or duration_ms <= 0 or path in self.pending:
+            return
+        if os.path.exists(sidecar):
+            self.load(path, sidecar)
+            return
+        self.pending.add(path)
+        self.executor.submit(self.build, path, duration_ms, sidecar)
+
+    def load(self, path, sidecar):
+        try:
+            index = ThumbnailIndex(sidecar)
+        except (OSError, ValueError, struct.error):
+            return
+        self.indexes[path] = index
+        self.ready.emit(path, index)
+
+    def build(self, path, duration_ms, sidecar):
+        # 后台线程：只生成索引文件，indexes 和 pending 只在 GUI 线程中修改
+        thumbs = []
+        try:
+            thumbs = self.capture(path, duration_ms)
+            if thumbs:
+                write_index(sidecar, self.width, self.height, duration_ms, thumbs)
+        finally:
+            self.built.emit(path, sidecar if thumbs else "")
+
+    def finish(self, path, sidecar):
+        self.pending.discard(path)
+        if sidecar and not self.closed:
+            self.load(path, sidecar)
+
+    def capture(self, path, duration_ms):
+        interval = max(self.min_interval, duration_ms // self.max_thumbs)
+        if self.remote_capture is not None:
+            try:
+                return self.remote_capture(path, duration_ms, self.width, self.height, interval)
+            except Exception:
+                return []  # 辅助子进程中的异常、崩溃或超时都视为生成失败
+        if self.instance is None:
+            self.instance = vlc.Instance(*THUMBNAIL_ARGS)
+        return capture_thumbnails(self.instance, path, duration_ms, self.width, self.height, interval,
+                                  lambda: self.closed)
+
+    def shutdown(self):
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for index in self.indexes.values():
+            index.close()
+        self.indexes.clear()
+
+
+# --- 带悬停预览的进度条：鼠标悬停或拖动时显示对应时间点的缩略图，松开后才真正跳转 ---
+class PreviewSlider(QSlider):
+    def __init__(self, orientation, parent=None):
+        super().__init__(orientation, parent)
+        self.setMouseTracking(True)
+        self.duration_ms = 0
+        self.index = None
+        self.preview = None  # 预览弹窗在第一次使用时才创建，多窗口布局下每个进度条的开销更小
+        self.sliderMoved.connect(self.show_preview_at_value)
+        self.sliderReleased.connect(self.hide_preview)
+
+    def set_media(self, duration_ms, index=None):
+        self.duration_ms = duration_ms
+        self.index = index
+
+    def value_at(self, x):
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        handle = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderHandle, self)
+        span = self.width() - handle.width()
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - handle.width() // 2, span)
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        if not self.isSliderDown():
+            self.show_preview(self.value_at(event.x()), event.x())
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        if not self.isSliderDown():
+            self.hide_preview()
+
+    def hide_preview(self):
+        if self.preview is not None:
+            self.preview.hide()
+
+    def show_preview_at_value(self, value):
+        span = self.maximum() - self.minimum() or 1
+        self.show_preview(value, int((value - self.minimum()) / span * self.width()))
+
+    def show_preview(self, value, x):
+        if self.duration_ms <= 0:
+            return
+        time_ms = int((value - self.minimum()) / ((self.maximum() - self.minimum()) or 1) * self.duration_ms)
+        seconds = time_ms // 1000
+        label = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+        image = self.index.image_at(time_ms) if self.index is not None else QImage()
+        if self.preview is None:
+            self.preview = QLabel(self, Qt.ToolTip)  # 独立的弹出窗口，随进度条一起销毁
+            self.preview.setAlignment(Qt.AlignCenter)
+            self.preview.setStyleSheet("background-color: black; color: white; border: 1px solid #444;")
+        if image.isNull():
+            # 索引尚未生成时只显示时间
+            self.preview.setPixmap(QPixmap())
+            self.preview.setText(label)
+        else:
+            # 在缩略图底部绘制时间
+            pixmap = QPixmap.fromImage(image)
+            painter = QPainter(pixmap)
+            rect = pixmap.rect().adjusted(0, pixmap.height() - 16, 0, 0)
+            painter.fillRect(rect, QColor(0, 0, 0, 160))
+            painter.setPen(Qt.white)
+            painter.drawText(rect, Qt.AlignCenter, label)
+            painter.end()
+            self.preview.setPixmap(pixmap)
+        self.preview.adjustSize()
+        pos = self.mapToGlobal(QPoint(x - self.preview.width() // 2, -self.preview.height() - 4))
+        self.preview.move(pos)
+        self.preview.show()
@@ -0,0 +1,46 @@
+import re
+import math
+
+FRAME_PATTERN = re.compile(r"^(?:#\s*(\d+)|(\d+)\s*f)$")
+
+
+def format_timecode(time_ms):
+    # 时:分:秒.毫秒
+    seconds, ms = divmod(max(0, int(time_ms)), 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.{ms:03d}"
+
+
+def frame_number(time_ms, fps):
+    # 当前时间对应的帧号（从 0 开始），帧率未知时返回 None
+    return int(time_ms * fps / 1000 + 0.5) if fps else None
+
+
+def time_text(time_ms, fps):
+    frame = frame_number(time_ms, fps)
+    return format_timecode(time_ms) if frame is None else f"{format_timecode(time_ms)}  #{frame}"
+
+
+def parse_timecode(text, fps=None):
+    # 支持 1:02:03.5、02:03、75.2（秒）以及 #1500 或 1500f（帧号，需要帧率），返回毫秒
+    text = text.strip().lower()
+    match = FRAME_PATTERN.match(text)
+    if match:
+        if not fps:
+            raise ValueError("frame rate unknown, enter a time instead of a frame number")
+        return int(int(match.group(1) or match.group(2)) * 1000 / fps)
+    parts = text.split(":")
+    if not text or len(parts) > 3:
+        raise ValueError(f"bad time {text!r}, expected [[hh:]mm:]ss[.mmm] or #frame")
+    seconds = 0.0
+    for part in parts:
+        try:
+            value = float(part)
+        except ValueError:
+            raise ValueError(f"bad time {text!r}, expected [[hh:]mm:]ss[.mmm] or #frame") from None
+        if value < 0:
+            raise ValueError("time cannot be negative")
+        seconds = seconds * 60 + value
+    if not math.isfinite(seconds):
+        # inf、nan 以及 1e400 这类超出范围的数值
+        raise ValueError(f"bad time {text!r}, expected [[hh:]mm:]ss[.mmm] or #frame")
+    return int(round(seconds * 1000))